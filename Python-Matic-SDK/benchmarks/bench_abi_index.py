@@ -0,0 +1,106 @@
+"""
+Compares the memory held for the ABIs of many contracts, and lookup times, between the nested dict mappings
+ABIParser used to store per contract and the slotted ABIIndex it now wraps. Every contract ABI is decoded from
+its own JSON document, as when ABIs are fetched from MaticVigil one contract at a time.
+
+    python benchmarks/bench_abi_index.py [--contracts 2000] [--functions 40] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from maticvigil.EVContractUtils import ABIParser
+from maticvigil.abi_index import ABIIndex, READ_MUTABILITIES
+
+
+def make_abi(n_functions):
+    """
+    :return: an ERC20 like ABI with n_functions functions, events and a constructor, including tuple types
+    """
+    abi = [{'type': 'constructor', 'stateMutability': 'nonpayable', 'inputs': [
+        {'name': 'name_', 'type': 'string'}, {'name': 'symbol_', 'type': 'string'},
+        {'name': 'holders', 'type': 'address[]'}
+    ]}]
+    for i in range(n_functions):
+        if i % 2:
+            abi.append({'type': 'function', 'name': f'balanceOf{i}', 'stateMutability': 'view',
+                        'inputs': [{'name': 'account', 'type': 'address'}],
+                        'outputs': [{'name': '', 'type': 'uint256'}]})
+        else:
+            abi.append({'type': 'function', 'name': f'transfer{i}', 'stateMutability': 'nonpayable',
+                        'inputs': [{'name': 'recipient', 'type': 'address'}, {'name': 'amount', 'type': 'uint256'},
+                                   {'name': 'memo', 'type': 'tuple', 'components': [
+                                       {'name': 'note', 'type': 'string'}, {'name': 'ref', 'type': 'bytes32'}]}],
+                        'outputs': [{'name': '', 'type': 'bool'}]})
+    for i in range(max(n_functions // 8, 1)):
+        abi.append({'type': 'event', 'name': f'Transfer{i}', 'anonymous': False, 'inputs': [
+            {'name': 'from', 'type': 'address', 'indexed': True}, {'name': 'to', 'type': 'address', 'indexed': True},
+            {'name': 'value', 'type': 'uint256', 'indexed': False}
+        ]})
+    return abi
+
+
+def legacy_mappings(abi_json):
+    parser = ABIParser(abi_json)
+    parser.load_abi()
+    mappings = (parser._events_mapping, parser._functions_mapping, parser._functions_name_to_hash,
+                parser._functions_selector_to_hash, parser._constructor_mapping)
+    # round trip, so that every string is a fresh object, as when the mappings were filled from the decoded ABI
+    return json.loads(json.dumps(mappings))
+
+
+def retained(build, documents):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build(json.loads(doc)) for doc in documents]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return size, kept
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--contracts', type=int, default=2000, help='number of contract ABIs held')
+    arg_parser.add_argument('--functions', type=int, default=40, help='functions per contract ABI')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='lookup timing runs, the fastest is reported')
+    args = arg_parser.parse_args()
+
+    documents = [json.dumps(make_abi(args.functions))] * args.contracts
+    legacy_size, legacy = retained(legacy_mappings, documents)
+    index_size, indexes = retained(ABIIndex, documents)
+    print(f'{args.contracts} contracts, {args.functions} functions each')
+    print(f'{"nested dicts":>14}: {legacy_size / 2 ** 20:8.1f}MB')
+    print(f'{"ABIIndex":>14}: {index_size / 2 ** 20:8.1f}MB ({legacy_size / index_size:.1f}x smaller)')
+
+    events, functions, name_to_hash, selector_to_hash, _ = legacy[0]
+    index = indexes[0]
+    names = list(name_to_hash)
+    selectors = list(selector_to_hash)
+    lookups = {
+        'selector by name': (
+            lambda: [functions[name_to_hash[n]]['selector'] for n in names],
+            lambda: [index.functions_by_name[n].selector for n in names],
+        ),
+        'types by selector': (
+            lambda: [functions[selector_to_hash[s]]['types'] for s in selectors],
+            lambda: [index.functions_by_selector[s].input_types for s in selectors],
+        ),
+        'getters': (
+            lambda: [fn for fn in functions.values() if fn['stateMutability'] in READ_MUTABILITIES],
+            lambda: index.getters(),
+        ),
+    }
+    print(f'\n{"lookup":>18}{"nested dicts":>15}{"ABIIndex":>12}')
+    for label, (legacy_fn, index_fn) in lookups.items():
+        t_legacy = min(timeit.repeat(legacy_fn, number=1000, repeat=args.repeat))
+        t_index = min(timeit.repeat(index_fn, number=1000, repeat=args.repeat))
+        print(f'{label:>18}{t_legacy * 1000:>13.2f}us{t_index * 1000:>10.2f}us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Compares the import scan done on every deployed source file: the full ANTLR parse of solidity_parser
+against the tokenizer based scan_imports() used by default. Sources are built from the example contracts,
+repeated to reach real-world sizes, with import directives in every form and decoy imports in comments and strings.
+
+    python benchmarks/bench_import_scan.py [--sizes 4,32,256] [--repeat 3]
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+SDK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, SDK_DIR)
+
+from maticvigil.sources import scan_imports, antlr_imports
+
+HEADER = '''pragma solidity ^0.5.17;
+pragma experimental ABIEncoderV2;
+
+import "./Ownable.sol";
+import './lib/SafeMath.sol' as SafeMath;
+import * as Strings from "@openzeppelin/contracts/utils/Strings.sol";
+import {ERC20, IERC20 as Token} from "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+// import "./Commented.sol";
+/* import "./BlockCommented.sol"; */
+'''
+
+
+def example_contracts():
+    """
+    :return: example contracts without their pragma and import lines, so that they can be concatenated
+    """
+    bodies = list()
+    for path in sorted(glob.glob(os.path.join(SDK_DIR, 'examples', '**', '*.sol'), recursive=True)):
+        with open(path) as f:
+            bodies.append(re.sub(r'^\s*(pragma|import)\b[^;]*;', '', f.read(), flags=re.MULTILINE))
+    return bodies
+
+
+def make_source(kb):
+    """
+    :return: a source of about kb kilobytes, the example contracts are repeated under new names
+    """
+    bodies = example_contracts()
+    parts = [HEADER]
+    size = len(HEADER)
+    n = 0
+    while size < kb * 1024:
+        body = bodies[n % len(bodies)]
+        # contract names must stay unique for the source to parse
+        body = re.sub(r'\b(contract|interface|library)\s+(\w+)', lambda m: f'{m.group(1)} {m.group(2)}_{n}', body)
+        body += f'\ncontract Decoy_{n} {{ string constant note = "import \\"./NotAnImport.sol\\";"; }}\n'
+        parts.append(body)
+        size += len(body)
+        n += 1
+    return ''.join(parts)
+
+
+def bench(fn, source, repeat):
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(source)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--sizes', default='4,32,256', help='comma separated source sizes in KB')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='runs per scanner, the fastest is reported')
+    args = arg_parser.parse_args()
+
+    # the first parse pays for importing the grammar, keep it out of the timings
+    antlr_imports(HEADER)
+    print(f'{"source":>10}{"lines":>8}{"imports":>9}{"ANTLR parse":>15}{"scan_imports":>15}{"speedup":>10}')
+    for kb in (int(s) for s in args.sizes.split(',')):
+        source = make_source(kb)
+        t_antlr, expected = bench(antlr_imports, source, args.repeat)
+        t_scan, found = bench(scan_imports, source, max(args.repeat, 20))
+        assert found == expected, f'{found} != {expected}'
+        print(
+            f'{len(source) // 1024:>8}KB{source.count(chr(10)):>8}{len(found):>9}'
+            f'{t_antlr * 1000:>13.1f}ms{t_scan * 1000:>13.3f}ms{t_antlr / t_scan:>9.0f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Measures the cold import time of the SDK with `python -X importtime` and guards the startup budget:
+exits non zero when an import takes longer than its budget, or when it loads a dependency that only
+deploys need (eth_account, eth_abi, the ANTLR based Solidity parser, ...).
+
+    python benchmarks/bench_import_time.py [--runs 5] [--budget-ms 50] [--evcore-budget-ms 250] [--top 15]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+SDK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# modules that reading and writing contracts must not pull in
+DEPLOY_ONLY_MODULES = ('solidity_parser', 'antlr4', 'eth_abi', 'eth_account', 'eth_utils', 'eth_keyfile')
+
+# (name, import statement, budget argument, modules that must stay unloaded)
+SCENARIOS = [
+    ('import maticvigil', 'import maticvigil', 'budget_ms', DEPLOY_ONLY_MODULES + ('requests', 'asyncio')),
+    ('from maticvigil.EVCore import EVCore', 'from maticvigil.EVCore import EVCore', 'evcore_budget_ms', DEPLOY_ONLY_MODULES + ('asyncio',))
+]
+
+_IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def measure(statement):
+    """
+    Imports in a fresh interpreter
+    :return: tuple of (cumulative microseconds per imported module, total microseconds spent importing the SDK, loaded module names)
+    """
+    code = f'{statement}; import sys; print(" ".join(sys.modules))'
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code], cwd=SDK_DIR, check=True,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True
+    )
+    cumulative = dict()
+    total = 0
+    # nested imports are reported before the top level import pulling them in
+    nested = dict()
+    for line in proc.stderr.splitlines():
+        m = _IMPORT_TIME_LINE.match(line)
+        if not m:
+            continue
+        _, cumulative_us, indent, name = m.groups()
+        nested[name] = int(cumulative_us)
+        if indent:
+            continue
+        # keep what the SDK imported, drop interpreter startup imports (site, encodings, ...)
+        if name.split('.', 1)[0] == 'maticvigil':
+            cumulative.update(nested)
+            total += int(cumulative_us)
+        nested = dict()
+    return cumulative, total, proc.stdout.split()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per import, the fastest run is reported')
+    arg_parser.add_argument('--budget-ms', type=float, default=50.0, help='budget of `import maticvigil`')
+    arg_parser.add_argument('--evcore-budget-ms', type=float, default=250.0, help='budget of `from maticvigil.EVCore import EVCore`')
+    arg_parser.add_argument('--top', type=int, default=15, help='slowest modules listed per import')
+    args = arg_parser.parse_args()
+
+    failures = list()
+    for name, statement, budget_arg, forbidden in SCENARIOS:
+        budget_ms = getattr(args, budget_arg)
+        runs = [measure(statement) for _ in range(args.runs)]
+        cumulative, total, loaded = min(runs, key=lambda r: r[1])
+        total_ms = total / 1000.0
+        print(f'{name}: {total_ms:.1f}ms (budget {budget_ms:.0f}ms, fastest of {args.runs})')
+        for module, us in sorted(cumulative.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+            print(f'    {us / 1000.0:>9.2f}ms  {module}')
+        if total_ms > budget_ms:
+            failures.append(f'{name} took {total_ms:.1f}ms, over its {budget_ms:.0f}ms budget')
+        unexpected = sorted(m for m in loaded if m.split('.', 1)[0] in forbidden)
+        if unexpected:
+            failures.append(f'{name} loaded {", ".join(sorted(set(m.split(".", 1)[0] for m in unexpected)))}')
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Compares the old response decode path of make_http_call (materialize response.text, then response.json())
+with the single pass decode straight from the body bytes.
+
+    python benchmarks/bench_json_decode.py [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from maticvigil import json_codec
+from payloads import make_large_swagger_spec, make_read_response, make_small_read_response
+
+
+def make_response(body):
+    response = requests.models.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    response._content = body
+    return response
+
+
+def old_path(body):
+    response = make_response(body)
+    _ = response.text
+    return response.json()
+
+
+def stdlib_bytes_path(body):
+    response = make_response(body)
+    return json.loads(response.content)
+
+
+def fast_path(body):
+    response = make_response(body)
+    return json_codec.loads(response.content)
+
+
+def bench(fn, body, repeat):
+    number, _ = timeit.Timer(lambda: fn(body)).autorange()
+    return min(timeit.repeat(lambda: fn(body), number=number, repeat=repeat)) / number
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    payloads = {
+        'swagger spec (300 paths)': make_large_swagger_spec('https://mainnet-api.maticvigil.com/v1.0', '0x' + 'ab' * 20),
+        'array read (1000 items)': make_read_response(1000),
+        'scalar read': make_small_read_response()
+    }
+    print(f'JSON backend: {json_codec.JSON_BACKEND}')
+    print(f'{"payload":<28}{"bytes":>10}{"text+json()":>16}{"stdlib bytes":>16}{"fast path":>14}{"speedup":>10}')
+    for name, payload in payloads.items():
+        body = json.dumps(payload).encode('utf-8')
+        assert old_path(body) == fast_path(body)
+        t_old = bench(old_path, body, args.repeat)
+        t_std = bench(stdlib_bytes_path, body, args.repeat)
+        t_fast = bench(fast_path, body, args.repeat)
+        print(f'{name:<28}{len(body):>10}{t_old * 1e6:>14.1f}us{t_std * 1e6:>14.1f}us{t_fast * 1e6:>12.1f}us{t_old / t_fast:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,420 @@
+"""
+Local stand-in for the MaticVigil API, so that the SDK can be benchmarked and load tested offline.
+Implements the endpoints the SDK talks to:
+
+    POST /api/login, /api/signup, /api/compile, /api/deploy
+    POST /api/hooks/{add,list,activate,deactivate,updateEvents,transactions}
+    GET  /api/v1.0/swagger/{contract_address}           (with ETag / If-None-Match support)
+    GET  /api/v1.0/contract/{contract_address}/{fn}/... read calls
+    POST /api/v1.0/contract/{contract_address}/{fn}     write calls, answered with a txHash
+    WS   /ws                                            register/heartbeat/unregister, then 'otm', 'contractmon'
+                                                        and 'event' payloads once transactions 'confirm'
+
+Every contract behaves like examples/microblog.sol. Run it standalone with
+
+    python benchmarks/mock_api_server.py --port 8585 --latency 0.002 --confirm-delay 0.5
+
+and point the SDK at it through a settings.json whose INTERNAL_API_ENDPOINT is http://127.0.0.1:8585/api,
+found by setting MATICVIGIL_SETTINGS_DIR. run_benchmarks.py does all of this by itself.
+"""
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tornado.httpserver
+import tornado.ioloop
+import tornado.netutil
+import tornado.web
+import tornado.websocket
+from tornado.options import define, options
+from payloads import (
+    make_swagger_spec,
+    make_large_swagger_spec,
+    MICROBLOG_GETTERS,
+    MICROBLOG_WRITERS,
+    MICROBLOG_ABI
+)
+
+mock_logger = logging.getLogger('MockMaticVigilAPI')
+
+API_PREFIX_PATH = '/api/v1.0'
+API_KEY = '1212-abcd-mock-write-key'
+READ_KEY = '3434-efgh-mock-read-key'
+
+
+def new_tx_hash():
+    return '0x' + os.urandom(32).hex()
+
+
+def new_contract_address():
+    return '0x' + os.urandom(20).hex()
+
+
+class MockMaticVigil(object):
+    """
+    In-memory state of the stand-in API: deployed contracts, their microblog state, registered hooks
+    and websocket subscribers.
+    :param latency : seconds every HTTP request is delayed by, to simulate the network round trip
+    :param confirm_delay : seconds after which a sent transaction is reported as confirmed over /ws
+    :param spec : 'microblog' serves the microblog OpenAPI spec, 'large' a 300 function spec
+    """
+    def __init__(self, latency=0.0, confirm_delay=0.1, spec='microblog'):
+        self.latency = latency
+        self.confirm_delay = confirm_delay
+        self.spec = spec
+        self.port = None
+        self.contracts = dict()
+        self.hooks = dict()
+        self.hook_ids = itertools.count(1)
+        self.subscribers = set()
+        self.requests = 0
+        self._specs = dict()
+
+    @property
+    def api_prefix(self):
+        return f'http://127.0.0.1:{self.port}{API_PREFIX_PATH}'
+
+    @property
+    def internal_api_endpoint(self):
+        return f'http://127.0.0.1:{self.port}/api'
+
+    def contract(self, contract_address):
+        contract_address = contract_address.lower()
+        c = self.contracts.get(contract_address)
+        if c is None:
+            c = self.contracts[contract_address] = {
+                'name': 'Microblog',
+                'address': contract_address,
+                'state': {'blogTitle': 'TheBlog', 'ownerName': 'anomit', 'owner': '0x' + '00' * 20, 'posts': []}
+            }
+        return c
+
+    def swagger(self, contract_address):
+        """
+        :return: tuple of (serialized spec, ETag)
+        """
+        contract_address = contract_address.lower()
+        if contract_address not in self._specs:
+            if self.spec == 'large':
+                spec = make_large_swagger_spec(self.api_prefix, contract_address)
+            else:
+                spec = make_swagger_spec(self.api_prefix, contract_address, MICROBLOG_GETTERS, MICROBLOG_WRITERS)
+            body = json.dumps(spec).encode('utf-8')
+            self._specs[contract_address] = body, '"%s"' % hashlib.sha1(body).hexdigest()
+        return self._specs[contract_address]
+
+    def account_info(self):
+        return {
+            'key': API_KEY,
+            'readKey': READ_KEY,
+            'api_prefix': self.api_prefix,
+            'contracts': [{'name': c['name'], 'address': c['address'], 'appId': None} for c in self.contracts.values()],
+            'hooks': list(self.hooks.keys()),
+            'hook_events': []
+        }
+
+    def read(self, contract_address, fn_name, args):
+        state = self.contract(contract_address)['state']
+        if fn_name in ('blogTitle', 'ownerName', 'owner'):
+            return [{'string': state[fn_name]}]
+        if fn_name in ('getPostId', 'posts'):
+            idx = int(args[0]) if args and args[0].isdigit() else 0
+            posts = state['posts']
+            if idx < len(posts):
+                return [{'string': v} for v in posts[idx]]
+            return [{'string': ''}, {'string': ''}, {'string': ''}, {'string': ''}]
+        return [{'uint256': 0}]
+
+    def write(self, contract_address, fn_name, params):
+        contract = self.contract(contract_address)
+        state = contract['state']
+        event = None
+        if fn_name == 'changeBlogTitle':
+            state['blogTitle'] = params.get('_blogTitle', '')
+        elif fn_name == 'addPost':
+            post = [params.get(k, '') for k in ('title', 'body', 'url', 'photo')]
+            state['posts'].append(post)
+            event = ('NewPost', dict(zip(('title', 'body', 'url', 'photo'), post)))
+        tx_hash = new_tx_hash()
+        self.confirm_later(self.contractmon_payload(contract['address'], tx_hash))
+        if event:
+            self.confirm_later({
+                'type': 'event',
+                'event_name': event[0],
+                'event_data': event[1],
+                'txHash': tx_hash,
+                'contract': contract['address'],
+                'ctime': int(time.time())
+            })
+        return tx_hash
+
+    def deploy(self, contract_name):
+        contract_address = new_contract_address()
+        self.contract(contract_address)['name'] = contract_name
+        tx_hash = new_tx_hash()
+        self.confirm_later({'type': 'otm', 'txHash': tx_hash, 'contract': contract_address, 'status': 1, 'ctime': int(time.time())})
+        return contract_address, tx_hash
+
+    @staticmethod
+    def contractmon_payload(contract_address, tx_hash):
+        return {'type': 'contractmon', 'txHash': tx_hash, 'contract': contract_address, 'status': 1, 'ctime': int(time.time())}
+
+    def confirm_later(self, payload):
+        message = json.dumps(payload)
+        tornado.ioloop.IOLoop.current().call_later(self.confirm_delay, self.broadcast, message)
+
+    def broadcast(self, message):
+        for ws in list(self.subscribers):
+            try:
+                ws.write_message(message)
+            except tornado.websocket.WebSocketClosedError:
+                self.subscribers.discard(ws)
+
+
+class MockHandler(tornado.web.RequestHandler):
+    def initialize(self, api):
+        self.api = api
+
+    async def prepare(self):
+        self.api.requests += 1
+        if self.api.latency:
+            await asyncio.sleep(self.api.latency)
+
+    def body_json(self):
+        try:
+            return json.loads(self.request.body) if self.request.body else dict()
+        except ValueError:
+            raise tornado.web.HTTPError(400)
+
+    def check_signed(self):
+        body = self.body_json()
+        if not body.get('msg') or not body.get('sig'):
+            self.set_status(401)
+            self.finish({'success': False, 'error': 'Missing signed message'})
+            return None
+        return body
+
+    def check_api_key(self):
+        if self.request.headers.get('X-API-KEY') != API_KEY:
+            self.set_status(403)
+            self.finish({'success': False, 'error': 'Bad API key'})
+            return False
+        return True
+
+
+class LoginHandler(MockHandler):
+    def post(self):
+        if self.check_signed() is not None:
+            self.write({'success': True, 'data': self.api.account_info()})
+
+
+class SignupHandler(MockHandler):
+    def post(self):
+        if self.check_signed() is not None:
+            self.write({'success': True, 'data': {}})
+
+
+class CompileHandler(MockHandler):
+    def post(self):
+        body = self.check_signed()
+        if body is None:
+            return
+        if not body.get('sources') or body.get('sourceFile') not in body['sources']:
+            self.set_status(400)
+            self.finish({'success': False, 'error': 'Missing sources'})
+            return
+        self.write({'success': True, 'data': {'contract': {'abi': MICROBLOG_ABI}}})
+
+
+class DeployHandler(MockHandler):
+    def post(self):
+        body = self.check_signed()
+        if body is None:
+            return
+        contract_address, tx_hash = self.api.deploy(body.get('name', 'Contract'))
+        self.write({'success': True, 'data': {'contract': contract_address, 'txhash': tx_hash}})
+
+
+class SwaggerHandler(MockHandler):
+    def get(self, contract_address):
+        body, etag = self.api.swagger(contract_address)
+        self.set_header('ETag', etag)
+        self.set_header('Cache-Control', 'max-age=300')
+        if self.request.headers.get('If-None-Match') == etag:
+            self.set_status(304)
+            return
+        self.set_header('Content-Type', 'application/json')
+        self.write(body)
+
+    def compute_etag(self):
+        # the ETag is computed once per spec in SwaggerHandler.get()
+        return None
+
+
+class ContractHandler(MockHandler):
+    def get(self, contract_address, fn_path):
+        fn_name, *args = fn_path.split('/')
+        self.write({'success': True, 'data': self.api.read(contract_address, fn_name, args)})
+
+    def post(self, contract_address, fn_path):
+        if not self.check_api_key():
+            return
+        tx_hash = self.api.write(contract_address, fn_path.split('/')[0], self.body_json())
+        self.write({'success': True, 'data': [{'txHash': tx_hash}]})
+
+
+class HooksHandler(MockHandler):
+    def post(self, action):
+        body = self.check_signed()
+        if body is None:
+            return
+        if action == 'add':
+            hook_id = next(self.api.hook_ids)
+            self.api.hooks[hook_id] = {'id': hook_id, 'url': body.get('web'), 'contract': body.get('contract'), 'active': True, 'events': []}
+            self.write({'success': True, 'data': {'id': hook_id}})
+        elif action == 'list':
+            self.write({'success': True, 'data': list(self.api.hooks.values())})
+        elif action in ('activate', 'deactivate', 'updateEvents', 'transactions'):
+            hook = self.api.hooks.get(body.get('id'))
+            if hook is None:
+                self.write({'success': False, 'error': 'Unknown hook'})
+                return
+            if action == 'updateEvents':
+                hook['events'] = body.get('events', [])
+            elif action != 'transactions':
+                hook['active'] = action == 'activate'
+            self.write({'success': True, 'data': {}})
+        else:
+            raise tornado.web.HTTPError(404)
+
+
+class WSHandler(tornado.websocket.WebSocketHandler):
+    def initialize(self, api):
+        self.api = api
+        self.session_id = None
+
+    def check_origin(self, origin):
+        return True
+
+    def on_message(self, message):
+        try:
+            command = json.loads(message)
+        except ValueError:
+            return
+        cmd = command.get('command')
+        if cmd == 'register':
+            if command.get('key') != READ_KEY:
+                self.write_message(json.dumps({'command': 'register:nack'}))
+                return
+            self.session_id = os.urandom(16).hex()
+            self.api.subscribers.add(self)
+            self.write_message(json.dumps({'command': 'register:ack', 'sessionID': self.session_id}))
+        elif cmd == 'heartbeat':
+            self.write_message(json.dumps({'command': 'heartbeat:ack'}))
+        elif cmd == 'unregister':
+            self.api.subscribers.discard(self)
+            self.write_message(json.dumps({'command': 'unregister:ack'}))
+
+    def on_close(self):
+        self.api.subscribers.discard(self)
+
+
+def make_application(api):
+    kw = dict(api=api)
+    return tornado.web.Application([
+        (r'/api/login', LoginHandler, kw),
+        (r'/api/signup', SignupHandler, kw),
+        (r'/api/compile', CompileHandler, kw),
+        (r'/api/deploy', DeployHandler, kw),
+        (r'/api/hooks/(\w+)', HooksHandler, kw),
+        (API_PREFIX_PATH + r'/swagger/(0x[0-9a-fA-F]{40})/?', SwaggerHandler, kw),
+        (API_PREFIX_PATH + r'/contract/(0x[0-9a-fA-F]{40})/(.+)', ContractHandler, kw),
+        (r'/ws', WSHandler, kw)
+    ], compress_response=False)
+
+
+class MockServerThread(threading.Thread):
+    """
+    Runs the stand-in API on its own IOLoop in a daemon thread, for eg. from a benchmark script.
+    :param port : port to listen on. 0 picks a free port, available as .api.port once started
+    """
+    def __init__(self, port=0, **api_kwargs):
+        super(MockServerThread, self).__init__(daemon=True, name='MockMaticVigilAPI')
+        self.api = MockMaticVigil(**api_kwargs)
+        self._port = port
+        self._ready = threading.Event()
+        self._loop = None
+
+    def run(self):
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        self._loop = tornado.ioloop.IOLoop.current()
+        server = tornado.httpserver.HTTPServer(make_application(self.api))
+        sockets = tornado.netutil.bind_sockets(self._port, address='127.0.0.1')
+        server.add_sockets(sockets)
+        self.api.port = sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.start()
+        server.stop()
+        self._loop.close(all_fds=True)
+
+    def start(self):
+        super(MockServerThread, self).start()
+        self._ready.wait()
+        return self.api
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.add_callback(self._loop.stop)
+        self.join()
+
+
+def write_settings(settings_dir, internal_api_endpoint, private_key=None):
+    """
+    Writes a settings.json pointing the SDK at the stand-in API. Use it by setting MATICVIGIL_SETTINGS_DIR=settings_dir
+    """
+    os.makedirs(settings_dir, exist_ok=True)
+    settings = {
+        'PRIVATEKEY': private_key or '0x' + hashlib.sha256(b'maticvigil mock api').hexdigest(),
+        'INTERNAL_API_ENDPOINT': internal_api_endpoint,
+        'REST_API_ENDPOINT': None,
+        'MATICVIGIL_USER_ADDRESS': '',
+        'MATICVIGIL_API_KEY': ''
+    }
+    with open(os.path.join(settings_dir, 'settings.json'), 'w') as f:
+        json.dump(settings, f)
+    return settings
+
+
+define('port', default=8585, help='port to listen on', type=int)
+define('latency', default=0.0, help='seconds every HTTP request is delayed by', type=float)
+define('confirm_delay', default=0.5, help='seconds before a transaction is confirmed over /ws', type=float)
+define('spec', default='microblog', help="OpenAPI spec served for every contract: 'microblog' or 'large'")
+define('settings_dir', default='', help='if set, write a settings.json pointing at this server into the directory')
+
+
+def main():
+    tornado.options.parse_command_line()
+    logging.getLogger('tornado.access').setLevel(logging.WARNING)
+    api = MockMaticVigil(latency=options.latency, confirm_delay=options.confirm_delay, spec=options.spec)
+    api.port = options.port
+    make_application(api).listen(options.port, address='127.0.0.1')
+    if options.settings_dir:
+        write_settings(options.settings_dir, api.internal_api_endpoint)
+        mock_logger.info('Wrote settings. Export MATICVIGIL_SETTINGS_DIR=%s to use them', options.settings_dir)
+    mock_logger.info('Stand-in MaticVigil API listening on %s', api.internal_api_endpoint)
+    try:
+        tornado.ioloop.IOLoop.current().start()
+    except KeyboardInterrupt:
+        tornado.ioloop.IOLoop.current().stop()
+
+
+if __name__ == '__main__':
+    main()
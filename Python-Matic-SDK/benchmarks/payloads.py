@@ -0,0 +1,167 @@
+"""
+Realistic MaticVigil API payloads shared by the benchmarks and the local stand-in API server.
+"""
+
+SOLIDITY_TO_SCHEMA_TYPE = {
+    'uint256': 'integer',
+    'string': 'string',
+    'address': 'string',
+    'bool': 'boolean',
+    'bytes32': 'string'
+}
+
+
+def _response_schema():
+    return {
+        '200': {
+            'description': 'Successful call',
+            'content': {
+                'application/json': {
+                    'schema': {
+                        'type': 'object',
+                        'properties': {
+                            'success': {'type': 'boolean'},
+                            'data': {'type': 'array', 'items': {'type': 'object'}}
+                        }
+                    }
+                }
+            }
+        },
+        '400': {'description': 'Invalid arguments'},
+        '500': {'description': 'Internal error'}
+    }
+
+
+def make_swagger_spec(api_prefix, contract_address, getters, writers):
+    """
+    Builds an OpenAPI spec shaped like the ones served at /swagger/{contract_address}
+    :param getters : mapping of read function name to a list of (param name, solidity type)
+    :param writers : mapping of write function name to a list of (param name, solidity type)
+    """
+    paths = dict()
+    for fn_name, params in getters.items():
+        endpoint = '/' + fn_name + ''.join('/{%s}' % p for p, _ in params)
+        paths[endpoint] = {
+            'get': {
+                'summary': f'Calls {fn_name} on {contract_address}',
+                'operationId': fn_name,
+                'tags': ['read'],
+                'parameters': [
+                    {
+                        'name': p,
+                        'in': 'path',
+                        'required': True,
+                        'description': f'{t} argument {p}',
+                        'schema': {'type': SOLIDITY_TO_SCHEMA_TYPE.get(t, 'string')}
+                    } for p, t in params
+                ],
+                'responses': _response_schema()
+            }
+        }
+    for fn_name, params in writers.items():
+        paths['/' + fn_name] = {
+            'post': {
+                'summary': f'Sends a transaction calling {fn_name} on {contract_address}',
+                'operationId': fn_name,
+                'tags': ['write'],
+                'security': [{'ApiKeyAuth': []}],
+                'requestBody': {
+                    'required': True,
+                    'content': {
+                        'application/x-www-form-urlencoded': {
+                            'schema': {
+                                'type': 'object',
+                                'required': [p for p, _ in params],
+                                'properties': {
+                                    p: {'type': SOLIDITY_TO_SCHEMA_TYPE.get(t, 'string'), 'description': f'{t} argument {p}'}
+                                    for p, t in params
+                                }
+                            }
+                        }
+                    }
+                },
+                'responses': _response_schema()
+            }
+        }
+    return {
+        'openapi': '3.0.0',
+        'info': {'title': f'MaticVigil contract {contract_address}', 'version': '1.0.0'},
+        'servers': [{'url': f'{api_prefix}/contract/{contract_address}'}],
+        'components': {'securitySchemes': {'ApiKeyAuth': {'type': 'apiKey', 'in': 'header', 'name': 'X-API-KEY'}}},
+        'paths': paths
+    }
+
+
+MICROBLOG_GETTERS = {
+    'blogTitle': [],
+    'ownerName': [],
+    'owner': [],
+    'getPostId': [('id', 'uint256')],
+    'posts': [('', 'uint256')]
+}
+
+MICROBLOG_WRITERS = {
+    'addPost': [('title', 'string'), ('body', 'string'), ('url', 'string'), ('photo', 'string')],
+    'changeBlogTitle': [('_blogTitle', 'string')]
+}
+
+
+def make_large_swagger_spec(api_prefix, contract_address, n_getters=200, n_writers=100):
+    getters = {f'getter{i}': [('key', 'uint256'), ('owner', 'address')] for i in range(n_getters)}
+    writers = {f'setter{i}': [('key', 'uint256'), ('value', 'string'), ('flag', 'bool')] for i in range(n_writers)}
+    return make_swagger_spec(api_prefix, contract_address, getters, writers)
+
+
+def make_read_response(n_items=1000):
+    """ response to a read call returning a large array, as decoded by the MaticVigil API """
+    return {
+        'success': True,
+        'data': [
+            {
+                'uint256[]': [i * 1000003 for i in range(n_items)],
+                'address[]': ['0x%040x' % (i * 7919) for i in range(n_items)],
+                'string[]': [f'Post number {i}: the quick brown fox jumps over the lazy dog' for i in range(n_items)]
+            }
+        ]
+    }
+
+
+def make_small_read_response():
+    return {'success': True, 'data': [{'string': 'TheBlog'}]}
+
+
+def _abi_inputs(params):
+    return [{'name': p, 'type': t} for p, t in params]
+
+
+def make_abi(constructor_params, getters, writers, events=None):
+    """
+    Builds a contract ABI as returned by /compile
+    :param events : mapping of event name to a list of (param name, solidity type)
+    """
+    abi = [{'type': 'constructor', 'inputs': _abi_inputs(constructor_params), 'payable': False, 'stateMutability': 'nonpayable'}]
+    for fn_name, params in getters.items():
+        abi.append({
+            'type': 'function', 'name': fn_name, 'inputs': _abi_inputs(params), 'outputs': [{'name': '', 'type': 'string'}],
+            'constant': True, 'payable': False, 'stateMutability': 'view'
+        })
+    for fn_name, params in writers.items():
+        abi.append({
+            'type': 'function', 'name': fn_name, 'inputs': _abi_inputs(params), 'outputs': [],
+            'constant': False, 'payable': False, 'stateMutability': 'nonpayable'
+        })
+    for event_name, params in (events or dict()).items():
+        abi.append({
+            'type': 'event', 'name': event_name, 'anonymous': False,
+            'inputs': [dict(i, indexed=False) for i in _abi_inputs(params)]
+        })
+    return abi
+
+
+MICROBLOG_CONSTRUCTOR = [('_ownerName', 'string'), ('_blogTitle', 'string')]
+
+MICROBLOG_EVENTS = {
+    'NewPost': [('title', 'string'), ('body', 'string'), ('url', 'string'), ('photo', 'string')]
+}
+
+MICROBLOG_ABI = make_abi(MICROBLOG_CONSTRUCTOR, MICROBLOG_GETTERS, MICROBLOG_WRITERS, MICROBLOG_EVENTS)
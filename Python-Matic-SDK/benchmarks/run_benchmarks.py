@@ -0,0 +1,197 @@
+"""
+End to end benchmarks of the SDK against the local stand-in API server (mock_api_server.py), fully offline.
+Measures EVCore() startup, generate_contract_sdk(), read and write throughput with p50/p99 latency
+at several concurrency levels, and deploy latency.
+
+    python benchmarks/run_benchmarks.py [--concurrency 1,8,32] [--requests 2000] [--latency 0.002] [--async] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SDK_DIR = os.path.join(BENCHMARKS_DIR, '..')
+sys.path.insert(0, SDK_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from mock_api_server import MockServerThread, write_settings
+
+CONTRACT_FILE = os.path.join(SDK_DIR, 'examples', 'microblog.sol')
+
+STARTUP_SNIPPET = (
+    'import time; begin = time.perf_counter(); '
+    'from maticvigil.EVCore import EVCore; EVCore(); '
+    'print(time.perf_counter() - begin)'
+)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))]
+
+
+def summarize(latencies, elapsed=None):
+    latencies = sorted(latencies)
+    s = {
+        'n': len(latencies),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'mean_ms': statistics.mean(latencies) * 1000
+    }
+    if elapsed is not None:
+        s['throughput'] = len(latencies) / elapsed
+    return s
+
+
+def timed(fn, *args, **kwargs):
+    begin = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - begin
+
+
+def bench_startup(runs):
+    from maticvigil.EVCore import EVCore
+    cold = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', STARTUP_SNIPPET], cwd=SDK_DIR, env=os.environ, check=True,
+                             stdout=subprocess.PIPE, universal_newlines=True).stdout
+        cold.append(float(out.strip().splitlines()[-1]))
+    warm = [timed(EVCore) for _ in range(runs)]
+    return {'cold (import + EVCore())': summarize(cold), 'warm (EVCore())': summarize(warm)}
+
+
+def bench_generate_sdk(evc, contract_address, runs):
+    from maticvigil.EVCore import EVCore
+    fetched = [
+        timed(evc.generate_contract_sdk, contract_address=contract_address, app_name='microblog', refresh_spec=True)
+        for _ in range(runs)
+    ]
+    cached = [timed(evc.generate_contract_sdk, contract_address=contract_address, app_name='microblog') for _ in range(runs)]
+    codegen_evc = EVCore(codegen=True)
+    codegen_evc.generate_contract_sdk(contract_address=contract_address, app_name='microblog')
+    generated = [timed(codegen_evc.generate_contract_sdk, contract_address=contract_address, app_name='microblog') for _ in range(runs)]
+    return {
+        'spec downloaded': summarize(fetched),
+        'spec from disk cache': summarize(cached),
+        'generated module': summarize(generated)
+    }
+
+
+def run_concurrently(call, n_requests, concurrency):
+    """
+    :param call : callable taking the request index
+    :return: tuple of (per call latencies, wall clock time)
+    """
+    def one(i):
+        begin = time.perf_counter()
+        call(i)
+        return time.perf_counter() - begin
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(one, range(n_requests)))
+    return latencies, time.perf_counter() - begin
+
+
+def bench_reads(contract, n_requests, concurrency):
+    # distinct arguments per call so that concurrent reads are not coalesced into one request
+    latencies, elapsed = run_concurrently(lambda i: contract.getPostId(str(i)), n_requests, concurrency)
+    return summarize(latencies, elapsed)
+
+
+def bench_writes(contract, n_requests, concurrency):
+    def write(i):
+        contract.addPost(title=f'Post {i}', body='benchmark', url='https://maticvigil.com', photo='')
+    latencies, elapsed = run_concurrently(write, n_requests, concurrency)
+    return summarize(latencies, elapsed)
+
+
+def bench_deploy(evc, runs):
+    inputs = {'_ownerName': 'anomit', '_blogTitle': 'TheBlog'}
+    return summarize([timed(evc.deploy, contract_file=CONTRACT_FILE, contract_name='Microblog', inputs=inputs) for _ in range(runs)])
+
+
+async def _async_bench_reads(contract_address, n_requests, concurrency):
+    from maticvigil.AsyncEVCore import AsyncEVCore
+    from maticvigil.async_http_helper import AsyncHTTPTransport
+    async with AsyncHTTPTransport(max_concurrency=concurrency) as transport:
+        evc = await AsyncEVCore.create(transport=transport)
+        contract = await evc.generate_contract_sdk(contract_address=contract_address, app_name='microblog')
+
+        async def one(i):
+            begin = time.perf_counter()
+            await contract.getPostId(str(i))
+            return time.perf_counter() - begin
+        begin = time.perf_counter()
+        latencies = await asyncio.gather(*[one(i) for i in range(n_requests)])
+        return summarize(latencies, time.perf_counter() - begin)
+
+
+def print_row(name, s):
+    throughput = f'{s["throughput"]:>12.1f}' if 'throughput' in s else f'{"":>12}'
+    print(f'{name:<46}{s["n"]:>8}{throughput}{s["p50_ms"]:>10.2f}{s["p99_ms"]:>10.2f}{s["mean_ms"]:>10.2f}')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--concurrency', default='1,8,32', help='comma separated concurrency levels for reads and writes')
+    arg_parser.add_argument('--requests', type=int, default=2000, help='reads/writes sent per concurrency level')
+    arg_parser.add_argument('--latency', type=float, default=0.0, help='seconds the stand-in API delays every request by')
+    arg_parser.add_argument('--spec', default='microblog', choices=('microblog', 'large'), help='OpenAPI spec served by the stand-in API')
+    arg_parser.add_argument('--startup-runs', type=int, default=5)
+    arg_parser.add_argument('--sdk-runs', type=int, default=50)
+    arg_parser.add_argument('--deploy-runs', type=int, default=20)
+    arg_parser.add_argument('--async', dest='run_async', action='store_true', help='also benchmark reads through AsyncEVCore (needs aiohttp)')
+    arg_parser.add_argument('--json', help='write the results to this file')
+    args = arg_parser.parse_args()
+    concurrency_levels = [int(c) for c in args.concurrency.split(',')]
+
+    server = MockServerThread(latency=args.latency, confirm_delay=0.05, spec=args.spec)
+    api = server.start()
+    settings_dir = tempfile.mkdtemp(prefix='maticvigil-bench-')
+    write_settings(settings_dir, api.internal_api_endpoint)
+    os.environ['MATICVIGIL_SETTINGS_DIR'] = settings_dir
+
+    from maticvigil.EVCore import EVCore
+    results = dict()
+    results['startup'] = bench_startup(args.startup_runs)
+    evc = EVCore(spec_cache=True)
+    contract_address = evc.deploy(
+        contract_file=CONTRACT_FILE, contract_name='Microblog', inputs={'_ownerName': 'anomit', '_blogTitle': 'TheBlog'}
+    )['contract']
+    results['generate_contract_sdk'] = bench_generate_sdk(evc, contract_address, args.sdk_runs)
+    contract = evc.generate_contract_sdk(contract_address=contract_address, app_name='microblog')
+    for c in concurrency_levels:
+        results[f'read x{c}'] = bench_reads(contract, args.requests, c)
+    for c in concurrency_levels:
+        results[f'write x{c}'] = bench_writes(contract, args.requests, c)
+    if args.run_async:
+        for c in concurrency_levels:
+            results[f'async read x{c}'] = asyncio.run(_async_bench_reads(contract_address, args.requests, c))
+    results['deploy'] = bench_deploy(evc, args.deploy_runs)
+    server.stop()
+    shutil.rmtree(settings_dir, ignore_errors=True)
+
+    print(f'stand-in API at {api.internal_api_endpoint}, added latency {args.latency * 1000:.1f}ms, {api.requests} requests served')
+    print(f'{"benchmark":<46}{"n":>8}{"req/s":>12}{"p50 ms":>10}{"p99 ms":>10}{"mean ms":>10}')
+    for name, s in results.items():
+        if name in ('startup', 'generate_contract_sdk'):
+            for sub_name, sub_s in s.items():
+                print_row(f'{name} {sub_name}', sub_s)
+        else:
+            print_row(name, s)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
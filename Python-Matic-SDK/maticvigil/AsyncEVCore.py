@@ -0,0 +1,417 @@
+import asyncio
+import time
+from types import MethodType
+from typing import List
+from .EVCore import (
+    EVContractBase,
+    ev_core_logger,
+    load_settings,
+    in_memory_settings,
+    load_cached_account_info,
+    cache_account_info,
+    log_account_info,
+    parse_openapi_spec,
+    resolve_spec_cache,
+    resolve_compile_cache,
+    normalize_contract_ref,
+    collect_deploy_sources,
+    DEFAULT_DEPLOY_WORKERS
+)
+from .exceptions import *
+from . import instrumentation
+from . import json_codec
+from .batch import BatchResult, prepare_read_call
+from .auth import signed_payload
+from .sources import SourceResolver
+from .confirmations import get_listener, PendingDeployment
+from .async_http_helper import async_make_http_call, async_conditional_get, AsyncHTTPTransport
+
+
+def generate_async_contract_function(**outer_kwargs):
+    async def fn(self, *params_args, **params_kwargs):
+        request_url = outer_kwargs['method_url']
+        request_type = outer_kwargs['request_type']
+        ev_core_logger.debug('Calling MaticVigil contract function')
+        ev_core_logger.debug(request_url)
+        if request_type == 'get':
+            return await self._read(outer_kwargs['fn_name'], request_url, params_args)
+        elif request_type == 'post':
+            return await self._write(outer_kwargs['fn_name'], request_url, params_kwargs)
+    return fn
+
+
+async def async_extract_abi(ev_settings, parsed_sources, transport=None, compile_cache=None):
+    async def compile_sources():
+        compile_params = signed_payload(ev_settings['PRIVATEKEY'], "Trying to signup")
+        compile_params.update(parsed_sources)
+        _resp = await async_make_http_call(
+            request_type='post',
+            url=ev_settings['INTERNAL_API_ENDPOINT'] + '/compile',
+            params=compile_params,
+            transport=transport,
+            operation='compile'
+        )
+        return _resp['data']['contract']['abi']
+    if compile_cache is None:
+        return await compile_sources()
+    return await compile_cache.async_load(ev_settings['INTERNAL_API_ENDPOINT'], parsed_sources, compile_sources)
+
+
+async def _capture(fn, args):
+    try:
+        return await fn(*args)
+    except Exception as e:
+        return e
+
+
+async def gather_read_calls(calls):
+    begin = time.perf_counter()
+    results = await asyncio.gather(*[_capture(fn, args) for fn, args in calls])
+    return BatchResult(list(results), time.perf_counter() - begin)
+
+
+class AsyncEVCore(object):
+    """
+    asyncio counterpart of EVCore. Every API call is a coroutine running on a non-blocking HTTP client,
+    so thousands of contract calls can be in flight on a single event loop.
+    Settings are loaded on construction, logging in happens in initialize(). Use AsyncEVCore.create() to do both.
+    """
+    def __init__(self, verbose=False, transport=None, read_cache=None, spec_cache=False, settings=None, account_info=None,
+                 compile_cache=False, source_resolver=None, track_confirmations=False):
+        """
+        :param verbose : log debug information about settings, login and API calls
+        :param transport : AsyncHTTPTransport to be shared with contract handles. Its max_concurrency caps the requests in flight
+        :param read_cache : optional ReadCache used by the contract handles generated by this instance
+        :param spec_cache : SpecCache keeping contract OpenAPI specs on disk, see EVCore
+        :param settings : in-memory settings used instead of ~/.maticvigil/settings.json, see EVCore
+        :param account_info : account information as returned by /login. initialize() then skips the login
+        :param compile_cache : CompileCache keeping the ABIs returned by /compile, see EVCore
+        :param source_resolver : SourceResolver collecting the files imported by deployed contracts, see EVCore
+        :param track_confirmations : deploys and contract writes return handles that can be awaited until the transaction
+                                     is confirmed, see EVCore
+        """
+        self._verbose = verbose
+        self._account = None
+        self._transport = transport if transport else AsyncHTTPTransport()
+        self._read_cache = read_cache
+        self._in_memory = settings is not None
+        self._spec_cache = resolve_spec_cache(spec_cache, self._in_memory)
+        self._compile_cache = resolve_compile_cache(compile_cache, self._in_memory)
+        self._source_resolver = source_resolver if source_resolver else SourceResolver()
+        self._track_confirmations = track_confirmations
+        self._settings, self._settings_found = in_memory_settings(settings) if self._in_memory else load_settings()
+        if self._verbose:
+            ev_core_logger.debug('Loaded settings:')
+            ev_core_logger.debug(self._settings)
+        if account_info:
+            self._set_account(account_info)
+
+    @classmethod
+    async def create(cls, verbose=False, transport=None, read_cache=None, spec_cache=False, settings=None, account_info=None,
+                     compile_cache=False, source_resolver=None, track_confirmations=False):
+        evc = cls(verbose=verbose, transport=transport, read_cache=read_cache, spec_cache=spec_cache, settings=settings,
+                  account_info=account_info, compile_cache=compile_cache, source_resolver=source_resolver,
+                  track_confirmations=track_confirmations)
+        await evc.initialize()
+        return evc
+
+    async def initialize(self):
+        if not self._settings_found or self._account:
+            return
+        try:
+            r = await self.login()
+        except:
+            r = None
+        if not r:
+            if self._in_memory:
+                ev_core_logger.error('Could not log in to MaticVigil endpoint %s', self._settings['INTERNAL_API_ENDPOINT'])
+                return
+            if self._verbose:
+                ev_core_logger.info('Could not connect to MaticVigil endpoint. Attempting to load account information from cache.')
+            self._set_account(load_cached_account_info(self._verbose))
+        else:
+            if self._verbose:
+                log_account_info(r)
+            if not self._in_memory:
+                cache_account_info(r)
+            self._set_account(r)
+
+    def _set_account(self, account_info):
+        self._account = account_info
+        if account_info:
+            self._api_read_key = account_info['readKey']
+            self._api_write_key = account_info['key']
+
+    @property
+    def transport(self):
+        return self._transport
+
+    @property
+    def contracts(self):
+        return self._account['contracts'] if self._account else None
+
+    @property
+    def spec_cache(self):
+        return self._spec_cache
+
+    async def _load_openapi_spec(self, contract_address, refresh_spec=False):
+        api_prefix = self._account['api_prefix']
+        spec_url = f"{api_prefix}/swagger/{contract_address}/?key={self._api_read_key}"
+        if self._spec_cache is None:
+            return await async_make_http_call(request_type='get', url=spec_url, transport=self._transport, operation='swagger')
+        return await self._spec_cache.async_load(
+            api_prefix,
+            contract_address,
+            lambda etag: async_conditional_get(spec_url, etag=etag, transport=self._transport, operation='swagger'),
+            refresh=refresh_spec
+        )
+
+    async def generate_contract_sdk(self, contract_address, app_name, read_cache=None, refresh_spec=False, abi=None):
+        """
+        :param abi : ABI of the contract. Turns on argument validation against its Solidity types for this handle, see EVCore
+        """
+        openapi_spec = await self._load_openapi_spec(contract_address, refresh_spec)
+        fn_specs = parse_openapi_spec(openapi_spec, self._account['api_prefix'], contract_address)
+        contract_obj = AsyncEVContract(
+            contract_address, self._api_read_key, self._api_write_key, self._settings,
+            transport=self._transport,
+            read_cache=read_cache if read_cache else self._read_cache
+        )
+        contract_obj._fn_specs = fn_specs
+        for fn_name, fn_spec in fn_specs.items():
+            contract_fn = generate_async_contract_function(fn_name=fn_name, method_url=fn_spec['method_url'], request_type=fn_spec['request_type'])
+            contract_obj.__setattr__(fn_name, MethodType(contract_fn, contract_obj))
+        contract_obj._initialized = True
+        if abi is not None:
+            contract_obj.enable_validation(abi)
+        if self._track_confirmations:
+            contract_obj.enable_confirmations()
+        return contract_obj
+
+    async def generate_contract_sdks(self, contracts, read_cache=None, refresh_spec=False):
+        """
+        Builds handles for many contracts, fetching their specs concurrently
+        :param contracts : list of contract addresses, (address, app name) tuples or entries of AsyncEVCore.contracts
+        :return: BatchResult with one contract handle or exception per contract, in the same order
+        """
+        return await gather_read_calls([
+            (self.generate_contract_sdk, normalize_contract_ref(c) + (read_cache, refresh_spec)) for c in contracts
+        ])
+
+    async def batch_read(self, calls):
+        """
+        Runs read calls across many contract handles concurrently, bounded by the transport's max_concurrency
+        :param calls : list of (contract handle, call) tuples where call is a function name or a (function name, args) tuple
+        :return: BatchResult with one result or exception per call, in the same order
+        """
+        return await gather_read_calls([prepare_read_call(contract, call) for contract, call in calls])
+
+    async def login(self):
+        return await self._login(internal_api_endpoint=self._settings['INTERNAL_API_ENDPOINT'], private_key=self._settings['PRIVATEKEY'])
+
+    async def signup(self, invite_code):
+        request_json = signed_payload(self._settings['PRIVATEKEY'], "Trying to signup")
+        request_json['code'] = invite_code
+        ev_core_logger.debug('Attempting to signup with MaticVigil')
+        signup_url = self._settings['INTERNAL_API_ENDPOINT'] + '/signup'
+        return await async_make_http_call(request_type='post', url=signup_url, params=request_json, transport=self._transport, operation='signup')
+
+    async def _compile_for_deploy(self, contract_file):
+        """
+        Collects the sources of a contract file and compiles them
+        :return: tuple of (sources mapping, main source file, ABIParser loaded with the compiled ABI)
+        """
+        from .EVContractUtils import ABIParser
+        # reading and parsing the sources is blocking work, keep it off the event loop
+        sources, source_file = await asyncio.get_event_loop().run_in_executor(
+            None, collect_deploy_sources, contract_file, self._source_resolver
+        )
+        abi_json = await async_extract_abi(
+            self._settings,
+            {'sources': sources, 'sourceFile': source_file},
+            transport=self._transport,
+            compile_cache=self._compile_cache
+        )
+        abp = ABIParser(abi_json=abi_json)
+        abp.load_abi()
+        return sources, source_file, abp
+
+    def _deploy_listener(self):
+        if not self._track_confirmations or not self._account:
+            return None
+        listener = get_listener(self._settings, self._api_read_key)
+        listener.start()
+        return listener
+
+    async def _submit_deploy(self, contract_name, c_inputs, sources, source_file, auth_payload, listener=None):
+        if self._verbose:
+            ev_core_logger.debug('Ordered constructor inputs: ')
+            ev_core_logger.debug(c_inputs)
+        deploy_json = dict(auth_payload)
+        deploy_json.update({
+            'name': contract_name,
+            'inputs': c_inputs,
+            'sources': sources,
+            'sourceFile': source_file
+        })
+        r = await async_make_http_call(
+            request_type='post',
+            url=self._settings['INTERNAL_API_ENDPOINT'] + '/deploy',
+            params=deploy_json,
+            transport=self._transport,
+            operation='deploy'
+        )
+        if self._verbose:
+            ev_core_logger.debug('MaticVigil deploy response: ')
+            ev_core_logger.debug(r)
+        return PendingDeployment(r['data'], listener.track(r['data']['txhash']) if listener is not None else None)
+
+    async def deploy(self, contract_file, contract_name, inputs):
+        """
+        Deploys a smart contract from the solidity source code specified
+        :param contract_file : path to the contract file name
+        :param contract_name : the contract name to be deployed from the file
+        :param inputs : mapping of constructor arguments
+        """
+        # subscribes to the websocket while the sources are compiled
+        listener = self._deploy_listener()
+        sources, source_file, abp = await self._compile_for_deploy(contract_file)
+        return await self._submit_deploy(
+            contract_name,
+            abp.ordered_map_to_ev_constructor_args(inputs),
+            sources,
+            source_file,
+            signed_payload(self._settings['PRIVATEKEY'], "Trying to deploy"),
+            listener
+        )
+
+    async def deploy_many(self, contract_file, contract_name, inputs_list, max_concurrency=DEFAULT_DEPLOY_WORKERS):
+        """
+        Deploys many instances of a smart contract, compiling the sources once. The /deploy calls run concurrently,
+        bounded by max_concurrency and the transport's max_concurrency
+        :param inputs_list : list of constructor argument mappings, one per instance
+        :param max_concurrency : maximum number of deploys in flight, None for the transport's bound only
+        :return: BatchResult with the deploy response data or the exception of each instance, in the same order as inputs_list
+        """
+        listener = self._deploy_listener()
+        sources, source_file, abp = await self._compile_for_deploy(contract_file)
+        auth_payload = signed_payload(self._settings['PRIVATEKEY'], "Trying to deploy")
+        semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+        async def deploy_instance(inputs):
+            c_inputs = abp.ordered_map_to_ev_constructor_args(inputs)
+            if semaphore is None:
+                return await self._submit_deploy(contract_name, c_inputs, sources, source_file, auth_payload, listener)
+            async with semaphore:
+                return await self._submit_deploy(contract_name, c_inputs, sources, source_file, auth_payload, listener)
+
+        return await gather_read_calls([(deploy_instance, (inputs,)) for inputs in inputs_list])
+
+    async def _login(self, internal_api_endpoint, private_key):
+        headers = {'accept': 'application/json', 'Content-Type': 'application/json'}
+        login_url = internal_api_endpoint + '/login'
+        with instrumentation.timed_call('login', 'post', login_url) as call_metrics:
+            status_code, body = await self._transport.request(
+                'POST',
+                login_url,
+                json_params=signed_payload(private_key, "Trying to login"),
+                headers=headers
+            )
+            if call_metrics is not None:
+                call_metrics.status_code = status_code
+                call_metrics.response_bytes = len(body)
+        if self._verbose:
+            ev_core_logger.debug(body)
+        if status_code == 200:
+            return json_codec.loads(body)['data']
+        else:
+            return None
+
+    async def close(self):
+        await self._transport.close()
+
+
+class AsyncEVContract(EVContractBase):
+    def __init__(self, contract_address, api_read_key, api_write_key, ev_settings, transport=None, read_cache=None):
+        super(AsyncEVContract, self).__init__(contract_address, api_read_key, api_write_key, ev_settings, read_cache=read_cache)
+        self._transport = transport if transport else AsyncHTTPTransport()
+
+    async def _read(self, fn_name, request_url, params_args):
+        params_args = self._validated_read_args(fn_name, params_args)
+        cache_token, hit, value = self._read_cache_get(fn_name, params_args)
+        if hit:
+            return value
+        r = await async_make_http_call(request_type='get', url=self._read_url(request_url, params_args), transport=self._transport, operation='contract_read:' + fn_name)
+        self._read_cache_put(cache_token, r)
+        return r
+
+    async def _write(self, fn_name, request_url, params_kwargs):
+        params_kwargs = self._validated_write_args(fn_name, params_kwargs)
+        listener = self._confirmation_listener()
+        try:
+            r = await async_make_http_call(request_type='post', url=request_url, params=params_kwargs, headers={'X-API-KEY': self._api_write_key}, transport=self._transport, operation='contract_write:' + fn_name)
+        finally:
+            # a write that failed or timed out may still have been applied
+            self._read_cache_invalidate()
+        return self._pending_transaction(r['data'], listener)
+
+    async def batch_read(self, calls):
+        """
+        Calls many read functions of this contract concurrently, bounded by the transport's max_concurrency
+        :param calls : list of function names or (function name, args) tuples, for eg. [('getPostId', ['1']), 'blogTitle']
+        :return: BatchResult with one result or exception per call, in the same order
+        """
+        return await gather_read_calls([prepare_read_call(self, call) for call in calls])
+
+    async def _hooks_call(self, endpoint, method_args):
+        return await async_make_http_call(
+            request_type='post',
+            url=self._ev_settings['INTERNAL_API_ENDPOINT'] + endpoint,
+            params=method_args,
+            headers={'accept': 'application/json', 'Content-Type': 'application/json'},
+            transport=self._transport,
+            operation='hooks:' + endpoint.split('/')[-1]
+        )
+
+    async def integrations(self):
+        if not self._initialized:
+            return None
+        list_response = await self._hooks_call('/hooks/list', self._hook_method_args())
+        return list_response['data'] if list_response['success'] else None
+
+    async def deactivate_integration(self, hook_id):
+        integration_response = await self._hooks_call('/hooks/deactivate', self._hook_method_args(id=hook_id))
+        return bool(integration_response['success'])
+
+    async def activate_integration(self, hook_id):
+        integration_response = await self._hooks_call('/hooks/activate', self._hook_method_args(id=hook_id))
+        return bool(integration_response['success'])
+
+    async def add_event_integration(self, events: List, callback_url, integration_channel='web'):
+        hook_id = await self._register_integration(callback_url)
+        if not hook_id:
+            return None
+        self._check_integration_channel(integration_channel)
+        if '*' in events:
+            events = ['*']
+        integration_response = await self._hooks_call('/hooks/updateEvents', self._hook_method_args(id=hook_id, events=events))
+        return hook_id if integration_response.get('success', False) else None
+
+    async def add_contract_monitoring_integration(self, callback_url, integration_channel='web'):
+        hook_id = await self._register_integration(callback_url)
+        if not hook_id:
+            return None
+        self._check_integration_channel(integration_channel)
+        integration_response = await self._hooks_call('/hooks/transactions', self._hook_method_args(id=hook_id, action='set'))
+        return hook_id if integration_response.get('success', False) else None
+
+    async def _register_integration(self, url):
+        reg_webhook_args = self._register_integration_args(url)
+        ev_core_logger.debug('Registering webhook')
+        ev_core_logger.debug(reg_webhook_args)
+        r = await async_make_http_call(request_type='post', transport=self._transport, operation='hooks:add', **reg_webhook_args)
+        ev_core_logger.debug('Registration response')
+        ev_core_logger.debug(r)
+        if not r['success']:
+            return None
+        return r["data"]["id"]
@@ -1,13 +1,9 @@
 # -*- coding: utf-8 -*-
-from eth_account.messages import defunct_hash_message
-from eth_account.account import Account
-import json
-from eth_utils import encode_hex, keccak
 import eth_utils
 from eth_abi import is_encodable
 from .http_helper import make_http_call
-import os
-import sys
+from .auth import signed_payload
+from .abi_index import ABIIndex, INT_TYPES, BYTE_TYPES, type_category, expand_components
 
 def read_file_by_chunks(fp, chunk_size=1024):
     chunk = ''
@@ -41,35 +37,48 @@ def read_file_by_chunks(fp, chunk_size=1024):
 #     compiled_output = solcx.compile_standard(compile_args)
 #     return compiled_output['contracts'][contract_filepath][contract_name]['abi']
 
-def extract_abi(ev_settings, parsed_sources):
-    msg = "Trying to signup"
-    message_hash = defunct_hash_message(text=msg)
-    signed_msg = Account.signHash(message_hash, ev_settings['PRIVATEKEY'])
-    compile_params = {'msg': msg, 'sig': signed_msg.signature.hex()}
-    compile_params.update(parsed_sources)
-    _resp = make_http_call(
-        request_type='post',
-        url=ev_settings['INTERNAL_API_ENDPOINT'] + '/compile',
-        params=compile_params
-    )
-    return _resp['data']['contract']['abi']
+def extract_abi(ev_settings, parsed_sources, transport=None, compile_cache=None):
+    """
+    :param parsed_sources : dict with the 'sources' mapping and 'sourceFile'
+    :param compile_cache : optional CompileCache. Sources compiled before are not sent to /compile again
+    """
+    def compile_sources():
+        compile_params = signed_payload(ev_settings['PRIVATEKEY'], "Trying to signup")
+        compile_params.update(parsed_sources)
+        _resp = make_http_call(
+            request_type='post',
+            url=ev_settings['INTERNAL_API_ENDPOINT'] + '/compile',
+            params=compile_params,
+            transport=transport,
+            operation='compile'
+        )
+        return _resp['data']['contract']['abi']
+    if compile_cache is None:
+        return compile_sources()
+    return compile_cache.load(ev_settings['INTERNAL_API_ENDPOINT'], parsed_sources, compile_sources)
 
 
 class ABIParser:
+    """
+    Compatibility wrapper over ABIIndex. The nested dict mappings of earlier versions are built on first access
+    and then kept, the index itself only keeps slotted records
+    """
     def __init__(self, abi_json):
-        self._fill_allowed_ints()
-        self._fill_allowed_bytes()
-        self._events_mapping = {}
-        self._functions_mapping = {}
-        self._functions_name_to_hash = {}
-        self._constructor_mapping = {}
-        self._functions_selector_to_hash = {}
+        self._allowed_int_types = INT_TYPES
+        self._allowed_byte_types = BYTE_TYPES
         self._abi_def = abi_json
+        self._index = None
+        self._legacy_mappings = dict()
         self._abi_mapped = False
 
+    @property
+    def index(self):
+        """ the ABIIndex, once load_abi() was called """
+        return self._index
+
     def constructor_params(self):
         if self._abi_mapped:
-            return self._constructor_mapping['constructor']['input_params']
+            return list(self._index.constructor_params)
         else:
             return False
 
@@ -81,222 +90,121 @@ class ABIParser:
         """
         if not self._abi_mapped:
             return None
-        param_list = []
-        for idx, ordered_param in enumerate(self._constructor_mapping['constructor']['input_params']):
-            if self.type_category(self._constructor_mapping['constructor']['input_types'][idx]) == 'array':
-                # array types are passed as JSON serialized strings to EV APIs
-                param_list.append(json.dumps(arg_map[ordered_param]))
-            else:
-                param_list.append(arg_map[ordered_param])
-        return param_list
-
-    def _fill_allowed_ints(self):
-        self._allowed_int_types = allowed_int_types()
-
-    def _fill_allowed_bytes(self):
-        self._allowed_byte_types = allowed_byte_types()
+        return self._index.constructor_args(arg_map)
 
     def load_abi(self):
-        self._map_abi()
+        self._index = ABIIndex(self._abi_def)
+        self._legacy_mappings = dict()
         self._abi_mapped = True
 
-    def _map_events(self, events):
-        for event in events:
-            canonical_types = ""
-            for types in event["inputs"]:
-                canonical_types += types["type"] + ","
-            # remove extra , in the end
-            canonical_types = canonical_types.rstrip(',')
-            canonical_full_name = "{0}({1})".format(event["name"], canonical_types)
-            event_hash = encode_hex(keccak(text=canonical_full_name))
-            # initialize event signature based hash storage
-            # also add a redundant one based on the name to refer back to the hash
-            self._events_mapping[event_hash] = {}
-            self._events_mapping[event["name"]] = event_hash
-            # begin filling
-            self._events_mapping[event_hash]["nickname"] = event["name"]
-            self._events_mapping[event_hash]["canonical"] = canonical_full_name
-            # strip out the '0x' and take the first (32 bits/4 bytes/8 hex digits) as the method selector
-            # defined according to the function encoding standards defined by the Solidity compiler
-            self._events_mapping[event_hash]["selector"] = event_hash[2:10]
-            # types_full_list = list(map(lambda x: x["type"], event["inputs"]))
-            # params_full_list = list(map(lambda x: x["name"], event["inputs"]))
-            unindexed_params_list = list(
-                map(lambda x: x["name"], filter(lambda x: x["indexed"] is False, event["inputs"])))
-            unindexed_types_list = list(
-                map(lambda x: x["type"], filter(lambda x: x["indexed"] is False, event["inputs"])))
-            indexed_params_list = list(
-                map(lambda x: x["name"], filter(lambda x: x["indexed"] is True, event["inputs"])))
-            indexed_types_list = list(map(lambda x: x["type"], filter(lambda x: x["indexed"] == True, event["inputs"])))
-            self._events_mapping[event_hash]["unindexed_types"] = unindexed_types_list
-            self._events_mapping[event_hash]["unindexed_params"] = unindexed_params_list
-            self._events_mapping[event_hash]["indexed_params"] = indexed_params_list
-            self._events_mapping[event_hash]["indexed_types"] = indexed_types_list
-
-    def _map_functions(self, functions):
-        for function in functions:
-            canonical_types = ""
-            if function['name'] == 'decimals':
-                self._is_erc20 = True
-            # --- expand tuple types to elementary types where necessary ---
-            fn_types_list = list()
-            tuple_encodings = dict()
-            for fn_input in function['inputs']:
-                if 'tuple' not in fn_input['type']:
-                    fn_types_list.append(fn_input['type'])
-                    canonical_types += fn_input['type'] + ','
-                else:
-                    # prepare string to be passed to eth_abi.encode_single('(component1, component2)', [val1, val2])
-                    is_array = False
-                    if fn_input['type'][-2:] == '[]':  # could be an array of tuples
-                        is_array = True
-                    enc_string = self._expand_components(fn_input['components'], is_array)
-                    tuple_encodings[fn_input['name']] = enc_string
-                    # the type to be included in the canonical sig is the same
-                    # for eg 'f_name((uint256,string,address))' instead of f_name(tuple)
-                    fn_types_list.append(enc_string)
-                    canonical_types += enc_string + ','
-            # END --- expand tuple types to elementary types where necessary ---
-            canonical_types = canonical_types.rstrip(',')
-            canonical_full_name = "{0}({1})".format(function["name"], canonical_types)
-            function_hash = encode_hex(keccak(text=canonical_full_name))
-            # initialize function signature based hash storage
-            # also add a redundant one based on the name to refer back to the hash
-            self._functions_mapping[function_hash] = {}
-            self._functions_name_to_hash[function["name"]] = function_hash
-            # begin filling
-            self._functions_mapping[function_hash]["nickname"] = function["name"]
-            self._functions_mapping[function_hash]["canonical"] = canonical_full_name
-            # strip out the '0x' and take the first (32 bits/4 bytes/8 hex digits) as the method selector
-            # defined according to the function encoding standards defined by the Solidity compiler
-            self._functions_mapping[function_hash]["selector"] = function_hash[2:10]
-            fn_params_list = list(map(lambda x: x["name"], function["inputs"]))
-            # fn_types_list = list(map(lambda x: x["type"], function["inputs"]))
-
-            self._functions_mapping[function_hash]["params"] = fn_params_list
-            self._functions_mapping[function_hash]["types"] = fn_types_list
-            if tuple_encodings:
-                self._functions_mapping[function_hash]['input_tuple_encodings'] = tuple_encodings
-            # add output types now
-            return_params_list = list(map(lambda x: x["name"], function["outputs"]))
-            self._functions_mapping[function_hash]["output_params"] = return_params_list
-            # self._functions_mapping[function_hash]["output_types"] = return_types_list
-            # --- OUTPUT params: expand tuple types to elementary types where necessary ---
-            fn_op_types_list = list()
-            op_tuple_encodings = dict()
-            for fn_output in function['outputs']:
-                if 'tuple' not in fn_output['type']:
-                    fn_op_types_list.append(fn_output['type'])
-                else:
-                    # prepare string to be passed to eth_abi.encode_single('(component1, component2)', [val1, val2])
-                    is_array = False
-                    if fn_output['type'][-2:] == '[]':  # could be an array of tuples
-                        is_array = True
-                    enc_string = self._expand_components(fn_output['components'], is_array)
-                    op_tuple_encodings[fn_output['name']] = enc_string
-                    # the type to be included in the canonical sig is the same
-                    # for eg 'f_name((uint256,string,address))' instead of f_name(tuple)
-                    fn_op_types_list.append(enc_string)
-            # END --- OUTPUT params: expand tuple types to elementary types where necessary ---
-            self._functions_mapping[function_hash]["output_types"] = fn_op_types_list
-            if op_tuple_encodings:
-                self._functions_mapping[function_hash]['output_tuple_encodings'] = op_tuple_encodings
-            self._functions_mapping[function_hash]["stateMutability"] = function["stateMutability"]
-            # fill up function selector to function canonical signature hash mapping
-            self._functions_selector_to_hash[function_hash[2:10]] = function_hash
+    def _legacy_mapping(self, name, build):
+        # built from the index on first access, and kept until the ABI is loaded again
+        mapping = self._legacy_mappings.get(name)
+        if mapping is None:
+            mapping = build() if self._index is not None else dict()
+            self._legacy_mappings[name] = mapping
+        return mapping
+
+    @property
+    def _events_mapping(self):
+        return self._legacy_mapping('events', self._build_events_mapping)
+
+    def _build_events_mapping(self):
+        # hash -> event details, plus a redundant name -> hash entry per event
+        mapping = dict()
+        for event in self._index.events_by_hash.values():
+            mapping[event.hash] = {
+                'nickname': event.name,
+                'canonical': event.canonical,
+                'selector': event.selector,
+                'unindexed_types': list(event.unindexed_types),
+                'unindexed_params': list(event.unindexed_params),
+                'indexed_params': list(event.indexed_params),
+                'indexed_types': list(event.indexed_types)
+            }
+            mapping[event.name] = event.hash
+        return mapping
+
+    @staticmethod
+    def _function_details(fn):
+        details = {
+            'nickname': fn.name,
+            'canonical': fn.canonical,
+            'selector': fn.selector,
+            'params': list(fn.input_params),
+            'types': list(fn.input_types),
+            'output_params': list(fn.output_params),
+            'output_types': list(fn.output_types),
+            'stateMutability': fn.state_mutability
+        }
+        input_tuple_encodings = {p.name: p.type for p in fn.inputs if p.is_tuple}
+        if input_tuple_encodings:
+            details['input_tuple_encodings'] = input_tuple_encodings
+        output_tuple_encodings = {p.name: p.type for p in fn.outputs if p.is_tuple}
+        if output_tuple_encodings:
+            details['output_tuple_encodings'] = output_tuple_encodings
+        return details
+
+    @property
+    def _functions_mapping(self):
+        return self._legacy_mapping('functions', lambda: {
+            fn_hash: self._function_details(fn) for fn_hash, fn in self._index.functions_by_hash.items()
+        })
+
+    @property
+    def _functions_name_to_hash(self):
+        return self._legacy_mapping('name_to_hash', lambda: {
+            name: fn.hash for name, fn in self._index.functions_by_name.items()
+        })
+
+    @property
+    def _functions_selector_to_hash(self):
+        return self._legacy_mapping('selector_to_hash', lambda: {
+            selector: fn.hash for selector, fn in self._index.functions_by_selector.items()
+        })
+
+    @property
+    def _constructor_mapping(self):
+        return self._legacy_mapping('constructor', self._build_constructor_mapping)
+
+    def _build_constructor_mapping(self):
+        if self._index.constructor is None:
+            return dict()
+        return {'constructor': {
+            'input_params': list(self._index.constructor.input_params),
+            'input_types': list(self._index.constructor.input_types)
+        }}
+
+    @property
+    def _is_erc20(self):
+        return self._index is not None and 'decimals' in self._index.functions_by_name
 
     def _expand_components(self, components_list, is_tuple_array):
-        encoding_type_str = '('
-        for component in components_list:
-            if 'tuple' not in component['type']:
-                encoding_type_str += component['type']+','
-            else:
-                is_nested_tuple_an_array = component['type'][-2:] == '[]'
-                encoding_type_str += self._expand_components(component['components'], is_nested_tuple_an_array)
-        if encoding_type_str[-1:] == ',':
-            encoding_type_str = encoding_type_str[:-1]  # remove the final comma
-        encoding_type_str += ')'  # final enclosing parantheses
-        if is_tuple_array:
-            encoding_type_str += '[]'
-
-        return encoding_type_str
-
-    def _map_constructor(self, constr_):
-        for constr in constr_:
-            self._constructor_mapping = {"constructor": {}}
-            inputs = constr["inputs"]
-            input_params_list = list(map(lambda x: x["name"], inputs))
-            input_types_list = list(map(lambda x: x["type"], inputs))
-            self._constructor_mapping["constructor"]["input_params"] = input_params_list
-            self._constructor_mapping["constructor"]["input_types"] = input_types_list
-
-    def _map_erc20_values(self):
-        pass
-        # if 'decimals' in
-
-    def _map_abi(self):
-        events = list(filter(lambda x: x["type"] == "event", self._abi_def))
-        functions = list(filter(lambda x: x["type"] == "function", self._abi_def))
-        constr_ = list(filter(lambda x: x["type"] == "constructor", self._abi_def))
-        # print("Events: ", events)
-        self._map_events(events)
-        self._map_functions(functions)
-        self._map_constructor(constr_)
-        # print("\n Function mapping.... \n {0}".format(self._functions_mapping))
-        # print("\n Event mapping.... \n {0}".format(self._events_mapping))
+        return expand_components(components_list, is_tuple_array)
+
+    # the legacy mappings only ever split on 'view', pure functions are listed with the writers.
+    # ABIIndex.getters() and writers() treat pure functions as reads
+    def _view_functions(self, view):
+        return [fn for fn in self._index.functions_by_hash.values() if (fn.state_mutability == 'view') == view]
 
     def _only_getters(self):
-        hash_keys = list(
-            filter(lambda x: self._functions_mapping[x]["stateMutability"] == "view", self._functions_mapping))
-        hash_entries = list(map(lambda x: self._functions_mapping[x], hash_keys))
-        return dict(zip(hash_keys, hash_entries))
+        return {fn.hash: self._function_details(fn) for fn in self._view_functions(True)}
 
     def _only_getters_by_name(self):
-        hash_keys = list(
-            filter(lambda x: self._functions_mapping[x]["stateMutability"] == "view", self._functions_mapping))
-        hash_names = list(map(lambda x: self._functions_mapping[x]["nickname"], hash_keys))
-        hash_entries = list(map(lambda x: self._functions_mapping[x], hash_keys))
-        return dict(zip(hash_names, hash_entries))
+        return {fn.name: self._function_details(fn) for fn in self._view_functions(True)}
 
     def _only_writers_by_name(self):
-        hash_keys = list(
-            filter(lambda x: self._functions_mapping[x]["stateMutability"] != "view", self._functions_mapping))
-        hash_names = list(map(lambda x: self._functions_mapping[x]["nickname"], hash_keys))
-        hash_entries = list(map(lambda x: self._functions_mapping[x], hash_keys))
-        return dict(zip(hash_names, hash_entries))
+        return {fn.name: self._function_details(fn) for fn in self._view_functions(False)}
 
     def is_valid(self, method, params):
-        if method in self._functions_name_to_hash:
-            cn_hash = self._functions_mapping[self._functions_name_to_hash[method]]
-            if len(cn_hash["params"]) is not len(params):
-                return (False, -2, "Argument list mismatch")
-            else:
-                return (True, 1, "Success")
-        else:
-            return (False, -1, "Invalid method: {0}".format(method))
+        return self._index.check_call(method, params)
 
     def is_valid_param_dict(self, method, params):  # params is a dictionary here.
-        if method in self._functions_name_to_hash:
-            cn_hash = self._functions_mapping[self._functions_name_to_hash[method]]
-            if len(cn_hash["params"]) is not len(params):
-                return (False, -2, "Argument list mismatch")
-            else:
-                return (True, 1, "Success")
-        else:
-            return (False, -1, "Invalid method")
+        valid, code, msg = self._index.check_call(method, params)
+        return (valid, code, 'Invalid method') if code == -1 else (valid, code, msg)
 
     def type_category(self, sol_type):  # type category that is used in Swagger API specs, not Solidity specific at all
-        if sol_type in self._allowed_int_types:
-            return "integer"
-        elif sol_type in self._allowed_byte_types or sol_type == "address" or sol_type == "string":
-            return "string"
-        elif sol_type == "bool":
-            return "boolean"
-        else:
-            if sol_type[-2:] == "[]":
-                return "array"
-            else:
-                return " "
+        return type_category(sol_type)
 
 
 class ABIHelper:
@@ -1,20 +1,39 @@
 from datetime import datetime
+import functools
 import os
 import pwd
 import json
-from eth_account.messages import defunct_hash_message
-from eth_account.account import Account
+import time
+from urllib.parse import quote
 import requests
-from .EVContractUtils import ABIParser, extract_abi
 from types import MethodType
-import inspect
-from solidity_parser import parser
-import sys
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from .exceptions import *
-from .http_helper import make_http_call
+from .http_helper import make_http_call, conditional_get, get_default_transport
+from . import instrumentation
+from . import json_codec
+from .batch import run_batch, prepare_read_call, DEFAULT_BATCH_WORKERS
+from .write_pipeline import WritePipeline, DEFAULT_SUBMITTERS, DEFAULT_MAX_QUEUE_SIZE
+from .read_cache import ReadCache
+from .spec_cache import SpecCache
+from .compile_cache import CompileCache
+from .sources import SourceResolver
+from .codegen import ContractCodegen
+from .registry import ContractRegistry, DEFAULT_MAX_HANDLES
+from .validation import compile_validators
+from .auth import signed_payload
+from .fs_utils import atomic_write_json
+from .confirmations import get_listener, PendingTransaction, PendingDeployment
 from typing import List
 
+DEFAULT_PREFETCH_WORKERS = 8
+# /deploy calls in flight during EVCore.deploy_many()
+DEFAULT_DEPLOY_WORKERS = 4
+# seconds for which cached account information is served by a lazily logged in EVCore without logging in again
+DEFAULT_ACCOUNT_INFO_TTL = 300
+
 CLEAN_SLATE_SETTINGS = {
   "PRIVATEKEY": None,
   "INTERNAL_API_ENDPOINT": "https://mainnet.maticvigil.com/api",
@@ -38,6 +57,194 @@ def read_file_by_chunks(fp, chunk_size=1024):
     if chunk:
         yield chunk
 
+@functools.lru_cache(maxsize=None)
+def _home_dir(uid):
+    return pwd.getpwuid(uid).pw_dir
+
+def maticvigil_settings_dir():
+    # MATICVIGIL_SETTINGS_DIR points the SDK at another settings.json, for eg. one for the local stand-in API server
+    return os.environ.get('MATICVIGIL_SETTINGS_DIR') or _home_dir(os.getuid()) + '/.maticvigil'
+
+def load_settings():
+    """
+    Loads ~/.maticvigil/settings.json, creating it from CLEAN_SLATE_SETTINGS if it does not exist yet
+    :return: tuple of (settings, True if the settings file was found)
+    """
+    settings_dir = maticvigil_settings_dir()
+    try:
+        with open(settings_dir + '/settings.json', 'r') as f:
+            s = json.load(f)
+    except:
+        # settings file does not exist, copy over empty settings
+        try:
+            os.stat(settings_dir)
+        except:
+            os.mkdir(settings_dir)
+        # create settings file from empty JSON file
+        with open(settings_dir + '/settings.json', 'w') as f2:
+            json.dump(obj=CLEAN_SLATE_SETTINGS, fp=f2)
+        return CLEAN_SLATE_SETTINGS, False
+    else:
+        return s, True
+
+def in_memory_settings(settings):
+    """
+    Settings passed by the caller instead of being read from ~/.maticvigil/settings.json
+    :param settings : mapping with at least PRIVATEKEY, and INTERNAL_API_ENDPOINT if not the mainnet endpoint
+    :return: tuple of (settings, True if a private key to log in with is set), like load_settings()
+    """
+    s = dict(CLEAN_SLATE_SETTINGS)
+    s.update(settings)
+    return s, bool(s['PRIVATEKEY'])
+
+def account_info_path():
+    return maticvigil_settings_dir() + '/account_info.json'
+
+def load_cached_account_info(verbose=False, max_age=None):
+    """
+    :param max_age : if set, cached account information last confirmed by a login longer than max_age seconds ago is not returned
+    """
+    path = account_info_path()
+    try:
+        if max_age is not None and time.time() - os.stat(path).st_mtime > max_age:
+            if verbose:
+                ev_core_logger.info('Cached account information is older than %s seconds', max_age)
+            return None
+        with open(path, 'r') as f:
+            account_info = json.load(f)
+    except:
+        if verbose:
+            ev_core_logger.error('Could not load account information from cache.')
+        return None
+    if verbose:
+        ev_core_logger.info('Loaded account information from cache')
+        if 'cached_time' in account_info:
+            ev_core_logger.info('Account information cached on: ')
+            ev_core_logger.info(account_info['cached_time'])
+    return account_info
+
+def cache_account_info(account_info):
+    """
+    Writes account information returned by /login to ~/.maticvigil/account_info.json. The file is replaced atomically,
+    and only when the account information changed. Otherwise its modification time is bumped to mark it as confirmed.
+    :return: True if the file was written
+    """
+    path = account_info_path()
+    cached = load_cached_account_info()
+    if cached is not None:
+        cached_time = cached.pop('cached_time', None)
+        if cached == {k: v for k, v in account_info.items() if k != 'cached_time'}:
+            account_info['cached_time'] = cached_time
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return False
+    account_info['cached_time'] = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+    atomic_write_json(path, account_info)
+    return True
+
+def log_account_info(account_info):
+    for k in account_info:
+        d = account_info[k]
+        if k == 'contracts':
+            ev_core_logger.info('Contracts deployed/verified:\n=============')
+            for _k in d:
+                _k.pop('appId', None)
+                ev_core_logger.info(f'Name: {_k["name"]}')
+                ev_core_logger.info(f'Address: {_k["address"]}')
+                ev_core_logger.info('--------------------')
+        elif k == 'key':
+            ev_core_logger.info(f'MaticVigil API key: \t {d}\n=============\n')
+        elif k == 'api_prefix':
+            ev_core_logger.info(f'REST API prefix: \t {d}\n=============\n')
+        elif k == 'hooks':
+            ev_core_logger.info(f'Registered integrations/hooks: \t {d}\n=============\n')
+        elif k == 'hook_events':
+            ev_core_logger.info(f'Contracts events fired to registered hooks: \t {d}\n=============\n')
+
+def resolve_spec_cache(spec_cache, in_memory=False):
+    """
+    :param spec_cache : True for the default SpecCache under ~/.maticvigil/specs, False or None to disable caching, or a SpecCache
+    :param in_memory : settings were passed in memory. The default SpecCache is not used, as it lives on disk
+    """
+    if spec_cache is True:
+        return None if in_memory else SpecCache(maticvigil_settings_dir() + '/specs')
+    return spec_cache if spec_cache else None
+
+def resolve_compile_cache(compile_cache, in_memory=False):
+    """
+    :param compile_cache : True for the default CompileCache under ~/.maticvigil/compiled, False or None to always compile,
+                           or a CompileCache
+    :param in_memory : settings were passed in memory. The default CompileCache is not used, as it lives on disk
+    """
+    if compile_cache is True:
+        return None if in_memory else CompileCache(maticvigil_settings_dir() + '/compiled')
+    return compile_cache if compile_cache else None
+
+def resolve_codegen(codegen, in_memory=False):
+    """
+    :param codegen : True to generate contract modules under ~/.maticvigil/contracts, False or None to build handles at runtime,
+                     or a ContractCodegen
+    :param in_memory : settings were passed in memory, so there is no default directory to generate modules in
+    """
+    if codegen is True:
+        if in_memory:
+            raise EVBaseException('codegen=True writes to ~/.maticvigil/contracts. Pass a ContractCodegen when using in-memory settings')
+        return ContractCodegen(maticvigil_settings_dir() + '/contracts')
+    return codegen if codegen else None
+
+def normalize_contract_ref(contract):
+    """
+    Accepts a contract address, an (address, app name) tuple or an entry of the 'contracts' list returned by /login
+    :return: tuple of (contract address, app name)
+    """
+    if isinstance(contract, str):
+        return contract, contract
+    if isinstance(contract, dict):
+        return contract['address'], contract.get('name') or contract['address']
+    address, app_name = contract
+    return address, app_name
+
+def parse_openapi_spec(openapi_spec, api_prefix, contract_address):
+    """
+    Walks the OpenAPI spec of a contract's REST API
+    :return: mapping of function name to a dict of 'method_url', 'request_type', 'params' and their OpenAPI 'types'
+    """
+    fn_specs = dict()
+    for endpoint in openapi_spec['paths']:
+        fn_name = endpoint[1:]  # to remove prefixed '/'
+        trailing_slash = fn_name.find('/')   # possible with GET calls like /getObject/{id}
+        if trailing_slash != -1:
+            fn_name = fn_name[:trailing_slash]
+        http_request_type = list(openapi_spec['paths'][endpoint].keys())[0]  # get or post
+        params_list = list()
+        types_list = list()
+        if http_request_type == 'get':
+            for each_param in openapi_spec['paths'][endpoint]['get']['parameters']:
+                params_list.append(each_param['name'])
+                types_list.append(each_param.get('schema', dict()).get('type', 'string'))
+        elif http_request_type == 'post':
+            for each_param, param_schema in openapi_spec['paths'][endpoint]['post']['requestBody']['content']['application/x-www-form-urlencoded']['schema']['properties'].items():
+                params_list.append(each_param)
+                types_list.append(param_schema.get('type', 'string'))
+        fn_specs[fn_name] = {
+            'method_url': f"{api_prefix}/contract/{contract_address}/{fn_name}",
+            'request_type': http_request_type,
+            'params': params_list,
+            'types': types_list
+        }
+    return fn_specs
+
+def collect_deploy_sources(contract_file, source_resolver=None):
+    """
+    Reads the main contract file and, recursively, the files it imports
+    :param contract_file : path to the contract file name
+    :param source_resolver : SourceResolver following the imports, defaults to one resolving relative imports
+    :return: tuple of (sources mapping as expected by /compile and /deploy, name of the main source file in it)
+    """
+    return (source_resolver or SourceResolver()).resolve(contract_file)
+
 def generate_contract_function(**outer_kwargs):
     def fn(self, *params_args, **params_kwargs):
         request_url = outer_kwargs['method_url']
@@ -45,91 +252,180 @@ def generate_contract_function(**outer_kwargs):
         ev_core_logger.debug('Calling MaticVigil contract function')
         ev_core_logger.debug(request_url)
         if request_type == 'get':
-            for arg in params_args:
-                # to construct get request like /getPostId/{id} or /2daccessor/{param1}/{param2}
-                request_url +=  '/' + arg
-            request_url = request_url.rstrip('/')
-            r = make_http_call(request_type='get', url=request_url)
-            return r
+            return self._read(outer_kwargs['fn_name'], request_url, params_args)
         elif request_type == 'post':
-            r = make_http_call(request_type='post', url=request_url, params=params_kwargs, headers={'X-API-KEY': self._api_write_key})
-            txhash = r['data'][0]['txHash']
-            self._pending_txhashes.add(txhash)
-            return r['data']
+            return self._write(outer_kwargs['fn_name'], request_url, params_kwargs)
     return fn
 
 class EVCore(object):
-    def __init__(self, verbose=False):
+    def __init__(self, verbose=False, transport=None, warm_up=False, read_cache=None, spec_cache=False, codegen=False,
+                 prefetch_contracts=False, lazy_login=False, background_login=False, account_info_ttl=DEFAULT_ACCOUNT_INFO_TTL,
+                 settings=None, account_info=None, executor=None, max_contract_handles=DEFAULT_MAX_HANDLES, validate_args=False,
+                 compile_cache=False, source_resolver=None, track_confirmations=False):
+        """
+        :param verbose : log debug information about settings, login and API calls
+        :param transport : HTTPTransport to be shared with contract handles. Defaults to the module wide pooled transport
+        :param warm_up : open pooled connections to the MaticVigil API endpoints before logging in
+        :param read_cache : optional ReadCache used by the contract handles generated by this instance
+        :param spec_cache : SpecCache keeping contract OpenAPI specs on disk. True for the default one under ~/.maticvigil/specs.
+                            Off by default, the spec is downloaded on every generate_contract_sdk() call
+        :param codegen : generate an importable module per contract with typed methods, and build handles from it.
+                         True for modules under ~/.maticvigil/contracts, or a ContractCodegen
+        :param prefetch_contracts : after logging in, start building handles for every contract of the account in the background.
+                                    generate_contract_sdk() then returns them without waiting on the API
+        :param lazy_login : return without logging in. Account information cached less than account_info_ttl seconds ago
+                            is used as is, otherwise the login happens on first use of the account
+        :param background_login : like lazy_login, but the login starts right away on a background thread
+        :param account_info_ttl : maximum age in seconds of the cached account information served with lazy_login
+        :param settings : mapping with PRIVATEKEY and INTERNAL_API_ENDPOINT used instead of ~/.maticvigil/settings.json.
+                          Nothing is read from or written to the filesystem then. spec_cache=True turns into no caching,
+                          pass a SpecCache to cache specs, for eg. SpecCache() in memory shared by many instances
+        :param account_info : account information as returned by /login. Skips the login
+        :param executor : concurrent.futures.Executor running prefetches and batches, for eg. one shared by many instances.
+                          By default a thread pool is created per call
+        :param max_contract_handles : maximum number of handles kept by contract(), least recently used ones are dropped first
+        :param validate_args : check and coerce the arguments of contract calls against the parameter types of the contract's
+                               OpenAPI spec before sending them, see EVContract.enable_validation()
+        :param compile_cache : CompileCache keeping the ABIs returned by /compile, so that deploying unchanged sources skips it.
+                               True for the default one under ~/.maticvigil/compiled. Off by default, every deploy is compiled
+        :param source_resolver : SourceResolver collecting the files imported by deployed contracts, for eg. one with
+                                 include_paths to look up '@openzeppelin/...' imports in
+        :param track_confirmations : deploys and contract writes return handles that can be waited on until MaticVigil reports
+                                     the transaction over its websocket. The websocket is subscribed to in the background,
+                                     from the first contract handle or deploy on
+        """
         self._verbose = verbose
         self._account = None
-        try_login = False
+        self._transport = transport if transport else get_default_transport()
+        self._read_cache = read_cache
+        self._in_memory = settings is not None
+        self._spec_cache = resolve_spec_cache(spec_cache, self._in_memory)
+        self._codegen = resolve_codegen(codegen, self._in_memory)
+        self._compile_cache = resolve_compile_cache(compile_cache, self._in_memory)
+        self._source_resolver = source_resolver if source_resolver else SourceResolver()
+        self._executor = executor
+        self._prefetched = dict()
+        self._prefetch_lock = threading.Lock()
+        self._max_contract_handles = max_contract_handles
+        self._validate_args = validate_args
+        self._track_confirmations = track_confirmations
+        self._registry = None
+        self._login_lock = threading.Lock()
+        self._logged_in = threading.Event()
+        self._warm_up = warm_up
+        s, try_login = in_memory_settings(settings) if self._in_memory else load_settings()
+        self._settings = s
+        if self._verbose:
+            ev_core_logger.debug('Loaded settings:')
+            ev_core_logger.debug(s)
+        if account_info:
+            self._set_account(account_info)
+            try_login = False
+        if not try_login:
+            if warm_up:
+                self._transport.warm_up([self._settings['INTERNAL_API_ENDPOINT'], self._settings['REST_API_ENDPOINT']])
+            self._logged_in.set()
+            if prefetch_contracts and self._account:
+                self.prefetch_contract_sdks()
+            return
+        if lazy_login or background_login:
+            account_info = None if self._in_memory else load_cached_account_info(self._verbose, max_age=account_info_ttl)
+            if account_info:
+                self._set_account(account_info)
+                self._logged_in.set()
+                if prefetch_contracts:
+                    self.prefetch_contract_sdks()
+            elif background_login or prefetch_contracts:
+                threading.Thread(
+                    target=self._ensure_account, kwargs={'prefetch_contracts': prefetch_contracts},
+                    name='EVLogin', daemon=True
+                ).start()
+            return
+        self._ensure_account(prefetch_contracts)
+
+    def _ensure_account(self, prefetch_contracts=False):
+        """
+        Logs in once. Callers arriving while a login is in flight wait for it
+        """
+        if not self._logged_in.is_set():
+            with self._login_lock:
+                if not self._logged_in.is_set():
+                    try:
+                        self._load_account()
+                    finally:
+                        self._logged_in.set()
+        if prefetch_contracts and self._account:
+            self.prefetch_contract_sdks()
+
+    def _load_account(self):
+        if self._warm_up:
+            self._transport.warm_up([self._settings['INTERNAL_API_ENDPOINT'], self._settings['REST_API_ENDPOINT']])
         try:
-            with open(pwd.getpwuid(os.getuid()).pw_dir + '/.maticvigil/settings.json', 'r') as f:
-                s = json.load(f)
+            r = self._login(internal_api_endpoint=self._settings['INTERNAL_API_ENDPOINT'], private_key=self._settings['PRIVATEKEY'])
         except:
-            # settings file does not exist, copy over empty settings
-            try:
-                os.stat(pwd.getpwuid(os.getuid()).pw_dir + '/.maticvigil')
-            except:
-                os.mkdir(pwd.getpwuid(os.getuid()).pw_dir + '/.maticvigil')
-            # create settings file from empty JSON file
-            with open(pwd.getpwuid(os.getuid()).pw_dir + '/.maticvigil/settings.json', 'w') as f2:
-                json.dump(obj=CLEAN_SLATE_SETTINGS, fp=f2)
-            s = CLEAN_SLATE_SETTINGS
+            r = None
+        if not r:
+            if self._in_memory:
+                ev_core_logger.error('Could not log in to MaticVigil endpoint %s', self._settings['INTERNAL_API_ENDPOINT'])
+                return
+            # try to load account info from cached file
+            if self._verbose:
+                ev_core_logger.info('Could not connect to MaticVigil endpoint. Attempting to load account information from cache.')
+            self._set_account(load_cached_account_info(self._verbose))
         else:
-            try_login = True
-        finally:
-            self._settings = s
             if self._verbose:
-                ev_core_logger.debug('Loaded settings:')
-                ev_core_logger.debug(s)
-            if try_login:
-                try:
-                    r = self._login(internal_api_endpoint=self._settings['INTERNAL_API_ENDPOINT'], private_key=self._settings['PRIVATEKEY'])
-                except:
-                    # try to load account info from cached file
-                    if self._verbose:
-                        ev_core_logger.info('Could not connect to MaticVigil endpoint. Attempting to load account information from cache.')
-                    try:
-                        with open(pwd.getpwuid(os.getuid()).pw_dir + '/.maticvigil/account_info.json', 'r') as f:
-                            self._account = json.load(f)
-                            if self._verbose:
-                                ev_core_logger.info('Loaded account information from cache')
-                                if 'cached_time' in self._account:
-                                    ev_core_logger.info('Account information cached on: ')
-                                    ev_core_logger.info(self._account['cached_time'])
-                    except:
-                        if self._verbose:
-                            ev_core_logger.error('Could not load account information from cache.')
-                else:
-                    if self._verbose:
-                        for k in r:
-                            d = r[k]
-                            if k == 'contracts':
-                                ev_core_logger.info('Contracts deployed/verified:\n=============')
-                                for _k in d:
-                                    del (_k['appId'])
-                                    ev_core_logger.info(f'Name: {_k["name"]}')
-                                    ev_core_logger.info(f'Address: {_k["address"]}')
-                                    ev_core_logger.info('--------------------')
-                            elif k == 'key':
-                                ev_core_logger.info(f'MaticVigil API key: \t {d}\n=============\n')
-                            elif k == 'api_prefix':
-                                ev_core_logger.info(f'REST API prefix: \t {d}\n=============\n')
-                            elif k == 'hooks':
-                                ev_core_logger.info(f'Registered integrations/hooks: \t {d}\n=============\n')
-                            elif k == 'hook_events':
-                                ev_core_logger.info(f'Contracts events fired to registered hooks: \t {d}\n=============\n')
-                    with open(pwd.getpwuid(os.getuid()).pw_dir + '/.maticvigil/account_info.json', 'w') as f:
-                        r.update({'cached_time': datetime.now().strftime('%d/%m/%Y %H:%M:%S')})
-                        json.dump(obj=r, fp=f)
-                    self._account = r
-                    self._api_read_key = r['readKey']
-                    self._api_write_key = r['key']
+                log_account_info(r)
+            if not self._in_memory:
+                cache_account_info(r)
+            self._set_account(r)
+            if self._warm_up:
+                self._transport.warm_up([r.get('api_prefix')])
+
+    def _set_account(self, account_info):
+        self._account = account_info
+        if account_info:
+            self._api_read_key = account_info['readKey']
+            self._api_write_key = account_info['key']
+
+    @property
+    def transport(self):
+        return self._transport
+
+    @property
+    def account(self):
+        """
+        Account information returned by /login, logging in first if the login was deferred
+        """
+        self._ensure_account()
+        return self._account
 
     @property
     def contracts(self):
-        return self._account['contracts'] if self._account else None
+        account = self.account
+        return account['contracts'] if account else None
+
+    @property
+    def registry(self):
+        """
+        ContractRegistry of the contracts of the account, indexed by address and name
+        """
+        if self._registry is None:
+            contracts = self.contracts
+            with self._prefetch_lock:
+                if self._registry is None:
+                    self._registry = ContractRegistry(
+                        contracts,
+                        lambda contract_address, app_name: self.generate_contract_sdk(contract_address, app_name),
+                        self._max_contract_handles
+                    )
+        return self._registry
+
+    def contract(self, ref):
+        """
+        :param ref : name or address of a contract of the account, for eg. evc.contract('microblog')
+        :return: the contract handle, built on first use and reused afterwards
+        """
+        return self.registry.handle(ref)
 
     """ def _get_sdk_from_spec(self, contract_address, app_name):
          r = requests.post(url='https://generator3.swagger.io/api/generate', json= {
@@ -147,176 +443,464 @@ class EVCore(object):
          z.extractall(pwd.getpwuid(os.getuid()).pw_dir + f'/.../contracts/{app_name}')
          sys.path.append(pwd.getpwuid(os.getuid()).pw_dir + f'/.../contracts/{app_name}') """
 
-    def generate_contract_sdk(self, contract_address, app_name):
-        # download client SDK from online generator
-        # self._get_sdk_from_spec(contract_address, app_name)
-        # return pwd.getpwuid(os.getuid()).pw_dir + f'/.maticvigil/contracts/{app_name}'
-        openapi_spec = make_http_call(request_type='get', url=f"{self._account['api_prefix']}/swagger/{contract_address}/?key={self._api_read_key}")
-        fnname_to_fnimpl_map = dict()
-        for endpoint in openapi_spec['paths']:
-            fn_name = endpoint[1:]  # to remove prefixed '/'
-            trailing_slash = fn_name.find('/')   # possible with GET calls like /getObject/{id}
-            if trailing_slash != -1:
-                fn_name = fn_name[:trailing_slash]
-            http_request_type = list(openapi_spec['paths'][endpoint].keys())[0]  # get or post
-            params_list = list()
-            if http_request_type == 'get':
-                for each_param in openapi_spec['paths'][endpoint]['get']['parameters']:
-                    params_list.append(each_param['name'])
-            elif http_request_type == 'post':
-                for each_param in openapi_spec['paths'][endpoint]['post']['requestBody']['content']['application/x-www-form-urlencoded']['schema']['properties'].keys():
-                    params_list.append(each_param)
-            method_url = f"{self._account['api_prefix']}/contract/{contract_address}/{fn_name}"
-            contract_fn = generate_contract_function(method_url=method_url, request_type=http_request_type)
-            # print(inspect.signature(contract_fn))
-            fnname_to_fnimpl_map[fn_name] = contract_fn
-            # setattr(contract_obj, fn_name, contract_fn)
-            # contract_obj.__setattr__(fn_name, contract_fn)
-        contract_obj = EVContract(contract_address, self._api_read_key, self._api_write_key, self._settings)
-        for each_fn in fnname_to_fnimpl_map:
-            contract_obj.__setattr__(each_fn, MethodType(fnname_to_fnimpl_map[each_fn], contract_obj))
+    @property
+    def read_cache(self):
+        return self._read_cache
+
+    @property
+    def spec_cache(self):
+        return self._spec_cache
+
+    @property
+    def executor(self):
+        return self._executor
+
+    @property
+    def codegen(self):
+        return self._codegen
+
+    @property
+    def compile_cache(self):
+        return self._compile_cache
+
+    def _load_openapi_spec(self, contract_address, refresh_spec=False):
+        api_prefix = self.account['api_prefix']
+        spec_url = f"{api_prefix}/swagger/{contract_address}/?key={self._api_read_key}"
+        if self._spec_cache is None:
+            return make_http_call(request_type='get', url=spec_url, transport=self._transport, operation='swagger')
+        return self._spec_cache.load(
+            api_prefix,
+            contract_address,
+            lambda etag: conditional_get(spec_url, etag=etag, transport=self._transport, operation='swagger'),
+            refresh=refresh_spec
+        )
+
+    def generate_contract_sdk(self, contract_address, app_name, read_cache=None, refresh_spec=False, abi=None):
+        """
+        :param contract_address : address of a contract deployed or verified through MaticVigil
+        :param app_name : name of the contract
+        :param read_cache : ReadCache for this contract handle, overriding the one passed to EVCore
+        :param refresh_spec : download the OpenAPI spec of the contract again instead of using the cached copy
+        :param abi : ABI of the contract. Turns on argument validation against its Solidity types for this handle
+        """
+        contract_obj = None
+        if not read_cache and not refresh_spec:
+            with self._prefetch_lock:
+                prefetched = self._prefetched.pop(contract_address.lower(), None)
+            # a build still queued, for eg. behind others on a shared executor, is done right here instead of waited for
+            if prefetched is not None and not prefetched.cancel():
+                try:
+                    contract_obj = prefetched.result()
+                except Exception as e:
+                    ev_core_logger.debug('Prefetching contract %s failed, retrying: %s', contract_address, e)
+        if contract_obj is None:
+            contract_obj = self._build_contract_sdk(contract_address, app_name, read_cache, refresh_spec)
+        if abi is not None:
+            contract_obj.enable_validation(abi)
+        return contract_obj
+
+    def _build_contract_sdk(self, contract_address, app_name, read_cache=None, refresh_spec=False):
+        self._ensure_account()
+        if self._codegen is not None:
+            contract_obj = self._generated_contract_sdk(contract_address, app_name, read_cache, refresh_spec)
+            if self._validate_args:
+                contract_obj.enable_validation()
+            if self._track_confirmations:
+                contract_obj.enable_confirmations()
+            return contract_obj
+        openapi_spec = self._load_openapi_spec(contract_address, refresh_spec)
+        fn_specs = parse_openapi_spec(openapi_spec, self._account['api_prefix'], contract_address)
+        contract_obj = EVContract(
+            contract_address, self._api_read_key, self._api_write_key, self._settings,
+            transport=self._transport,
+            read_cache=read_cache if read_cache else self._read_cache
+        )
+        contract_obj._fn_specs = fn_specs
+        for fn_name, fn_spec in fn_specs.items():
+            contract_fn = generate_contract_function(fn_name=fn_name, method_url=fn_spec['method_url'], request_type=fn_spec['request_type'])
+            contract_obj.__setattr__(fn_name, MethodType(contract_fn, contract_obj))
         contract_obj._initialized = True
+        if self._validate_args:
+            contract_obj.enable_validation()
+        if self._track_confirmations:
+            contract_obj.enable_confirmations()
         return contract_obj
 
-      
+
+    def generate_contract_sdks(self, contracts, max_workers=DEFAULT_BATCH_WORKERS, read_cache=None, refresh_spec=False):
+        """
+        Builds handles for many contracts, fetching their specs concurrently
+        :param contracts : list of contract addresses, (address, app name) tuples or entries of EVCore.contracts
+        :param max_workers : maximum number of specs fetched at the same time
+        :return: BatchResult with one contract handle or exception per contract, in the same order
+        """
+        calls = [
+            (self.generate_contract_sdk, normalize_contract_ref(c) + (read_cache, refresh_spec))
+            for c in contracts
+        ]
+        return run_batch(calls, max_workers, self._executor)
+
+    def prefetch_contract_sdks(self, contracts=None, max_workers=DEFAULT_PREFETCH_WORKERS):
+        """
+        Starts building contract handles in the background. generate_contract_sdk() hands them out once,
+        waiting for the build to finish if needed
+        :param contracts : contracts to prefetch, as accepted by generate_contract_sdks(). Defaults to every contract of the account
+        :param max_workers : maximum number of specs fetched at the same time, ignored with a shared executor
+        """
+        contracts = self.contracts if contracts is None else contracts
+        if not contracts:
+            return
+        executor = self._executor
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(contracts))), thread_name_prefix='EVPrefetch')
+        with self._prefetch_lock:
+            for c in contracts:
+                contract_address, app_name = normalize_contract_ref(c)
+                if contract_address.lower() not in self._prefetched:
+                    self._prefetched[contract_address.lower()] = executor.submit(self._build_contract_sdk, contract_address, app_name)
+        if executor is not self._executor:
+            # lets the worker threads exit once the queued builds are done
+            executor.shutdown(wait=False)
+
+    def _generated_contract_sdk(self, contract_address, app_name, read_cache, refresh_spec):
+        module = self._codegen.load_or_generate(
+            self._account['api_prefix'],
+            contract_address,
+            app_name,
+            lambda: self._load_openapi_spec(contract_address, refresh_spec),
+            refresh=refresh_spec
+        )
+        return module.CONTRACT_CLASS(
+            self._api_read_key, self._api_write_key, self._settings,
+            transport=self._transport,
+            read_cache=read_cache if read_cache else self._read_cache
+        )
+
+    def batch_read(self, calls, max_workers=DEFAULT_BATCH_WORKERS):
+        """
+        Runs read calls across many contract handles concurrently
+        :param calls : list of (contract handle, call) tuples where call is a function name or a (function name, args) tuple
+        :param max_workers : maximum number of reads in flight
+        :return: BatchResult with one result or exception per call, in the same order
+        """
+        return run_batch([prepare_read_call(contract, call) for contract, call in calls], max_workers, self._executor)
+
     def login(self):
         return self._login(internal_api_endpoint=self._settings['INTERNAL_API_ENDPOINT'], private_key=self._settings['PRIVATEKEY'])
 
     def signup(self, invite_code):
-        msg = "Trying to signup"
-        message_hash = defunct_hash_message(text=msg)
-        signed_msg = Account.signHash(message_hash, self._settings['PRIVATEKEY'])
-        request_json = {'msg': msg, 'sig': signed_msg.signature.hex(), 'code': invite_code}
+        request_json = signed_payload(self._settings['PRIVATEKEY'], "Trying to signup")
+        request_json['code'] = invite_code
         # --MATICVIGIL API CALL to /signup---
         ev_core_logger.debug('Attempting to signup with MaticVigil')
         signup_url = self._settings['INTERNAL_API_ENDPOINT'] + '/signup'
-        r = make_http_call(request_type='post', url=signup_url, params=request_json)
+        r = make_http_call(request_type='post', url=signup_url, params=request_json, transport=self._transport, operation='signup')
         return r
 
-      
-    def deploy(self, contract_file, contract_name, inputs):
+
+    def _compile_for_deploy(self, contract_file):
         """
-        Deploys a smart contract from the solidity source code specified
-        :param contract_file : path to the contract file name
-        :param contract_name : the contract name to be deployed from the file
-        :param inputs : mapping of constructor arguments
+        Collects the sources of a contract file and compiles them
+        :return: tuple of (sources mapping, main source file, ABIParser loaded with the compiled ABI)
         """
-        contract_src = ""
-        if self._verbose:
-            print('Got unordered constructor inputs: ')
-            print(inputs)
+        # eth_abi and eth_utils are only needed for deploys
+        from .EVContractUtils import ABIParser, extract_abi
+        sources, source_file = collect_deploy_sources(contract_file, self._source_resolver)
 
-        sources = dict()
-
-        if contract_file[0] == '~':
-            contract_full_path = os.path.expanduser(contract_file)
-        else:
-            contract_full_path = contract_file
-        resident_directory = ''.join(map(lambda x: x + '/', contract_full_path.split('/')[:-1]))
-        contract_file_name = contract_full_path.split('/')[-1]
-        contract_file_obj = open(file=contract_full_path)
-
-        main_contract_src = ''
-        while True:
-            chunk = contract_file_obj.read(1024)
-            if not chunk:
-                break
-            main_contract_src += chunk
-        sources[f'ev-py-sdk/{contract_file_name}'] = {'content': main_contract_src}
-        # loop through imports and add them to sources
-        source_unit = parser.parse(main_contract_src)
-        source_unit_obj = parser.objectify(source_unit)
-
-        for each in source_unit_obj.imports:
-            import_location = each['path'].replace("'", "")
-            # TODO: follow specified relative paths and import such files too
-            if import_location[:2] != './':
-                ev_core_logger.error('You can only import files from within the same directory as of now')
-                raise EVBaseException('You can only import files from within the same directory as of now')
-            # otherwise read the file into the contents mapping
-            full_path = resident_directory + import_location[2:]
-            imported_contract_obj = open(full_path, 'r')
-            contract_src = ''
-            while True:
-                chunk = imported_contract_obj.read(1024)
-                if not chunk:
-                    break
-                contract_src += chunk
-            sources[f'ev-py-sdk/{import_location[2:]}'] = {'content': contract_src}
-
-        abi_json = extract_abi(self._settings, {'sources': sources, 'sourceFile': f'ev-py-sdk/{contract_file_name}'})
+        abi_json = extract_abi(
+            self._settings,
+            {'sources': sources, 'sourceFile': source_file},
+            transport=self._transport,
+            compile_cache=self._compile_cache
+        )
         abp = ABIParser(abi_json=abi_json)
         abp.load_abi()
-        c_inputs = abp.ordered_map_to_ev_constructor_args(inputs)
+        return sources, source_file, abp
+
+    def _deploy_listener(self):
+        """
+        :return: ConfirmationListener of the account, started if it was not. None if confirmations are not tracked
+        """
+        if not self._track_confirmations or not self.account:
+            return None
+        listener = get_listener(self._settings, self._api_read_key)
+        listener.start()
+        return listener
+
+    def _submit_deploy(self, contract_name, c_inputs, sources, source_file, auth_payload, listener=None):
+        """
+        :param c_inputs : ordered constructor arguments
+        :param auth_payload : signed "Trying to deploy" message
+        :param listener : ConfirmationListener tracking the deployment
+        """
         if self._verbose:
             print('Ordered constructor inputs: \n', c_inputs)
-
-        msg = "Trying to deploy"
-        message_hash = defunct_hash_message(text=msg)
-        signed_msg = Account.signHash(message_hash, self._settings['PRIVATEKEY'])
-        deploy_json = {
-            'msg': msg,
-            'sig': signed_msg.signature.hex(),
+        deploy_json = dict(auth_payload)
+        deploy_json.update({
             'name': contract_name,
             'inputs': c_inputs,
             'sources': sources,
-            'sourceFile': f'ev-py-sdk/{contract_file_name}'
-        }
+            'sourceFile': source_file
+        })
         # --MATICVIGIL API CALL---
-        r = make_http_call(request_type='post', url=self._settings['INTERNAL_API_ENDPOINT'] + '/deploy', params=deploy_json)
+        r = make_http_call(
+            request_type='post',
+            url=self._settings['INTERNAL_API_ENDPOINT'] + '/deploy',
+            params=deploy_json,
+            transport=self._transport,
+            operation='deploy'
+        )
         if self._verbose:
             ev_core_logger.debug('MaticVigil deploy response: ')
             ev_core_logger.debug(r)
-        return r['data']
+        if self._registry is not None:
+            self._registry.add({'address': r['data']['contract'], 'name': contract_name})
+        return PendingDeployment(r['data'], listener.track(r['data']['txhash']) if listener is not None else None)
+
+    def deploy(self, contract_file, contract_name, inputs):
+        """
+        Deploys a smart contract from the solidity source code specified
+        :param contract_file : path to the contract file name
+        :param contract_name : the contract name to be deployed from the file
+        :param inputs : mapping of constructor arguments
+        :return: PendingDeployment, the deploy response data with 'contract' and 'txhash'. Its wait() returns once
+                 the deployment is confirmed
+        """
+        if self._verbose:
+            print('Got unordered constructor inputs: ')
+            print(inputs)
+        # subscribes to the websocket while the sources are compiled
+        listener = self._deploy_listener()
+        sources, source_file, abp = self._compile_for_deploy(contract_file)
+        return self._submit_deploy(
+            contract_name,
+            abp.ordered_map_to_ev_constructor_args(inputs),
+            sources,
+            source_file,
+            signed_payload(self._settings['PRIVATEKEY'], "Trying to deploy"),
+            listener
+        )
+
+    def deploy_many(self, contract_file, contract_name, inputs_list, max_workers=DEFAULT_DEPLOY_WORKERS):
+        """
+        Deploys many instances of a smart contract. The sources are collected and compiled once,
+        then the /deploy calls run concurrently
+        :param contract_file : path to the contract file name
+        :param contract_name : the contract name to be deployed from the file
+        :param inputs_list : list of constructor argument mappings, one per instance
+        :param max_workers : maximum number of deploys in flight, ignored with a shared executor
+        :return: BatchResult with the PendingDeployment or the exception of each instance, in the same order as inputs_list
+        """
+        listener = self._deploy_listener()
+        sources, source_file, abp = self._compile_for_deploy(contract_file)
+        auth_payload = signed_payload(self._settings['PRIVATEKEY'], "Trying to deploy")
+
+        def deploy_instance(inputs):
+            c_inputs = abp.ordered_map_to_ev_constructor_args(inputs)
+            return self._submit_deploy(contract_name, c_inputs, sources, source_file, auth_payload, listener)
+
+        return run_batch([(deploy_instance, (inputs,)) for inputs in inputs_list], max_workers, self._executor)
+
 
-      
     def _login(self, internal_api_endpoint, private_key):
-        msg = "Trying to login"
-        message_hash = defunct_hash_message(text=msg)
-        signed_msg = Account.signHash(message_hash, private_key)
         # --MATICVIGIL API CALL---
         headers = {'accept': 'application/json', 'Content-Type': 'application/json'}
-        r = requests.post(internal_api_endpoint + '/login',
-                          json={'msg': msg, 'sig': signed_msg.signature.hex()}, headers=headers)
+        login_url = internal_api_endpoint + '/login'
+        with instrumentation.timed_call('login', 'post', login_url) as call_metrics:
+            r = self._transport.post(login_url, json_params=signed_payload(private_key, "Trying to login"), headers=headers)
+            if call_metrics is not None:
+                call_metrics.status_code = r.status_code
+                call_metrics.response_bytes = len(r.content)
         if self._verbose:
             print(r.text)
         if r.status_code == requests.codes.ok:
-            r = r.json()
+            r = json_codec.loads(r.content)
             return r['data']
         else:
             return None
 
-          
-class EVContract(object):
-    def __init__(self, contract_address, api_read_key, api_write_key, ev_settings):
+
+class EVContractBase(object):
+    """
+    State and request payloads shared by the blocking EVContract and its asyncio counterpart AsyncEVContract
+    """
+    def __init__(self, contract_address, api_read_key, api_write_key, ev_settings, read_cache=None):
         self._contract_address = contract_address
+        self._read_cache = read_cache
         self._initialized = False
         self._api_read_key = api_read_key
         self._api_write_key = api_write_key
         self._ev_settings = ev_settings
         self._ev_private_key = self._ev_settings['PRIVATEKEY']
-        self._pending_txhashes = set()
+        self._track_confirmations = False
+        # function name -> method_url, request_type and params, filled in by generate_contract_sdk()
+        self._fn_specs = dict()
+        # function name -> FunctionValidator, once enable_validation() was called
+        self._validators = None
 
     @property
-    def integrations(self):
-        if not self._initialized:
+    def contract_address(self):
+        return self._contract_address
+
+    @property
+    def read_cache(self):
+        return self._read_cache
+
+    @staticmethod
+    def _read_url(request_url, params_args):
+        for arg in params_args:
+            # to construct get request like /getPostId/{id} or /2daccessor/{param1}/{param2}
+            request_url += '/' + quote(str(arg), safe='')
+        return request_url.rstrip('/')
+
+    def enable_validation(self, abi=None):
+        """
+        Checks and coerces the arguments of every contract call before it is sent. A call with invalid arguments
+        raises EVValidationError without any request being made
+        :param abi : contract ABI, for exact checks against its Solidity types. Without it, the parameter types
+                     of the contract's OpenAPI spec are used
+        """
+        self._validators = compile_validators(self._fn_specs, abi)
+
+    def disable_validation(self):
+        self._validators = None
+
+    def enable_confirmations(self):
+        """
+        Writes return a PendingTransaction that resolves once MaticVigil reports the transaction over its websocket.
+        The websocket is subscribed to in the background from now on, writes never wait for it
+        """
+        self._track_confirmations = True
+        self._confirmation_listener()
+
+    def disable_confirmations(self):
+        self._track_confirmations = False
+
+    def _confirmation_listener(self):
+        if not self._track_confirmations:
             return None
-        url = self._ev_settings['INTERNAL_API_ENDPOINT']+'/hooks/list'
-        msg = 'dummystring'
-        message_hash = defunct_hash_message(text=msg)
-        sig_msg = Account.signHash(message_hash, self._ev_settings['PRIVATEKEY'])
-        method_args = {
-            "msg": msg,
-            "sig": sig_msg.signature.hex(),
+        listener = get_listener(self._ev_settings, self._api_read_key)
+        listener.start()
+        return listener
+
+    @staticmethod
+    def _pending_transaction(data, listener):
+        """
+        :param data : response data of a write, [{'txHash': ...}]
+        """
+        if listener is None:
+            return PendingTransaction(data)
+        return PendingTransaction(data, listener.track(data[0]['txHash']))
+
+    def _validated_read_args(self, fn_name, params_args):
+        validator = self._validators.get(fn_name) if self._validators is not None else None
+        return validator.read_args(params_args) if validator is not None else params_args
+
+    def _validated_write_args(self, fn_name, params_kwargs):
+        validator = self._validators.get(fn_name) if self._validators is not None else None
+        return validator.write_args(params_kwargs) if validator is not None else params_kwargs
+
+    def _read_cache_get(self, fn_name, params_args):
+        """
+        :return: tuple of (cache token for _read_cache_put or None if caching is off, True on a cache hit, cached value)
+        """
+        if self._read_cache is None:
+            return None, False, None
+        key = ReadCache.make_key(self._contract_address, fn_name, params_args)
+        # taken before the request, a write invalidating the contract meanwhile keeps the result out of the cache
+        generation = self._read_cache.generation(self._contract_address)
+        hit, value = self._read_cache.get(key)
+        return (key, generation), hit, value
+
+    def _read_cache_put(self, cache_token, value):
+        if cache_token is not None:
+            key, generation = cache_token
+            self._read_cache.put(key, value, generation)
+
+    def _read_cache_invalidate(self):
+        if self._read_cache is not None:
+            self._read_cache.invalidate_contract(self._contract_address)
+
+    def _hook_method_args(self, **extra_args):
+        method_args = signed_payload(self._ev_settings['PRIVATEKEY'], 'dummystring')
+        method_args.update({
             "key": self._api_write_key,
             "type": "web",
             "contract": self._contract_address
-        }
+        })
+        method_args.update(extra_args)
+        return method_args
+
+    def _register_integration_args(self, url):
+        headers = {'accept': 'application/json', 'Content-Type': 'application/json',
+                   'X-API-KEY': self._api_write_key}
+        # the hook registration endpoint expects the private key in the 'key' field
+        method_args = self._hook_method_args(key=self._ev_private_key, web=url)
+        return dict(
+            url=self._ev_settings['INTERNAL_API_ENDPOINT']+'/hooks/add',
+            params=method_args,
+            headers=headers
+        )
+
+    def _check_integration_channel(self, integration_channel):
+        if not integration_channel == 'web':
+            err_msg = 'Only integrations of type \'web\' are supported by SDK currently'
+            ev_core_logger.error(err_msg)
+            raise EVBaseException(err_msg)
+
+
+class EVContract(EVContractBase):
+    def __init__(self, contract_address, api_read_key, api_write_key, ev_settings, transport=None, read_cache=None):
+        super(EVContract, self).__init__(contract_address, api_read_key, api_write_key, ev_settings, read_cache=read_cache)
+        self._transport = transport if transport else get_default_transport()
+
+    def _read(self, fn_name, request_url, params_args):
+        params_args = self._validated_read_args(fn_name, params_args)
+        cache_token, hit, value = self._read_cache_get(fn_name, params_args)
+        if hit:
+            return value
+        r = make_http_call(request_type='get', url=self._read_url(request_url, params_args), transport=self._transport, operation='contract_read:' + fn_name)
+        self._read_cache_put(cache_token, r)
+        return r
+
+    def _write(self, fn_name, request_url, params_kwargs):
+        params_kwargs = self._validated_write_args(fn_name, params_kwargs)
+        listener = self._confirmation_listener()
+        try:
+            r = make_http_call(request_type='post', url=request_url, params=params_kwargs, headers={'X-API-KEY': self._api_write_key}, transport=self._transport, operation='contract_write:' + fn_name)
+        finally:
+            # a write that failed or timed out may still have been applied
+            self._read_cache_invalidate()
+        return self._pending_transaction(r['data'], listener)
+
+    def batch_read(self, calls, max_workers=DEFAULT_BATCH_WORKERS):
+        """
+        Calls many read functions of this contract concurrently
+        :param calls : list of function names or (function name, args) tuples, for eg. [('getPostId', ['1']), 'blogTitle']
+        :param max_workers : maximum number of reads in flight
+        :return: BatchResult with one result or exception per call, in the same order
+        """
+        return run_batch([prepare_read_call(self, call) for call in calls], max_workers)
+
+    def write_pipeline(self, submitters=DEFAULT_SUBMITTERS, max_queue_size=DEFAULT_MAX_QUEUE_SIZE):
+        """
+        :param submitters : number of writes sent concurrently
+        :param max_queue_size : number of writes that can wait in the queue before submissions block
+        :return: WritePipeline sending writes to this contract
+        """
+        return WritePipeline(self, submitters=submitters, max_queue_size=max_queue_size)
+
+    @property
+    def integrations(self):
+        if not self._initialized:
+            return None
         list_response = make_http_call(
             request_type='post',
-            url=url,
-            params=method_args,
-            headers={'accept': 'application/json', 'Content-Type': 'application/json'}
+            url=self._ev_settings['INTERNAL_API_ENDPOINT']+'/hooks/list',
+            params=self._hook_method_args(),
+            headers={'accept': 'application/json', 'Content-Type': 'application/json'},
+            transport=self._transport,
+            operation='hooks:list'
         )
         if list_response['success']:
             return list_response['data']
@@ -324,22 +908,13 @@ class EVContract(object):
             return None
 
     def deactivate_integration(self, hook_id):
-        msg = 'dummystring'
-        message_hash = defunct_hash_message(text=msg)
-        sig_msg = Account.signHash(message_hash, self._ev_settings['PRIVATEKEY'])
-        method_args = {
-            "msg": msg,
-            "sig": sig_msg.signature.hex(),
-            "key": self._api_write_key,
-            "type": "web",
-            "contract": self._contract_address,
-            "id": hook_id
-        }
         integration_response = make_http_call(
             request_type='post',
             url=self._ev_settings['INTERNAL_API_ENDPOINT'] + '/hooks/deactivate',
-            params=method_args,
-            headers={'accept': 'application/json', 'Content-Type': 'application/json'}
+            params=self._hook_method_args(id=hook_id),
+            headers={'accept': 'application/json', 'Content-Type': 'application/json'},
+            transport=self._transport,
+            operation='hooks:deactivate'
         )
         if not integration_response['success']:
             return False
@@ -347,112 +922,62 @@ class EVContract(object):
             return True
 
     def activate_integration(self, hook_id):
-        msg = 'dummystring'
-        message_hash = defunct_hash_message(text=msg)
-        sig_msg = Account.signHash(message_hash, self._ev_settings['PRIVATEKEY'])
-        method_args = {
-            "msg": msg,
-            "sig": sig_msg.signature.hex(),
-            "key": self._api_write_key,
-            "type": "web",
-            "contract": self._contract_address,
-            "id": hook_id
-        }
         integration_response = make_http_call(
             request_type='post',
             url=self._ev_settings['INTERNAL_API_ENDPOINT'] + '/hooks/activate',
-            params=method_args,
-            headers={'accept': 'application/json', 'Content-Type': 'application/json'}
+            params=self._hook_method_args(id=hook_id),
+            headers={'accept': 'application/json', 'Content-Type': 'application/json'},
+            transport=self._transport,
+            operation='hooks:activate'
         )
         if not integration_response['success']:
             return False
         else:
             return True
 
-          
+
     def add_event_integration(self, events: List, callback_url, integration_channel='web'):
         hook_id = self._register_integration(callback_url)
         if not hook_id:
             return None
-        if not integration_channel == 'web':
-            err_msg = 'Only integrations of type \'web\' are supported by SDK currently'
-            ev_core_logger.error(err_msg)
-            raise EVBaseException(err_msg)
+        self._check_integration_channel(integration_channel)
         if '*' in events:
             events = ['*']
-        msg = 'dummystring'
-        message_hash = defunct_hash_message(text=msg)
-        sig_msg = Account.signHash(message_hash, self._ev_settings['PRIVATEKEY'])
-        method_args = {
-            "msg": msg,
-            "sig": sig_msg.signature.hex(),
-            "key": self._api_write_key,
-            "type": "web",
-            "contract": self._contract_address,
-            "id": hook_id,
-            "events": events
-        }
         integration_response = make_http_call(
             request_type='post',
             url=self._ev_settings['INTERNAL_API_ENDPOINT']+'/hooks/updateEvents',
-            params=method_args,
-            headers={'accept': 'application/json', 'Content-Type': 'application/json'}
+            params=self._hook_method_args(id=hook_id, events=events),
+            headers={'accept': 'application/json', 'Content-Type': 'application/json'},
+            transport=self._transport,
+            operation='hooks:updateEvents'
         )
         return hook_id if integration_response.get('success', False) else None
 
-      
+
     def add_contract_monitoring_integration(self, callback_url, integration_channel='web'):
         hook_id = self._register_integration(callback_url)
         if not hook_id:
             return None
-        if not integration_channel == 'web':
-            err_msg = 'Only integrations of type \'web\' are supported by SDK currently'
-            ev_core_logger.error(err_msg)
-            raise EVBaseException(err_msg)
-        msg = 'dummystring'
-        message_hash = defunct_hash_message(text=msg)
-        sig_msg = Account.signHash(message_hash, self._ev_settings['PRIVATEKEY'])
-        method_args = {
-            "msg": msg,
-            "sig": sig_msg.signature.hex(),
-            "key": self._api_write_key,
-            "type": "web",
-            "contract": self._contract_address,
-            "id": hook_id,
-            "action": "set"
-        }
+        self._check_integration_channel(integration_channel)
         integration_response = make_http_call(
             request_type='post',
             url=self._ev_settings['INTERNAL_API_ENDPOINT'] + '/hooks/transactions',
-            params=method_args,
-            headers={'accept': 'application/json', 'Content-Type': 'application/json'}
+            params=self._hook_method_args(id=hook_id, action='set'),
+            headers={'accept': 'application/json', 'Content-Type': 'application/json'},
+            transport=self._transport,
+            operation='hooks:transactions'
         )
         return hook_id if integration_response.get('success', False) else None
 
-      
+
     def _register_integration(self, url):
-        headers = {'accept': 'application/json', 'Content-Type': 'application/json',
-                   'X-API-KEY': self._api_write_key}
-        msg = 'dummystring'
-        message_hash = defunct_hash_message(text=msg)
-        sig_msg = Account.signHash(message_hash, self._ev_private_key)
-        method_args = {
-            "msg": msg,
-            "sig": sig_msg.signature.hex(),
-            "key": self._ev_private_key,
-            "type": "web",
-            "contract": self._contract_address,
-            "web": url
-        }
-        reg_webhook_args = dict(
-            url=self._ev_settings['INTERNAL_API_ENDPOINT']+'/hooks/add',
-            params=method_args,
-            headers=headers
-        )
+        reg_webhook_args = self._register_integration_args(url)
         ev_core_logger.debug('Registering webhook')
         ev_core_logger.debug(reg_webhook_args)
         r = make_http_call(
             request_type='post',
+            transport=self._transport,
+            operation='hooks:add',
             **reg_webhook_args
         )
         ev_core_logger.debug('Registration response')
@@ -1,23 +1,83 @@
-from .EVContractUtils import ABIHelper, ABIParser, extract_abi
-from .http_helper import make_http_call
-from .exceptions import (
-    EVBaseException,
-    EVAPIError,
-    EVHTTPError,
-    EVConnectionError
-)
-
-from .EVCore import EVContract, EVCore
-
-__all__ = [
-    'EVContract',
-    'EVCore',
-    'ABIParser',
-    'ABIHelper',
-    'EVConnectionError',
-    'EVHTTPError',
-    'EVAPIError',
-    'EVBaseException',
-    'make_http_call',
-    'extract_abi'
-]
+"""
+Exported names are imported on first access (PEP 562), so that `import maticvigil` stays cheap and heavy dependencies
+like eth_account, eth_abi and the Solidity parser are only loaded by the code paths that need them.
+"""
+import importlib
+import sys
+import types
+
+# exported name -> submodule defining it
+_EXPORTS = {
+    'EVContract': 'EVCore',
+    'EVCore': 'EVCore',
+    'BatchResult': 'batch',
+    'WritePipeline': 'write_pipeline',
+    'ReadCache': 'read_cache',
+    'SpecCache': 'spec_cache',
+    'CompileCache': 'compile_cache',
+    'SourceResolver': 'sources',
+    'PendingTransaction': 'confirmations',
+    'PendingDeployment': 'confirmations',
+    'ImportMemo': 'sources',
+    'ContractCodegen': 'codegen',
+    'ContractRegistry': 'registry',
+    'AuthPayloadCache': 'auth',
+    'get_default_auth_cache': 'auth',
+    'SingleFlight': 'singleflight',
+    'add_sink': 'instrumentation',
+    'remove_sink': 'instrumentation',
+    'CallMetrics': 'instrumentation',
+    'MetricsRecorder': 'instrumentation',
+    'ABIParser': 'EVContractUtils',
+    'ABIIndex': 'abi_index',
+    'ABIHelper': 'EVContractUtils',
+    'extract_abi': 'EVContractUtils',
+    'EVConnectionError': 'exceptions',
+    'EVCircuitOpenError': 'exceptions',
+    'EVValidationError': 'exceptions',
+    'EVConfirmationTimeout': 'exceptions',
+    'EVHTTPError': 'exceptions',
+    'EVAPIError': 'exceptions',
+    'EVBaseException': 'exceptions',
+    'ResiliencePolicy': 'resilience',
+    'RetryBudget': 'resilience',
+    'CircuitBreaker': 'resilience',
+    'make_http_call': 'http_helper',
+    'HTTPTransport': 'http_helper',
+    'get_default_transport': 'http_helper',
+    'set_default_transport': 'http_helper'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    # cache on the package so that later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name, value):
+        # importing a submodule binds it on the package. The EVCore submodule shares its name with the EVCore class,
+        # which stays the exported name whichever import loads the submodule first
+        if name == 'EVCore' and isinstance(value, types.ModuleType):
+            value = value.EVCore
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+
+if sys.version_info < (3, 7):
+    # module level __getattr__ is not supported, import everything up front
+    for _name in _EXPORTS:
+        globals()[_name] = __getattr__(_name)
@@ -0,0 +1,241 @@
+"""
+Compact index of a contract ABI. Functions, events and the constructor are immutable slotted records, reachable
+through separate mappings by signature hash, by 4 byte selector and by name. Type and parameter names are interned,
+so that a process indexing the ABIs of thousands of contracts stores each of them once.
+"""
+import json
+import sys
+
+INT_TYPES = frozenset(
+    [f'int{(i + 1) * 8}' for i in range(32)] + ['int'] + [f'uint{(i + 1) * 8}' for i in range(32)] + ['uint']
+)
+BYTE_TYPES = frozenset([f'bytes{i}' for i in range(1, 33)] + ['byte', 'bytes'])
+READ_MUTABILITIES = frozenset(['view', 'pure'])
+
+
+def _keccak_hex(text):
+    # eth_utils is only loaded when an ABI is indexed
+    from eth_utils import encode_hex, keccak
+    return encode_hex(keccak(text=text))
+
+
+def type_category(sol_type):
+    """
+    :return: type category used in the Swagger API specs of MaticVigil, not Solidity specific at all
+    """
+    if sol_type in INT_TYPES:
+        return 'integer'
+    if sol_type in BYTE_TYPES or sol_type == 'address' or sol_type == 'string':
+        return 'string'
+    if sol_type == 'bool':
+        return 'boolean'
+    if sol_type[-2:] == '[]':
+        return 'array'
+    return ' '
+
+
+def expand_components(components_list, is_tuple_array):
+    """
+    :return: tuple type expanded to its elementary types, for eg. '(uint256,string,address)[]', as accepted by eth_abi
+    """
+    expanded = list()
+    for component in components_list:
+        if 'tuple' not in component['type']:
+            expanded.append(component['type'])
+        else:
+            expanded.append(expand_components(component['components'], component['type'][-2:] == '[]'))
+    return '(' + ','.join(expanded) + ')' + ('[]' if is_tuple_array else '')
+
+
+class ABIParam(object):
+    __slots__ = ('name', 'type', 'indexed', 'is_tuple')
+
+    def __init__(self, entry, expand_tuples=True):
+        """
+        :param entry : input or output entry of the ABI
+        :param expand_tuples : store tuple types expanded to their elementary types, for eg. '(uint256,string)'
+        """
+        self.is_tuple = 'tuple' in entry['type']
+        if self.is_tuple and expand_tuples:
+            sol_type = expand_components(entry['components'], entry['type'][-2:] == '[]')
+        else:
+            sol_type = entry['type']
+        self.name = sys.intern(entry.get('name') or '')
+        self.type = sys.intern(sol_type)
+        self.indexed = entry.get('indexed', False)
+
+    def __setattr__(self, key, value):
+        if hasattr(self, 'indexed'):
+            raise AttributeError(f'{type(self).__name__} is immutable')
+        object.__setattr__(self, key, value)
+
+    def __repr__(self):
+        return f'<ABIParam {self.type} {self.name}>'
+
+
+class _ABIRecord(object):
+    __slots__ = ()
+
+    def __setattr__(self, key, value):
+        if hasattr(self, 'inputs'):
+            raise AttributeError(f'{type(self).__name__} is immutable')
+        object.__setattr__(self, key, value)
+
+    @property
+    def input_params(self):
+        return tuple(p.name for p in self.inputs)
+
+
+class ABIFunction(_ABIRecord):
+    __slots__ = ('name', 'canonical', 'hash', 'selector', 'state_mutability', 'outputs', 'output_types',
+                 'input_types', 'inputs')
+
+    def __init__(self, entry):
+        inputs = tuple(ABIParam(i) for i in entry.get('inputs', []))
+        self.name = sys.intern(entry['name'])
+        self.canonical = f'{self.name}({",".join(p.type for p in inputs)})'
+        self.hash = _keccak_hex(self.canonical)
+        # the first 4 bytes of the signature hash, as defined by the Solidity function encoding
+        self.selector = self.hash[2:10]
+        self.state_mutability = sys.intern(
+            entry.get('stateMutability') or ('view' if entry.get('constant') else 'nonpayable')
+        )
+        self.outputs = tuple(ABIParam(o) for o in entry.get('outputs', []))
+        # types are looked up on every call, keep them instead of rebuilding them from the params
+        self.output_types = tuple(p.type for p in self.outputs)
+        self.input_types = tuple(p.type for p in inputs)
+        self.inputs = inputs
+
+    @property
+    def is_read(self):
+        return self.state_mutability in READ_MUTABILITIES
+
+    @property
+    def output_params(self):
+        return tuple(p.name for p in self.outputs)
+
+    def __repr__(self):
+        return f'<ABIFunction {self.canonical}>'
+
+
+class ABIEvent(_ABIRecord):
+    __slots__ = ('name', 'canonical', 'hash', 'selector', 'input_types', 'inputs')
+
+    def __init__(self, entry):
+        inputs = tuple(ABIParam(i) for i in entry.get('inputs', []))
+        self.name = sys.intern(entry['name'])
+        self.canonical = f'{self.name}({",".join(p.type for p in inputs)})'
+        self.hash = _keccak_hex(self.canonical)
+        self.selector = self.hash[2:10]
+        self.input_types = tuple(p.type for p in inputs)
+        self.inputs = inputs
+
+    @property
+    def indexed_params(self):
+        return tuple(p.name for p in self.inputs if p.indexed)
+
+    @property
+    def indexed_types(self):
+        return tuple(p.type for p in self.inputs if p.indexed)
+
+    @property
+    def unindexed_params(self):
+        return tuple(p.name for p in self.inputs if not p.indexed)
+
+    @property
+    def unindexed_types(self):
+        return tuple(p.type for p in self.inputs if not p.indexed)
+
+    def __repr__(self):
+        return f'<ABIEvent {self.canonical}>'
+
+
+class ABIConstructor(_ABIRecord):
+    __slots__ = ('input_types', 'inputs')
+
+    def __init__(self, entry):
+        # constructor arguments are sent as is, tuple types are not expanded
+        inputs = tuple(ABIParam(i, expand_tuples=False) for i in entry.get('inputs', []))
+        self.input_types = tuple(p.type for p in inputs)
+        self.inputs = inputs
+
+    def ordered_args(self, arg_map):
+        """
+        :param arg_map : unordered constructor arguments. For eg. {'constr_arg2': 'val2', 'constr_arg1': 'val1'}
+        :return: ordered list of constructor arguments to be accepted by EV APIs
+        """
+        args = list()
+        for param in self.inputs:
+            if type_category(param.type) == 'array':
+                # array types are passed as JSON serialized strings to EV APIs
+                args.append(json.dumps(arg_map[param.name]))
+            else:
+                args.append(arg_map[param.name])
+        return args
+
+    def __repr__(self):
+        return f'<ABIConstructor ({",".join(self.input_types)})>'
+
+
+class ABIIndex(object):
+    """
+    :param abi_json : contract ABI, a list of function, event and constructor entries
+    """
+    __slots__ = ('functions_by_hash', 'functions_by_selector', 'functions_by_name',
+                 'events_by_hash', 'events_by_name', 'constructor')
+
+    def __init__(self, abi_json):
+        self.functions_by_hash = dict()
+        self.functions_by_selector = dict()
+        self.functions_by_name = dict()  # overloaded functions are indexed by name under their last definition
+        self.events_by_hash = dict()
+        self.events_by_name = dict()
+        self.constructor = None
+        for entry in abi_json:
+            entry_type = entry.get('type', 'function')
+            if entry_type == 'function':
+                fn = ABIFunction(entry)
+                self.functions_by_hash[fn.hash] = fn
+                self.functions_by_selector[fn.selector] = fn
+                self.functions_by_name[fn.name] = fn
+            elif entry_type == 'event':
+                event = ABIEvent(entry)
+                self.events_by_hash[event.hash] = event
+                self.events_by_name[event.name] = event
+            elif entry_type == 'constructor':
+                self.constructor = ABIConstructor(entry)
+
+    def function(self, name):
+        return self.functions_by_name.get(name)
+
+    def event(self, name):
+        return self.events_by_name.get(name)
+
+    @property
+    def constructor_params(self):
+        return self.constructor.input_params if self.constructor is not None else ()
+
+    def constructor_args(self, arg_map):
+        """
+        :return: ordered list of constructor arguments, empty for a contract without a constructor
+        """
+        return self.constructor.ordered_args(arg_map) if self.constructor is not None else []
+
+    def getters(self):
+        """ view and pure functions, called with a read """
+        return [fn for fn in self.functions_by_hash.values() if fn.state_mutability in READ_MUTABILITIES]
+
+    def writers(self):
+        return [fn for fn in self.functions_by_hash.values() if fn.state_mutability not in READ_MUTABILITIES]
+
+    def check_call(self, method, params):
+        """
+        :param params : arguments of the call, a list or a mapping
+        :return: tuple of (valid, code, message) as returned by the legacy ABIParser.is_valid()
+        """
+        fn = self.functions_by_name.get(method)
+        if fn is None:
+            return False, -1, f'Invalid method: {method}'
+        if len(fn.inputs) != len(params):
+            return False, -2, 'Argument list mismatch'
+        return True, 1, 'Success'
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import time
+import logging
+from .exceptions import *
+from . import instrumentation
+from . import json_codec
+from .resilience import ResiliencePolicy
+from .singleflight import AsyncSingleFlight
+from .http_helper import (
+    check_api_response,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT
+)
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    raise ImportError('The asyncio client requires aiohttp. Install it with: pip install maticvigil-sdk[async]')
+
+ev_logger = logging.getLogger('EVCore')
+
+DEFAULT_MAX_CONCURRENCY = 100
+
+
+class AsyncHTTPTransport(object):
+    """
+    Non-blocking counterpart of HTTPTransport built on a pooled aiohttp.ClientSession.
+    The session is created lazily on first use so that it binds to the running event loop.
+    :param max_concurrency : maximum number of requests in flight at any time through this transport
+    :param limit_per_host : maximum number of connections kept open per host
+    :param connect_timeout : seconds to wait for a connection to be established
+    :param read_timeout : seconds to wait for the server to send a response
+    :param resilience : ResiliencePolicy applying retries, circuit breaking and hedging to the requests sent through this transport
+    :param coalesce_reads : if True, identical GET requests in flight at the same time through this transport
+                            are sent once and all the callers share the decoded response, which must then be treated
+                            as read only. Off by default
+    """
+    def __init__(
+            self,
+            max_concurrency=DEFAULT_MAX_CONCURRENCY,
+            limit_per_host=DEFAULT_POOL_MAXSIZE,
+            connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+            read_timeout=DEFAULT_READ_TIMEOUT,
+            resilience=None,
+            coalesce_reads=False
+    ):
+        self._resilience = resilience if resilience else ResiliencePolicy()
+        self._read_flight = AsyncSingleFlight() if coalesce_reads else None
+        self._max_concurrency = max_concurrency
+        self._limit_per_host = limit_per_host
+        self._timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self._session = None
+        self._semaphore = None
+
+    def _ensure_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._max_concurrency, limit_per_host=self._limit_per_host)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        return self._session
+
+    @property
+    def resilience(self):
+        return self._resilience
+
+    @property
+    def read_flight(self):
+        """
+        AsyncSingleFlight coalescing identical GET requests, None if coalescing is disabled
+        """
+        return self._read_flight
+
+    async def request(self, method, url, json_params=None, headers=None, with_headers=False):
+        """
+        :param with_headers : also return the response headers
+        :return: tuple of (HTTP status code, raw response body), followed by the response headers if with_headers is set
+        """
+        session = self._ensure_session()
+        async with self._semaphore:
+            async with session.request(method, url, json=json_params, headers=headers) as response:
+                body = await response.read()
+                if with_headers:
+                    return response.status, body, response.headers
+                return response.status, body
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+def _status_code(response):
+    return response[0]
+
+
+def _is_connect_error(exc):
+    """
+    :return: True if the connection could not be established, so the request was never sent
+    """
+    return isinstance(exc, (aiohttp.ClientConnectorError, getattr(aiohttp, 'ConnectionTimeoutError', ())))
+
+
+async def _request(transport, method, url, json_params=None, headers=None, call_metrics=None, with_headers=False):
+    return await transport.resilience.async_call(
+        url,
+        lambda: transport.request(method, url, json_params=json_params, headers=headers, with_headers=with_headers),
+        _status_code,
+        idempotent=method == 'GET',
+        call_metrics=call_metrics,
+        connect_error=_is_connect_error
+    )
+
+
+_default_async_transport = None
+
+
+def get_default_async_transport():
+    # the underlying aiohttp session binds to the event loop it is first used on
+    global _default_async_transport
+    if _default_async_transport is None:
+        _default_async_transport = AsyncHTTPTransport()
+    return _default_async_transport
+
+
+async def async_make_http_call(request_type, url, params={}, headers={}, transport=None, operation=None):
+    """
+    :param operation : label reported to instrumentation sinks, for eg. 'contract_read:getPostId' or 'deploy'
+    """
+    if request_type == 'get':
+        transport = transport or get_default_async_transport()
+        if transport.read_flight is not None:
+            return await transport.read_flight.do(
+                url, lambda: _instrumented_http_call(request_type, url, params, headers, transport, operation)
+            )
+    return await _instrumented_http_call(request_type, url, params, headers, transport, operation)
+
+
+async def _instrumented_http_call(request_type, url, params, headers, transport, operation):
+    call_metrics = instrumentation.start_call(operation, request_type, url)
+    if call_metrics is None:
+        return await _async_make_http_call(request_type, url, params, headers, transport, None)
+    begin = time.perf_counter()
+    try:
+        return await _async_make_http_call(request_type, url, params, headers, transport, call_metrics)
+    except Exception as e:
+        call_metrics.error = e.__class__.__name__
+        raise
+    finally:
+        call_metrics.latency = time.perf_counter() - begin
+        instrumentation.emit(call_metrics)
+
+
+async def _async_make_http_call(request_type, url, params, headers, transport, call_metrics):
+    transport = transport or get_default_async_transport()
+    debug_enabled = ev_logger.isEnabledFor(logging.DEBUG)
+    if debug_enabled:
+        ev_logger.debug('HTTPRequest')
+        ev_logger.debug({'requestType': request_type, 'url': url, 'params': params, 'headers': headers})
+    try:
+        if request_type == 'get':
+            status_code, body = await _request(transport, 'GET', url, call_metrics=call_metrics)
+        else:
+            status_code, body = await _request(transport, 'POST', url, json_params=params, headers=headers, call_metrics=call_metrics)
+    except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+        raise EVConnectionError("Error connecting to MaticVigil API %s" % url, e)
+    except EVBaseException:
+        raise
+    except Exception as e:
+        raise EVBaseException(e.__str__())
+    if call_metrics is not None:
+        call_metrics.status_code = status_code
+        call_metrics.response_bytes = len(body)
+        if params and request_type == 'post':
+            call_metrics.request_bytes = len(json.dumps(params))
+    if status_code >= 400:
+        raise EVHTTPError(
+            request_url=url,
+            request_body='' if request_type == 'get' else params,
+            status_code=status_code,
+            response_body=body.decode('utf-8')
+        )
+    if debug_enabled:
+        ev_logger.debug('HTTPResponse')
+        ev_logger.debug({'url': url, 'status': status_code})
+    return check_api_response(request_type, url, params, status_code, lambda: body.decode('utf-8'), json_codec.loads(body))
+
+
+async def async_conditional_get(url, etag=None, transport=None, operation=None):
+    """
+    asyncio counterpart of http_helper.conditional_get()
+    :return: tuple of (decoded response or None if the copy held by the caller is still valid, ETag of the response)
+    """
+    transport = transport or get_default_async_transport()
+    with instrumentation.timed_call(operation, 'get', url) as call_metrics:
+        try:
+            status_code, body, headers = await _request(
+                transport, 'GET', url, headers={'If-None-Match': etag} if etag else None,
+                call_metrics=call_metrics, with_headers=True
+            )
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            raise EVConnectionError("Error connecting to MaticVigil API %s" % url, e)
+        except EVBaseException:
+            raise
+        except Exception as e:
+            raise EVBaseException(e.__str__())
+        if call_metrics is not None:
+            call_metrics.status_code = status_code
+            call_metrics.response_bytes = len(body)
+    if status_code == 304 and etag:
+        return None, etag
+    if not 200 <= status_code < 300:
+        raise EVHTTPError(request_url=url, request_body='', status_code=status_code, response_body=body.decode('utf-8'))
+    decoded = check_api_response('get', url, {}, status_code, lambda: body.decode('utf-8'), json_codec.loads(body))
+    return decoded, headers.get('ETag')
@@ -0,0 +1,88 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# number of private keys whose signed payloads are kept, least recently used keys are dropped first.
+# Sized for processes serving many accounts, a key only holds a handful of signatures
+DEFAULT_MAX_KEYS = 1024
+
+
+def _key_id(private_key):
+    # private keys are not kept as dictionary keys
+    if isinstance(private_key, bytes):
+        private_key = private_key.hex()
+    return hashlib.sha256(str(private_key).lower().replace('0x', '', 1).encode('utf-8')).hexdigest()
+
+
+class AuthPayloadCache(object):
+    """
+    The MaticVigil API authenticates account level calls (/login, /deploy, /compile, /hooks/*, ...) with a constant
+    message signed by the account's private key. Signing is a costly ECDSA operation and its result never changes
+    for a given (private key, message) pair, so each pair is signed once and the {msg, sig} payload is reused.
+    :param max_keys : number of private keys whose payloads are cached
+    """
+    def __init__(self, max_keys=DEFAULT_MAX_KEYS):
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+        # key id -> {message: signature}
+        self._signatures = OrderedDict()
+        self._stats = {'hits': 0, 'signed': 0}
+
+    def payload(self, private_key, msg):
+        """
+        :return: a new dict {'msg': msg, 'sig': signature}, which the caller is free to extend
+        """
+        key_id = _key_id(private_key)
+        with self._lock:
+            signatures = self._signatures.get(key_id)
+            if signatures is not None:
+                self._signatures.move_to_end(key_id)
+                sig = signatures.get(msg)
+                if sig is not None:
+                    self._stats['hits'] += 1
+                    return {'msg': msg, 'sig': sig}
+        # eth_account is slow to import, it is only loaded once a payload has to be signed
+        from eth_account.messages import defunct_hash_message
+        from eth_account.account import Account
+        # signing happens outside the lock. Concurrent misses for the same pair produce the same deterministic signature
+        sig = Account.signHash(defunct_hash_message(text=msg), private_key).signature.hex()
+        with self._lock:
+            self._stats['signed'] += 1
+            signatures = self._signatures.setdefault(key_id, dict())
+            signatures[msg] = sig
+            self._signatures.move_to_end(key_id)
+            while len(self._signatures) > self._max_keys:
+                self._signatures.popitem(last=False)
+        return {'msg': msg, 'sig': sig}
+
+    def invalidate(self, private_key):
+        """
+        Drops the payloads signed with a private key, for eg. once it has been rotated
+        """
+        with self._lock:
+            self._signatures.pop(_key_id(private_key), None)
+
+    def clear(self):
+        with self._lock:
+            self._signatures.clear()
+
+    @property
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s['keys'] = len(self._signatures)
+        return s
+
+
+_default_auth_cache = AuthPayloadCache()
+
+
+def get_default_auth_cache():
+    return _default_auth_cache
+
+
+def signed_payload(private_key, msg):
+    """
+    :return: {'msg': msg, 'sig': signature} from the module wide AuthPayloadCache
+    """
+    return _default_auth_cache.payload(private_key, msg)
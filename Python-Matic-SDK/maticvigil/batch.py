@@ -0,0 +1,106 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .exceptions import EVBaseException
+
+DEFAULT_BATCH_WORKERS = 16
+
+
+class BatchResult(object):
+    """
+    Outcome of a batch of API calls. Results are kept in the same order as the calls were supplied,
+    a call that failed holds the exception it raised in place of its result.
+    """
+    def __init__(self, results, elapsed):
+        self._results = results
+        self._elapsed = elapsed
+
+    @property
+    def results(self):
+        return self._results
+
+    @property
+    def elapsed(self):
+        """ wall clock seconds taken by the whole batch """
+        return self._elapsed
+
+    @property
+    def errors(self):
+        return [(idx, r) for idx, r in enumerate(self._results) if isinstance(r, Exception)]
+
+    @property
+    def ok(self):
+        return not any(isinstance(r, Exception) for r in self._results)
+
+    def __len__(self):
+        return len(self._results)
+
+    def __iter__(self):
+        return iter(self._results)
+
+    def __getitem__(self, idx):
+        return self._results[idx]
+
+    def __repr__(self):
+        return f'<BatchResult calls={len(self._results)} errors={len(self.errors)} elapsed={self._elapsed:.3f}s>'
+
+
+def _capture(fn, args):
+    try:
+        return fn(*args)
+    except Exception as e:
+        return e
+
+
+def run_batch(calls, max_workers=DEFAULT_BATCH_WORKERS, executor=None):
+    """
+    Runs every call concurrently on a bounded thread pool
+    :param calls : list of (callable, args tuple)
+    :param max_workers : size of the worker pool created for this batch, ignored if an executor is passed
+    :param executor : optionally, an existing concurrent.futures.Executor to submit the calls to
+    :return: BatchResult
+    """
+    begin = time.perf_counter()
+    if executor is not None:
+        futures = [executor.submit(_capture, fn, args) for fn, args in calls]
+        results = [f.result() for f in futures]
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(calls)))) as pool:
+            results = list(pool.map(lambda c: _capture(*c), calls))
+    return BatchResult(results, time.perf_counter() - begin)
+
+
+def normalize_read_call(call):
+    """
+    Accepts a function name, or a (function name, args) tuple where args is a single value or a list
+    :return: tuple of (function name, args tuple)
+    """
+    if isinstance(call, str):
+        return call, ()
+    fn_name, args = call
+    if isinstance(args, (list, tuple)):
+        return fn_name, tuple(args)
+    return fn_name, (args,)
+
+
+def _raise(e):
+    raise e
+
+
+def prepare_read_call(contract, call):
+    """
+    :return: tuple of (bound contract read function, args tuple). Calls that cannot be resolved raise when run
+    """
+    try:
+        fn_name, args = normalize_read_call(call)
+        return resolve_read_function(contract, fn_name), args
+    except Exception as e:
+        return _raise, (e,)
+
+
+def resolve_read_function(contract, fn_name):
+    fn_spec = contract._fn_specs.get(fn_name)
+    if fn_spec is None:
+        raise EVBaseException(f'Contract {contract.contract_address} has no function {fn_name}')
+    if fn_spec['request_type'] != 'get':
+        raise EVBaseException(f'{fn_name} on contract {contract.contract_address} is not a read function')
+    return getattr(contract, fn_name)
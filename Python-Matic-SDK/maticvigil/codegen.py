@@ -0,0 +1,236 @@
+"""
+Ahead of time generation of contract client modules.
+Instead of attaching closures built from the OpenAPI spec to every contract handle at runtime, the spec is turned once
+into a Python module holding an EVContract subclass, with one method per contract function carrying a real signature,
+its prebuilt URL and its parameter order. Later runs only import the module.
+"""
+import hashlib
+import importlib.util
+import json
+import keyword
+import os
+import pprint
+import re
+import sys
+import threading
+import logging
+from .fs_utils import atomic_write_bytes, checked_contract_address
+
+ev_logger = logging.getLogger('EVCore')
+
+# bump whenever the generated source changes, so that modules written by older versions get regenerated
+CODEGEN_VERSION = 3
+
+SCHEMA_TO_ANNOTATION = {
+    'integer': 'int',
+    'number': 'float',
+    'boolean': 'bool',
+    'string': 'str',
+    'array': 'list',
+    'object': 'dict'
+}
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def spec_digest(openapi_spec):
+    return hashlib.sha1(json.dumps(openapi_spec, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def python_identifier(name, taken, fallback):
+    """
+    :return: name if it can be used as a Python parameter name, otherwise a safe variant not in taken
+    """
+    if not _IDENTIFIER.match(name or ''):
+        name = fallback
+    elif keyword.iskeyword(name) or name == 'self':
+        name += '_'
+    while name in taken:
+        name += '_'
+    taken.add(name)
+    return name
+
+
+def class_name_for(app_name):
+    words = re.split(r'[^A-Za-z0-9]+', app_name or '')
+    name = ''.join(w[:1].upper() + w[1:] for w in words if w)
+    if not name or name[0].isdigit():
+        name = 'Generated' + name
+    return name + 'Contract'
+
+
+def collect_functions(openapi_spec, fn_specs):
+    """
+    :param fn_specs : output of EVCore.parse_openapi_spec() for this spec
+    :return: list of (function name, request type, method URL, [(API param name, schema type)])
+    """
+    functions = list()
+    for endpoint, methods in openapi_spec['paths'].items():
+        fn_name = endpoint[1:].split('/', 1)[0]
+        fn_spec = fn_specs[fn_name]
+        request_type = fn_spec['request_type']
+        if request_type == 'get':
+            types = {p['name']: p.get('schema', dict()).get('type', 'string') for p in methods['get'].get('parameters', [])}
+        else:
+            properties = methods['post']['requestBody']['content']['application/x-www-form-urlencoded']['schema']['properties']
+            types = {p: d.get('type', 'string') for p, d in properties.items()}
+        functions.append((fn_name, request_type, fn_spec['method_url'], [(p, types.get(p, 'string')) for p in fn_spec['params']]))
+    return functions
+
+
+def _method_source(fn_name, request_type, method_url, params):
+    taken = set()
+    # read arguments become URL path segments, so they are typed as the strings sent
+    py_params = [
+        (python_identifier(p, taken, f'arg{idx}'), p, 'str' if request_type == 'get' else SCHEMA_TO_ANNOTATION.get(t, 'str'))
+        for idx, (p, t) in enumerate(params)
+    ]
+    doc_args = ', '.join(f'{p or "arg" + str(idx)}: {t}' for idx, (p, t) in enumerate(params))
+    # names and types come from the spec, docstrings are emitted as escaped literals
+    lines = list()
+    if request_type == 'get':
+        signature = ', '.join(['self'] + [f'{py}: {ann}' for py, _, ann in py_params])
+        args = ''.join(f'{py}, ' for py, _, _ in py_params)
+        lines.append(f'    def {fn_name}({signature}):')
+        lines.append(f'        {f"read call {fn_name}({doc_args})"!r}')
+        lines.append(f'        return self._read({fn_name!r}, {method_url!r}, ({args}))')
+    elif all(py == api for py, api, _ in py_params):
+        signature = ', '.join(['self'] + [f'{py}: {ann}' for py, _, ann in py_params])
+        kwargs = ', '.join(f'{api!r}: {py}' for py, api, _ in py_params)
+        lines.append(f'    def {fn_name}({signature}):')
+        lines.append(f'        {f"write call {fn_name}({doc_args}), returns the transaction details"!r}')
+        lines.append(f'        return self._write({fn_name!r}, {method_url!r}, {{{kwargs}}})')
+    else:
+        # parameter names that are not valid Python identifiers can only be passed as keyword arguments from a mapping
+        lines.append(f'    def {fn_name}(self, **params_kwargs):')
+        lines.append(f'        {f"write call {fn_name}({doc_args}), returns the transaction details"!r}')
+        lines.append(f'        return self._write({fn_name!r}, {method_url!r}, params_kwargs)')
+    return '\n'.join(lines)
+
+
+def generate_module_source(openapi_spec, fn_specs, contract_address, api_prefix, app_name):
+    """
+    :return: source code of a module defining an EVContract subclass for the contract
+    :raises EVBaseException: if contract_address is not a valid address
+    """
+    # deferred, EVCore imports this module
+    from .EVCore import EVContract
+    checked_contract_address(contract_address)
+    class_name = class_name_for(app_name)
+    functions = [
+        f for f in collect_functions(openapi_spec, fn_specs)
+        if _IDENTIFIER.match(f[0]) and not keyword.iskeyword(f[0]) and not (f[0].startswith('_') and hasattr(EVContract, f[0]))
+    ]
+    skipped = set(fn_specs) - set(f[0] for f in functions)
+    if skipped:
+        ev_logger.debug('Not generating methods for functions whose names cannot be Python method names: %s', skipped)
+    body = '\n\n'.join(_method_source(*f) for f in functions) or '    pass'
+    module_doc = f'MaticVigil client for contract {app_name} at {contract_address}. Generated by maticvigil.codegen, do not edit.'
+    # every value taken from the caller or the spec is emitted through repr(), never pasted into the source as is
+    return f'''{module_doc!r}
+from maticvigil.EVCore import EVContract
+
+CODEGEN_VERSION = {CODEGEN_VERSION}
+SPEC_DIGEST = {spec_digest(openapi_spec)!r}
+CONTRACT_ADDRESS = {contract_address!r}
+API_PREFIX = {api_prefix!r}
+APP_NAME = {app_name!r}
+FN_SPECS = {pprint.pformat(fn_specs, width=120)}
+
+
+class {class_name}(EVContract):
+    def __init__(self, api_read_key, api_write_key, ev_settings, transport=None, read_cache=None):
+        super({class_name}, self).__init__(CONTRACT_ADDRESS, api_read_key, api_write_key, ev_settings, transport=transport, read_cache=read_cache)
+        self._fn_specs = FN_SPECS
+        self._initialized = True
+
+{body}
+
+
+CONTRACT_CLASS = {class_name}
+'''
+
+
+class ContractCodegen(object):
+    """
+    Writes generated contract modules to a directory, for eg. ~/.maticvigil/contracts, and imports them.
+    Modules are keyed by API prefix and contract address, and are only regenerated when the spec they were built from changes.
+    :param output_dir : directory receiving the generated modules
+    """
+    def __init__(self, output_dir):
+        self._output_dir = output_dir
+        self._lock = threading.Lock()
+        self._modules = dict()
+
+    @property
+    def output_dir(self):
+        return self._output_dir
+
+    def module_path(self, api_prefix, contract_address):
+        prefix_dir = 'prefix_' + hashlib.sha1(api_prefix.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self._output_dir, prefix_dir, f'contract_{checked_contract_address(contract_address)}.py')
+
+    def write(self, openapi_spec, fn_specs, contract_address, api_prefix, app_name):
+        """
+        Generates the module of a contract and writes it atomically
+        :return: path of the module
+        """
+        path = self.module_path(api_prefix, contract_address)
+        source = generate_module_source(openapi_spec, fn_specs, contract_address, api_prefix, app_name)
+        atomic_write_bytes(path, source.encode('utf-8'))
+        try:
+            # a bytecode file of the previous version could look current if it was written within the same second
+            os.unlink(importlib.util.cache_from_source(path))
+        except OSError:
+            pass
+        with self._lock:
+            self._modules.pop(path, None)
+        return path
+
+    def _import(self, path):
+        module_name = 'maticvigil_' + os.path.basename(os.path.dirname(path)) + '_' + os.path.basename(path)[:-3]
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[module_name] = module
+        return module
+
+    def load(self, api_prefix, contract_address):
+        """
+        :return: the generated module of the contract, or None if there is none or it was generated by another SDK version
+        """
+        path = self.module_path(api_prefix, contract_address)
+        with self._lock:
+            module = self._modules.get(path)
+            if module is not None:
+                return module
+            if not os.path.exists(path):
+                return None
+            try:
+                module = self._import(path)
+            except Exception as e:
+                ev_logger.debug('Could not import generated contract module %s: %s', path, e)
+                return None
+            if getattr(module, 'CODEGEN_VERSION', None) != CODEGEN_VERSION:
+                return None
+            self._modules[path] = module
+            return module
+
+    def load_or_generate(self, api_prefix, contract_address, app_name, load_spec, refresh=False):
+        """
+        :param load_spec : callable returning the OpenAPI spec of the contract, only called when the module has to be generated
+        :param refresh : call load_spec and regenerate the module if the spec changed
+        :return: the generated module of the contract
+        """
+        from .EVCore import parse_openapi_spec
+        module = None if refresh else self.load(api_prefix, contract_address)
+        if module is not None:
+            return module
+        openapi_spec = load_spec()
+        if refresh:
+            module = self.load(api_prefix, contract_address)
+            if module is not None and module.SPEC_DIGEST == spec_digest(openapi_spec):
+                return module
+        fn_specs = parse_openapi_spec(openapi_spec, api_prefix, contract_address)
+        self.write(openapi_spec, fn_specs, contract_address, api_prefix, app_name)
+        return self.load(api_prefix, contract_address)
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import logging
+from . import json_codec
+from .fs_utils import atomic_write_json
+
+ev_logger = logging.getLogger('EVCore')
+
+# approximate size the cached ABIs may take on disk before the least recently used ones are evicted
+DEFAULT_COMPILE_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class CompileCache(object):
+    """
+    On-disk cache of the ABIs returned by /compile, so that deploying sources that were compiled before skips the round trip.
+    Entries are content addressed: keyed on a hash of the sources bundle, the main source file and the API endpoint
+    compiling them. Using an entry bumps its modification time, and once the cache grows over max_bytes the least
+    recently used entries are evicted.
+    :param cache_dir : directory holding the cached ABIs, for eg. ~/.maticvigil/compiled
+    :param max_bytes : approximate bound on the size of the cache, None for no bound
+    """
+    def __init__(self, cache_dir, max_bytes=DEFAULT_COMPILE_CACHE_BYTES):
+        self._cache_dir = cache_dir
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @property
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, stat, n=1):
+        with self._lock:
+            self._stats[stat] += n
+
+    @staticmethod
+    def key_for(api_endpoint, parsed_sources):
+        """
+        :param parsed_sources : dict with the 'sources' mapping and 'sourceFile', as sent to /compile
+        """
+        bundle = {
+            'endpoint': api_endpoint,
+            'sources': parsed_sources['sources'],
+            'sourceFile': parsed_sources['sourceFile']
+        }
+        return hashlib.sha256(json.dumps(bundle, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self._cache_dir, key[:2], key + '.json')
+
+    def get(self, key):
+        """
+        :return: the cached ABI, or None
+        """
+        path = self.path_for(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = json_codec.loads(f.read())
+            # marks the entry as recently used
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry.get('abi')
+
+    def put(self, key, abi, source_file=None):
+        entry = {'abi': abi, 'sourceFile': source_file, 'compiled_at': time.time()}
+        try:
+            atomic_write_json(self.path_for(key), entry)
+        except OSError as e:
+            # the cache is only an optimization
+            ev_logger.debug('Could not cache compiled ABI of %s: %s', source_file, e)
+            return
+        if self._max_bytes is not None:
+            self.evict(self._max_bytes)
+
+    def evict(self, max_bytes):
+        """
+        Removes the least recently used entries until the cache takes at most max_bytes
+        :return: number of entries removed
+        """
+        entries = list()
+        total = 0
+        for root, _, files in os.walk(self._cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            self._count('evictions', removed)
+        return removed
+
+    def clear(self):
+        shutil.rmtree(self._cache_dir, ignore_errors=True)
+
+    def load(self, api_endpoint, parsed_sources, compile_sources):
+        """
+        :param compile_sources : callable sending the sources to /compile and returning the ABI, only called on a miss
+        """
+        key = self.key_for(api_endpoint, parsed_sources)
+        abi = self.get(key)
+        if abi is not None:
+            self._count('hits')
+            return abi
+        self._count('misses')
+        abi = compile_sources()
+        self.put(key, abi, parsed_sources['sourceFile'])
+        return abi
+
+    async def async_load(self, api_endpoint, parsed_sources, compile_sources):
+        """
+        asyncio counterpart of load(). compile_sources is a coroutine function
+        """
+        key = self.key_for(api_endpoint, parsed_sources)
+        abi = self.get(key)
+        if abi is not None:
+            self._count('hits')
+            return abi
+        self._count('misses')
+        abi = await compile_sources()
+        self.put(key, abi, parsed_sources['sourceFile'])
+        return abi
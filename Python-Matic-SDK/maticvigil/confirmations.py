@@ -0,0 +1,480 @@
+"""
+Confirmation of transactions sent by the SDK. MaticVigil reports deployments ('otm'), mined transactions ('contractmon')
+and the events they emit ('event') over its websocket. A ConfirmationListener subscribes to it once per account
+and resolves the Confirmation of each transaction as soon as its payload arrives.
+"""
+import json
+import threading
+import logging
+import time
+import weakref
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+from . import json_codec
+from .exceptions import EVBaseException, EVConfirmationTimeout
+
+ev_logger = logging.getLogger('EVCore')
+
+# seconds a connection attempt to the websocket may take
+DEFAULT_READY_TIMEOUT = 5.0
+# seconds between heartbeats sent to keep the subscription alive
+DEFAULT_HEARTBEAT_INTERVAL = 10.0
+# payloads of transactions that are not tracked yet, kept in case they are tracked right after
+DEFAULT_MAX_RECENT = 1024
+# seconds a tracked transaction waits to be reported before its confirmation expires
+DEFAULT_PENDING_TTL = 600.0
+# tracked transactions not reported yet, the oldest ones expire first beyond that
+DEFAULT_MAX_PENDING = 10000
+# upper bound on the delay between reconnection attempts
+MAX_RECONNECT_DELAY = 30.0
+
+CONFIRMATION_TYPES = ('otm', 'contractmon', 'event')
+
+
+def ws_endpoint(ev_settings):
+    """
+    :return: websocket URL of the MaticVigil endpoint, WS_ENDPOINT from the settings if present,
+             otherwise derived from INTERNAL_API_ENDPOINT, for eg. https://mainnet.maticvigil.com/api -> wss://mainnet.maticvigil.com/ws
+    """
+    if ev_settings.get('WS_ENDPOINT'):
+        return ev_settings['WS_ENDPOINT']
+    parts = urlsplit(ev_settings['INTERNAL_API_ENDPOINT'])
+    return urlunsplit(('wss' if parts.scheme == 'https' else 'ws', parts.netloc, '/ws', '', ''))
+
+
+class Confirmation(object):
+    """
+    Pending confirmation of a transaction. Resolves with the first payload reported for its transaction hash,
+    event payloads keep being collected afterwards. Expires if the listener stops tracking it before that,
+    waiting on it then raises EVConfirmationTimeout
+    """
+    def __init__(self, tx_hash):
+        self.tx_hash = tx_hash
+        self._lock = threading.Lock()
+        self._events_arrived = threading.Condition(self._lock)
+        self._done = threading.Event()
+        # set once resolved or expired
+        self._finished = threading.Event()
+        self._expired_after = None
+        self._payload = None
+        self._events = list()
+        self._callbacks = list()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def expired(self):
+        return self._expired_after is not None
+
+    @property
+    def payload(self):
+        """ the payload that resolved the confirmation, None while pending """
+        return self._payload
+
+    @property
+    def events(self):
+        """ 'event' payloads received for the transaction so far """
+        with self._lock:
+            return list(self._events)
+
+    def _deliver(self, payload):
+        with self._lock:
+            if payload.get('type') == 'event':
+                self._events.append(payload)
+                self._events_arrived.notify_all()
+            if self._finished.is_set():
+                return
+            self._payload = payload
+            self._done.set()
+            self._finished.set()
+            callbacks, self._callbacks = self._callbacks, list()
+        for callback in callbacks:
+            callback(payload)
+
+    def _expire(self, ttl):
+        with self._lock:
+            if self._finished.is_set():
+                return
+            self._expired_after = ttl
+            self._finished.set()
+            self._events_arrived.notify_all()
+            callbacks, self._callbacks = self._callbacks, list()
+        for callback in callbacks:
+            callback(None)
+
+    def _timeout_error(self, timeout):
+        return EVConfirmationTimeout(self.tx_hash, self._expired_after if self.expired else timeout)
+
+    def add_done_callback(self, callback):
+        """
+        :param callback : called with the resolving payload, None if the confirmation expired. Right away if already
+                          resolved or expired, otherwise it may run on the listener thread
+        """
+        with self._lock:
+            if not self._finished.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self._payload)
+
+    def wait(self, timeout=None):
+        """
+        :return: the resolving payload
+        :raises EVConfirmationTimeout: if nothing was reported within timeout seconds, or the confirmation expired
+        """
+        if not self._finished.wait(timeout) or not self._done.is_set():
+            raise self._timeout_error(timeout)
+        return self._payload
+
+    def wait_event(self, event_name=None, timeout=None):
+        """
+        :param event_name : name of the contract event, None for any event
+        :return: the first 'event' payload of the transaction with that name
+        :raises EVConfirmationTimeout: if no such event was reported within timeout seconds
+        """
+        def find():
+            return next((e for e in self._events if event_name is None or e.get('event_name') == event_name), None)
+
+        with self._events_arrived:
+            self._events_arrived.wait_for(lambda: self.expired or find() is not None, timeout)
+            event = find()
+        if event is None:
+            raise self._timeout_error(timeout)
+        return event
+
+    async def async_wait(self, timeout=None):
+        """
+        asyncio counterpart of wait()
+        """
+        import asyncio
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def resolve(payload):
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(payload))
+
+        self.add_done_callback(resolve)
+        try:
+            payload = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise self._timeout_error(timeout)
+        if payload is None:
+            raise self._timeout_error(timeout)
+        return payload
+
+
+class ConfirmationListener(object):
+    """
+    Subscribes to the MaticVigil websocket with the read API key of an account, on a daemon thread with its own event loop,
+    and reconnects with a backoff when the connection drops. Payloads of transactions that are not tracked yet are kept
+    for a while, so that tracking a transaction right after its hash was returned does not miss a fast confirmation.
+    Tracked transactions are only weakly referenced, dropping every handle on a transaction stops tracking it.
+    :param ws_url : websocket URL, see ws_endpoint()
+    :param read_key : read API key of the account
+    :param pending_ttl : seconds after which a transaction that was not reported is no longer tracked, its confirmation expires
+    :param max_pending : maximum number of tracked transactions that were not reported, the oldest ones expire first
+    """
+    def __init__(self, ws_url, read_key, heartbeat_interval=DEFAULT_HEARTBEAT_INTERVAL, max_recent=DEFAULT_MAX_RECENT,
+                 pending_ttl=DEFAULT_PENDING_TTL, max_pending=DEFAULT_MAX_PENDING):
+        self._ws_url = ws_url
+        self._read_key = read_key
+        self._heartbeat_interval = heartbeat_interval
+        self._max_recent = max_recent
+        self._pending_ttl = pending_ttl
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        # lowercase tx hash -> (expiry time, weak reference to the unresolved Confirmation), in order of expiry
+        self._pending = OrderedDict()
+        self._settled = OrderedDict()  # lowercase tx hash -> recently resolved Confirmation
+        self._recent = OrderedDict()  # lowercase tx hash -> payloads received before the hash was tracked
+        self._ready = threading.Event()
+        self._first_attempt = threading.Event()
+        self._thread = None
+        self._loop = None
+        self._ws = None
+        self._closed = False
+
+    @property
+    def ready(self):
+        """ True while subscribed """
+        return self._ready.is_set()
+
+    @property
+    def attempted(self):
+        """ True once the first connection attempt finished, successful or not """
+        return self._first_attempt.is_set()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(target=self._run, name='EVConfirmations', daemon=True)
+        self._thread.start()
+
+    def wait_ready(self, timeout=DEFAULT_READY_TIMEOUT):
+        """
+        Starts the listener and waits for its first connection attempt to finish
+        :return: True if subscribed
+        """
+        self.start()
+        if not self._first_attempt.wait(timeout):
+            ev_logger.warning('MaticVigil websocket %s not subscribed after %ss, confirmations may be missed', self._ws_url, timeout)
+        return self.ready
+
+    def track(self, tx_hash):
+        """
+        :return: Confirmation of the transaction, resolved with payloads that already arrived for it if any
+        """
+        key = tx_hash.lower()
+        now = time.monotonic()
+        with self._lock:
+            expired = self._prune(now)
+            confirmation = self._tracked(key)
+            early = self._recent.pop(key, None)
+            if confirmation is None:
+                confirmation = Confirmation(tx_hash)
+                if early:
+                    self._settle(key, confirmation)
+                else:
+                    self._pending[key] = (now + self._pending_ttl, weakref.ref(confirmation))
+                    while len(self._pending) > self._max_pending:
+                        expired.append(self._pending.popitem(last=False)[1][1]())
+        for payload in early or []:
+            confirmation._deliver(payload)
+        self._expire(expired)
+        return confirmation
+
+    def untrack(self, tx_hash):
+        with self._lock:
+            self._pending.pop(tx_hash.lower(), None)
+            self._settled.pop(tx_hash.lower(), None)
+
+    @property
+    def pending(self):
+        """ number of tracked transactions that were not reported yet """
+        with self._lock:
+            expired = self._prune(time.monotonic())
+            count = sum(1 for _, ref in self._pending.values() if ref() is not None)
+        self._expire(expired)
+        return count
+
+    def _tracked(self, key):
+        entry = self._pending.get(key)
+        if entry is not None:
+            confirmation = entry[1]()
+            if confirmation is not None:
+                return confirmation
+            # every handle on it was dropped
+            del self._pending[key]
+        return self._settled.get(key)
+
+    def _prune(self, now):
+        """
+        Stops tracking transactions that were not reported within the TTL, and the ones no handle refers to anymore.
+        Expects the lock to be held
+        :return: Confirmations to expire once the lock is released
+        """
+        expired = list()
+        while self._pending:
+            key, (expires_at, ref) = next(iter(self._pending.items()))
+            confirmation = ref()
+            if confirmation is not None and expires_at > now:
+                break
+            del self._pending[key]
+            expired.append(confirmation)
+        return expired
+
+    def _expire(self, confirmations):
+        for confirmation in confirmations:
+            if confirmation is not None:
+                confirmation._expire(self._pending_ttl)
+
+    def _dispatch(self, payload):
+        tx_hash = payload.get('txHash')
+        if payload.get('type') not in CONFIRMATION_TYPES or not tx_hash:
+            return
+        key = tx_hash.lower()
+        with self._lock:
+            expired = self._prune(time.monotonic())
+            confirmation = self._tracked(key)
+            if confirmation is None:
+                self._recent.setdefault(key, list()).append(payload)
+                self._recent.move_to_end(key)
+                while len(self._recent) > self._max_recent:
+                    self._recent.popitem(last=False)
+            elif key in self._pending:
+                self._settle(key, confirmation)
+                del self._pending[key]
+        self._expire(expired)
+        if confirmation is not None:
+            confirmation._deliver(payload)
+
+    def _settle(self, key, confirmation):
+        # resolved confirmations stay reachable for a while, events may still follow
+        self._settled[key] = confirmation
+        while len(self._settled) > self._max_recent:
+            self._settled.popitem(last=False)
+
+    def close(self):
+        """
+        Closes the websocket and stops the listener thread. get_listener() hands out a new listener afterwards
+        """
+        with self._lock:
+            self._closed = True
+            loop, ws = self._loop, self._ws
+        if loop is not None and ws is not None:
+            loop.call_soon_threadsafe(ws.close)
+
+    def _run(self):
+        import asyncio
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        try:
+            loop.run_until_complete(self._listen())
+        finally:
+            loop.close()
+
+    async def _listen(self):
+        import asyncio
+        # tornado is already a dependency of the SDK for webhook listeners, only loaded when confirmations are tracked
+        from tornado.websocket import websocket_connect
+        delay = 0.5
+        while not self._closed:
+            heartbeat = None
+            try:
+                ws = await websocket_connect(self._ws_url, connect_timeout=DEFAULT_READY_TIMEOUT)
+                self._ws = ws
+                session_id = await self._register(ws)
+                self._ready.set()
+                self._first_attempt.set()
+                delay = 0.5
+                ev_logger.debug('Subscribed to MaticVigil websocket %s, session %s', self._ws_url, session_id)
+                heartbeat = asyncio.ensure_future(self._heartbeat(ws, session_id))
+                while not self._closed:
+                    msg = await ws.read_message()
+                    if msg is None:
+                        break
+                    try:
+                        payload = json_codec.loads(msg)
+                    except ValueError:
+                        continue
+                    # acks and heartbeats are commands, transaction payloads are not
+                    if isinstance(payload, dict) and 'command' not in payload:
+                        self._dispatch(payload)
+            except Exception as e:
+                ev_logger.debug('MaticVigil websocket %s: %s', self._ws_url, e)
+            finally:
+                self._ready.clear()
+                self._first_attempt.set()
+                self._ws = None
+                if heartbeat is not None:
+                    heartbeat.cancel()
+            if self._closed:
+                break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _register(self, ws):
+        await ws.write_message(json.dumps({'command': 'register', 'key': self._read_key}))
+        while True:
+            msg = await ws.read_message()
+            if msg is None:
+                raise EVBaseException('Websocket closed before registration was acknowledged')
+            ack = json_codec.loads(msg)
+            if ack.get('command') == 'register:ack':
+                return ack.get('sessionID')
+            if ack.get('command') == 'register:nack':
+                raise EVBaseException('Websocket registration was refused')
+
+    async def _heartbeat(self, ws, session_id):
+        import asyncio
+        while True:
+            await asyncio.sleep(self._heartbeat_interval)
+            await ws.write_message(json.dumps({'command': 'heartbeat', 'sessionID': session_id}))
+
+
+_listeners = dict()
+_listeners_lock = threading.Lock()
+
+
+def get_listener(ev_settings, read_key):
+    """
+    :return: the ConfirmationListener shared by every handle of the account in this process
+    """
+    key = (ws_endpoint(ev_settings), read_key)
+    with _listeners_lock:
+        listener = _listeners.get(key)
+        if listener is None or listener._closed:
+            listener = ConfirmationListener(*key)
+            _listeners[key] = listener
+    return listener
+
+
+class _ConfirmationHandle(object):
+    """
+    Mixin of the values returned by writes and deploys, waiting on their transaction's Confirmation
+    """
+    _confirmation = None
+
+    @property
+    def confirmation(self):
+        if self._confirmation is None:
+            raise EVBaseException('Confirmations are not tracked for this transaction')
+        return self._confirmation
+
+    @property
+    def confirmed(self):
+        return self._confirmation is not None and self._confirmation.done
+
+    def wait(self, timeout=None):
+        """
+        Blocks until MaticVigil reports the transaction over its websocket
+        :param timeout : seconds to wait, None to wait forever
+        :return: the 'otm', 'contractmon' or 'event' payload reported first
+        :raises EVConfirmationTimeout: if nothing was reported within timeout seconds
+        """
+        return self.confirmation.wait(timeout)
+
+    def wait_event(self, event_name=None, timeout=None):
+        """
+        Blocks until the transaction emits an event, see Confirmation.wait_event()
+        """
+        return self.confirmation.wait_event(event_name, timeout)
+
+    async def async_wait(self, timeout=None):
+        return await self.confirmation.async_wait(timeout)
+
+    def __await__(self):
+        return self.async_wait().__await__()
+
+
+class PendingTransaction(_ConfirmationHandle, list):
+    """
+    Response data of a contract write, a list like [{'txHash': ...}], that can be waited on
+    """
+    def __init__(self, data, confirmation=None):
+        super(PendingTransaction, self).__init__(data)
+        self._confirmation = confirmation
+
+    @property
+    def tx_hash(self):
+        return self[0]['txHash']
+
+
+class PendingDeployment(_ConfirmationHandle, dict):
+    """
+    Response data of a deploy, a dict with 'contract' and 'txhash', that can be waited on
+    """
+    def __init__(self, data, confirmation=None):
+        super(PendingDeployment, self).__init__(data)
+        self._confirmation = confirmation
+
+    @property
+    def tx_hash(self):
+        return self['txhash']
+
+    @property
+    def contract_address(self):
+        return self['contract']
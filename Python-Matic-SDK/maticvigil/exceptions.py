@@ -31,3 +31,26 @@ class EVAPIError(EVHTTPError):
     def __init__(self, request_url, request_body, status_code, response_body):
         super(EVAPIError, self).__init__(request_url, request_body, status_code, response_body)
 
+
+class EVCircuitOpenError(EVConnectionError):
+    def __init__(self, request_url):
+        super(EVCircuitOpenError, self).__init__("Circuit open, failing fast without calling MaticVigil API %s" % request_url, None)
+        self._request_url = request_url
+
+
+class EVValidationError(EVBaseException):
+    def __init__(self, fn_name, errors):
+        """
+        :param errors : mapping of parameter name to what is wrong with its argument
+        """
+        super(EVValidationError, self).__init__(
+            "Invalid arguments to %s: %s" % (fn_name, '; '.join('%s: %s' % (p, e) for p, e in errors.items()))
+        )
+        self.fn_name = fn_name
+        self.errors = errors
+
+
+class EVConfirmationTimeout(EVBaseException):
+    def __init__(self, tx_hash, timeout):
+        super(EVConfirmationTimeout, self).__init__("Transaction %s was not confirmed within %ss" % (tx_hash, timeout))
+        self.tx_hash = tx_hash
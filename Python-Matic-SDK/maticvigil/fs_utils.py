@@ -0,0 +1,43 @@
+import json
+import os
+import re
+import tempfile
+from .exceptions import EVBaseException
+
+_CONTRACT_ADDRESS = re.compile(r'^0x[0-9a-fA-F]{40}$')
+
+
+def checked_contract_address(contract_address):
+    """
+    :return: the contract address in lowercase, safe to use in file names and generated code
+    :raises EVBaseException: if it is not a 0x prefixed, 40 hex digits address
+    """
+    if not isinstance(contract_address, str) or not _CONTRACT_ADDRESS.match(contract_address):
+        raise EVBaseException(f'Invalid contract address: {contract_address!r}')
+    return contract_address.lower()
+
+
+def atomic_write_bytes(path, data):
+    """
+    Writes to a temporary file in the same directory, then renames it over path.
+    Readers, including other processes, see either the old or the new file contents, never a partial write.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path, obj):
+    atomic_write_bytes(path, json.dumps(obj).encode('utf-8'))
@@ -1,90 +1,253 @@
-import tenacity
+import threading
+import time
 import requests
+import urllib3
+from requests.adapters import HTTPAdapter
 from .exceptions import *
+from . import instrumentation
+from . import json_codec
+from .resilience import ResiliencePolicy
+from .singleflight import SingleFlight
 import logging
 
 ev_logger = logging.getLogger('EVCore')
 
-@tenacity.retry(
-    stop=tenacity.stop_after_delay(60),
-    wait=tenacity.wait_random_exponential(multiplier=1, max=60),
-    reraise=True
-)
-def get(url):
-    r = requests.get(url)
-    return r
-
-@tenacity.retry(
-    stop=tenacity.stop_after_delay(60),
-    wait=tenacity.wait_random_exponential(multiplier=1, max=60),
-    reraise=True
-)
-
-def post(url, json_params, headers):
-    r = requests.post(url=url, json=json_params, headers=headers)
-    return r
-
-def make_http_call(request_type, url, params={}, headers={}):
-    response = None
-    request_details = {'requestType': request_type, 'url': url, 'params': params, 'headers': headers}
-    ev_logger.debug('HTTPRequest')
-    ev_logger.debug(request_details)
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 32
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 60
+
+
+class HTTPTransport(object):
+    """
+    Keep-alive HTTP transport shared by EVCore, EVContract and extract_abi.
+    Wraps a pooled requests.Session so that repeated calls to the same MaticVigil host
+    reuse TCP+TLS connections instead of opening a new one per request.
+    :param pool_connections : number of per-host connection pools to cache
+    :param pool_maxsize : maximum number of connections kept alive per host
+    :param connect_timeout : seconds to wait for a connection to be established
+    :param read_timeout : seconds to wait for the server to send a response
+    :param session : optionally, a preconfigured requests.Session to use instead of a new one
+    :param resilience : ResiliencePolicy applying retries, circuit breaking and hedging to the requests sent through this transport
+    :param coalesce_reads : if True, identical GET requests in flight at the same time through this transport
+                            are sent once and all the callers share the decoded response, which must then be treated
+                            as read only. Off by default
+    """
+    def __init__(
+            self,
+            pool_connections=DEFAULT_POOL_CONNECTIONS,
+            pool_maxsize=DEFAULT_POOL_MAXSIZE,
+            connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+            read_timeout=DEFAULT_READ_TIMEOUT,
+            session=None,
+            resilience=None,
+            coalesce_reads=False
+    ):
+        self._timeout = (connect_timeout, read_timeout)
+        self._resilience = resilience if resilience else ResiliencePolicy()
+        self._read_flight = SingleFlight() if coalesce_reads else None
+        self._session = session if session else requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._warmed_up = set()
+
+    @property
+    def session(self):
+        return self._session
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @property
+    def resilience(self):
+        return self._resilience
+
+    @property
+    def read_flight(self):
+        """
+        SingleFlight coalescing identical GET requests, None if coalescing is disabled
+        """
+        return self._read_flight
+
+    def get(self, url, headers=None):
+        return self._session.get(url, headers=headers, timeout=self._timeout)
+
+    def post(self, url, json_params=None, headers=None):
+        return self._session.post(url=url, json=json_params, headers=headers, timeout=self._timeout)
+
+    def warm_up(self, urls):
+        """
+        Opens pooled connections ahead of time to the hosts behind the supplied URLs.
+        Failures are logged and ignored, warm up is only an optimization.
+        :param urls : iterable of URLs, one connection is established per distinct scheme and host
+        """
+        for url in urls:
+            if not url:
+                continue
+            origin = '/'.join(url.split('/')[:3])
+            if origin in self._warmed_up:
+                continue
+            try:
+                self._session.head(origin, timeout=self._timeout)
+            except requests.exceptions.RequestException as e:
+                ev_logger.debug('Could not warm up connection to %s: %s', origin, e)
+            else:
+                self._warmed_up.add(origin)
+
+    def close(self):
+        self._session.close()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport():
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = HTTPTransport()
+    return _default_transport
+
+
+def set_default_transport(transport):
+    global _default_transport
+    with _default_transport_lock:
+        _default_transport = transport
+
+
+def _status_code(response):
+    return response.status_code
+
+def _is_connect_error(exc):
+    """
+    :return: True if the connection could not be established, so the request was never sent
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.exceptions.ConnectionError) and not isinstance(exc, requests.exceptions.ReadTimeout):
+        # requests wraps the urllib3 error, a connection dropped after the request was sent is a ProtocolError
+        reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+        return isinstance(reason, (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError))
+    return False
+
+def get(url, transport=None, call_metrics=None, headers=None):
+    transport = transport or get_default_transport()
+    return transport.resilience.call(url, lambda: transport.get(url, headers=headers), _status_code, idempotent=True, call_metrics=call_metrics)
+
+def post(url, json_params, headers, transport=None, call_metrics=None):
+    transport = transport or get_default_transport()
+    return transport.resilience.call(
+        url,
+        lambda: transport.post(url=url, json_params=json_params, headers=headers),
+        _status_code,
+        idempotent=False,
+        call_metrics=call_metrics,
+        connect_error=_is_connect_error
+    )
+
+def make_http_call(request_type, url, params={}, headers={}, transport=None, operation=None):
+    """
+    :param operation : label reported to instrumentation sinks, for eg. 'contract_read:getPostId' or 'deploy'
+    """
     if request_type == 'get':
-        try:
-            response = get(url)
-        except (
-                requests.exceptions.ConnectionError,
-                requests.exceptions.Timeout,
-                requests.exceptions.ConnectTimeout
-        ) as e:
-            raise EVConnectionError("Error connecting to MaticVigil API %s" % url, e)
-        except Exception as e:
-            raise EVBaseException(e.__str__())
-        try:
-            response.raise_for_status()
-        except requests.exceptions.HTTPError:
-            request_details.update({'response': {'code': response.status_code, 'text': response.text}})
-            ev_logger.debug(request_details)
-            raise EVHTTPError(
-                request_url=url,
-                request_body='',
-                status_code=response.status_code,
-                response_body=response.text
+        transport = transport or get_default_transport()
+        if transport.read_flight is not None:
+            # concurrent callers reading the same URL share a single request and its decoded response
+            return transport.read_flight.do(
+                url, lambda: _instrumented_http_call(request_type, url, params, headers, transport, operation)
             )
-    elif request_type == 'post':
-        try:
-            response = post(url=url, json_params=params, headers=headers)
-        except (
-                requests.exceptions.ConnectionError,
-                requests.exceptions.Timeout,
-                requests.exceptions.ConnectTimeout
-        ) as e:
-            raise EVConnectionError("Error connecting to MaticVigil API %s" % url, e)
-        except Exception as e:
-            raise EVBaseException(e.__str__())
-        try:
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
+    return _instrumented_http_call(request_type, url, params, headers, transport, operation)
+
+def _instrumented_http_call(request_type, url, params, headers, transport, operation):
+    call_metrics = instrumentation.start_call(operation, request_type, url)
+    if call_metrics is None:
+        return _make_http_call(request_type, url, params, headers, transport, None)
+    begin = time.perf_counter()
+    try:
+        return _make_http_call(request_type, url, params, headers, transport, call_metrics)
+    except Exception as e:
+        call_metrics.error = e.__class__.__name__
+        raise
+    finally:
+        call_metrics.latency = time.perf_counter() - begin
+        instrumentation.emit(call_metrics)
+
+def _send(request_type, url, params, headers, transport, call_metrics):
+    try:
+        if request_type == 'get':
+            return get(url, transport=transport, call_metrics=call_metrics, headers=headers or None)
+        return post(url=url, json_params=params, headers=headers, transport=transport, call_metrics=call_metrics)
+    except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+            requests.exceptions.ConnectTimeout
+    ) as e:
+        raise EVConnectionError("Error connecting to MaticVigil API %s" % url, e)
+    except EVBaseException:
+        raise
+    except Exception as e:
+        raise EVBaseException(e.__str__())
+
+def _make_http_call(request_type, url, params, headers, transport, call_metrics):
+    debug_enabled = ev_logger.isEnabledFor(logging.DEBUG)
+    if debug_enabled:
+        request_details = {'requestType': request_type, 'url': url, 'params': params, 'headers': headers}
+        ev_logger.debug('HTTPRequest')
+        ev_logger.debug(request_details)
+    # GET calls to the MaticVigil API do not carry headers
+    response = _send(request_type, url, params, None if request_type == 'get' else headers, transport, call_metrics)
+    if call_metrics is not None:
+        call_metrics.status_code = response.status_code
+        call_metrics.request_bytes = len(response.request.body) if response.request.body else 0
+        call_metrics.response_bytes = len(response.content)
+    try:
+        response.raise_for_status()
+    except requests.exceptions.HTTPError:
+        if debug_enabled:
             request_details.update({'response': {'code': response.status_code, 'text': response.text}})
             ev_logger.debug(request_details)
-            raise EVHTTPError(
-                request_url=url,
-                request_body=params,
-                status_code=response.status_code,
-                response_body=response.text
-            )
-            
-    if not(request_type == 'get' and 'swagger' in url):
-        return_status = response.status_code
-        return_content = response.text
-        request_details.update({'response': {'text': return_content, 'status': return_status}})
+        raise EVHTTPError(
+            request_url=url,
+            request_body='' if request_type == 'get' else params,
+            status_code=response.status_code,
+            response_body=response.text
+        )
+
+    if debug_enabled and not(request_type == 'get' and 'swagger' in url):
+        request_details.update({'response': {'text': response.text, 'status': response.status_code}})
         ev_logger.debug('HTTPResponse')
         ev_logger.debug(request_details)
-    response = response.json()
+    return check_api_response(request_type, url, params, response.status_code, lambda: response.text, json_codec.loads(response.content))
+
+def conditional_get(url, etag=None, transport=None, operation=None):
+    """
+    GET revalidating a previously fetched response with its ETag
+    :param etag : ETag of the copy held by the caller. If the server answers 304 Not Modified, no body is transferred
+    :return: tuple of (decoded response or None if the copy held by the caller is still valid, ETag of the response)
+    """
+    with instrumentation.timed_call(operation, 'get', url) as call_metrics:
+        response = _send('get', url, None, {'If-None-Match': etag} if etag else None, transport, call_metrics)
+        if call_metrics is not None:
+            call_metrics.status_code = response.status_code
+            call_metrics.response_bytes = len(response.content)
+    if response.status_code == requests.codes.not_modified and etag:
+        return None, etag
+    if not 200 <= response.status_code < 300:
+        raise EVHTTPError(request_url=url, request_body='', status_code=response.status_code, response_body=response.text)
+    decoded = check_api_response('get', url, {}, response.status_code, lambda: response.text, json_codec.loads(response.content))
+    return decoded, response.headers.get('ETag')
 
+def check_api_response(request_type, url, params, status_code, response_text_fn, response):
+    """
+    :param response_text_fn : callable returning the raw response body, only called when building an error
+    """
     api_success = response.get('success', False)
     # ignoring GET returns for OpenAPI spec. Does not carry a 'success' field
     if not api_success and request_type == 'get' and 'openapi' not in response:
-        raise EVAPIError(request_url=url, request_body=params, status_code=return_status,
-                                    response_body=return_content)
+        raise EVAPIError(request_url=url, request_body=params, status_code=status_code,
+                                    response_body=response_text_fn())
     return response
@@ -0,0 +1,197 @@
+import bisect
+import time
+import threading
+import logging
+
+ev_logger = logging.getLogger('EVCore')
+
+# registered sinks. Replaced, never mutated in place, so that the hot path can iterate it without locking
+_sinks = ()
+_sinks_lock = threading.Lock()
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+class CallMetrics(object):
+    """
+    Measurements of a single MaticVigil API call, delivered to every registered sink
+    operation : what the SDK was doing, for eg. 'contract_read:getPostId', 'contract_write:addPost', 'deploy', 'hooks:add'
+    endpoint : request URL without its query string
+    """
+    __slots__ = (
+        'operation', 'request_type', 'endpoint', 'latency', 'status_code',
+        'retries', 'request_bytes', 'response_bytes', 'error'
+    )
+
+    def __init__(self, operation, request_type, endpoint):
+        self.operation = operation
+        self.request_type = request_type
+        self.endpoint = endpoint
+        self.latency = 0.0
+        self.status_code = None
+        self.retries = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.error = None
+
+    def as_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __repr__(self):
+        return f'<CallMetrics {self.as_dict()}>'
+
+
+def add_sink(sink):
+    """
+    Registers a callable receiving a CallMetrics instance after every API call.
+    Sinks are called on the thread that made the call and must not raise.
+    """
+    global _sinks
+    with _sinks_lock:
+        if sink not in _sinks:
+            _sinks = _sinks + (sink,)
+    return sink
+
+
+def remove_sink(sink):
+    global _sinks
+    with _sinks_lock:
+        _sinks = tuple(s for s in _sinks if s is not sink)
+
+
+def enabled():
+    return bool(_sinks)
+
+
+def start_call(operation, request_type, url):
+    """
+    :return: a CallMetrics to be filled in for this call, or None when no sink is registered
+    """
+    if not _sinks:
+        return None
+    return CallMetrics(operation or request_type, request_type, url.split('?', 1)[0])
+
+
+def emit(metrics):
+    for sink in _sinks:
+        try:
+            sink(metrics)
+        except Exception as e:
+            ev_logger.debug('Instrumentation sink %r failed: %s', sink, e)
+
+
+class timed_call(object):
+    """
+    Context manager measuring a call made outside of make_http_call, for eg. /login.
+    Yields the CallMetrics to fill in, or None when no sink is registered.
+    """
+    __slots__ = ('_metrics', '_begin')
+
+    def __init__(self, operation, request_type, url):
+        self._metrics = start_call(operation, request_type, url)
+        self._begin = 0.0
+
+    def __enter__(self):
+        if self._metrics is not None:
+            self._begin = time.perf_counter()
+        return self._metrics
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._metrics is not None:
+            self._metrics.latency = time.perf_counter() - self._begin
+            if exc_type is not None:
+                self._metrics.error = exc_type.__name__
+            emit(self._metrics)
+        return False
+
+
+class LatencyHistogram(object):
+    """ cumulative latency histogram over fixed bucket upper bounds, in seconds """
+    __slots__ = ('_bounds', '_counts', 'count', 'total')
+
+    def __init__(self, bounds=DEFAULT_LATENCY_BUCKETS):
+        self._bounds = tuple(bounds)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def percentile(self, p):
+        """
+        :param p : percentile between 0 and 100
+        :return: upper bound of the bucket the percentile falls in. None if nothing was observed
+        """
+        if not self.count:
+            return None
+        rank = self.count * p / 100.0
+        seen = 0
+        for idx, c in enumerate(self._counts):
+            seen += c
+            if seen >= rank and c:
+                return self._bounds[idx] if idx < len(self._bounds) else float('inf')
+        return float('inf')
+
+    def snapshot(self):
+        buckets = dict(zip(self._bounds, self._counts))
+        buckets[float('inf')] = self._counts[-1]
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'buckets': buckets
+        }
+
+
+class MetricsRecorder(object):
+    """
+    Built-in sink keeping per operation counters and latency histograms in memory.
+    Register it with add_sink(), or with MetricsRecorder.install(), and read snapshot() at any time.
+    """
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._ops = dict()
+
+    @classmethod
+    def install(cls, buckets=DEFAULT_LATENCY_BUCKETS):
+        return add_sink(cls(buckets))
+
+    def __call__(self, metrics):
+        with self._lock:
+            op = self._ops.get(metrics.operation)
+            if op is None:
+                op = self._ops[metrics.operation] = {
+                    'calls': 0, 'errors': 0, 'retries': 0, 'request_bytes': 0, 'response_bytes': 0,
+                    'status_codes': dict(), 'latency': LatencyHistogram(self._buckets)
+                }
+            op['calls'] += 1
+            if metrics.error is not None:
+                op['errors'] += 1
+            op['retries'] += metrics.retries
+            op['request_bytes'] += metrics.request_bytes
+            op['response_bytes'] += metrics.response_bytes
+            if metrics.status_code is not None:
+                op['status_codes'][metrics.status_code] = op['status_codes'].get(metrics.status_code, 0) + 1
+            op['latency'].observe(metrics.latency)
+
+    def snapshot(self):
+        with self._lock:
+            snap = dict()
+            for name, op in self._ops.items():
+                s = dict(op)
+                s['status_codes'] = dict(op['status_codes'])
+                s['latency'] = op['latency'].snapshot()
+                snap[name] = s
+            return snap
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
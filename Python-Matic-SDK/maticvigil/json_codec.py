@@ -0,0 +1,24 @@
+"""
+Single pass JSON decoding of API responses straight from the raw body bytes.
+Uses orjson when it is installed (pip install maticvigil-sdk[speedups]) and the standard library otherwise.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    JSON_BACKEND = 'orjson'
+    JSONDecodeError = orjson.JSONDecodeError
+
+    def loads(body):
+        return orjson.loads(body)
+else:
+    JSON_BACKEND = 'json'
+    JSONDecodeError = json.JSONDecodeError
+
+    def loads(body):
+        # json.loads detects the UTF-8/16/32 encoding of bytes by itself
+        return json.loads(body)
@@ -0,0 +1,131 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+
+DEFAULT_READ_TTL = 5.0
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class ReadCache(object):
+    """
+    Thread safe TTL + LRU cache for the results of contract read calls.
+    Entries are keyed on (contract address, function name, args) and evicted least recently used first
+    once the entry count or the approximate payload size goes over its bound.
+    Writes through a contract handle invalidate every entry of that contract. Each invalidation moves the contract
+    to a new generation, and results of reads started before it are not cached.
+    Cached results are shared between callers and should be treated as read only.
+    :param default_ttl : seconds a read result stays fresh
+    :param ttls : mapping of function name to its own TTL in seconds. A TTL of 0 disables caching for that function
+    :param max_entries : maximum number of cached results, None for no bound
+    :param max_bytes : maximum approximate size of the cached results as serialized JSON, None for no bound
+    """
+    def __init__(self, default_ttl=DEFAULT_READ_TTL, ttls=None, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=None):
+        self._default_ttl = default_ttl
+        self._ttls = dict(ttls) if ttls else dict()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expiry, value, size)
+        self._contract_keys = dict()  # contract address -> set of keys
+        self._generations = dict()  # contract address -> number of invalidations
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0, 'stale_puts': 0}
+
+    def ttl_for(self, fn_name):
+        return self._ttls.get(fn_name, self._default_ttl)
+
+    def set_ttl(self, fn_name, ttl):
+        self._ttls[fn_name] = ttl
+
+    @staticmethod
+    def make_key(contract_address, fn_name, args):
+        # arguments are keyed as they appear in the read URL, so that list arguments are hashable
+        return contract_address.lower(), fn_name, tuple(str(arg) for arg in args)
+
+    def generation(self, contract_address):
+        """
+        :return: current generation of the contract, to be passed to put() with the result of a read started now
+        """
+        with self._lock:
+            return self._generations.get(contract_address.lower(), 0)
+
+    def get(self, key):
+        """
+        :return: tuple of (True if the key was found fresh, cached value)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return False, None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return True, entry[1]
+
+    def put(self, key, value, generation=None):
+        """
+        :param generation : generation of the contract when the read was started. The value is dropped if the
+        contract was invalidated since
+        """
+        ttl = self.ttl_for(key[1])
+        if not ttl or ttl <= 0:
+            return
+        size = len(json.dumps(value)) if self._max_bytes is not None else 0
+        if self._max_bytes is not None and size > self._max_bytes:
+            return
+        with self._lock:
+            if generation is not None and self._generations.get(key[0], 0) != generation:
+                self._stats['stale_puts'] += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, size)
+            self._contract_keys.setdefault(key[0], set()).add(key)
+            self._bytes += size
+            while (self._max_entries is not None and len(self._entries) > self._max_entries) \
+                    or (self._max_bytes is not None and self._bytes > self._max_bytes):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._stats['evictions'] += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+        contract_keys = self._contract_keys.get(key[0])
+        if contract_keys is not None:
+            contract_keys.discard(key)
+            if not contract_keys:
+                del self._contract_keys[key[0]]
+
+    def invalidate_contract(self, contract_address):
+        contract_address = contract_address.lower()
+        with self._lock:
+            self._generations[contract_address] = self._generations.get(contract_address, 0) + 1
+            keys = self._contract_keys.pop(contract_address, ())
+            for key in keys:
+                _, _, size = self._entries.pop(key)
+                self._bytes -= size
+            self._stats['invalidations'] += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._contract_keys.clear()
+            self._bytes = 0
+
+    @property
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s['entries'] = len(self._entries)
+            s['bytes'] = self._bytes
+        return s
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,141 @@
+import threading
+from collections import OrderedDict
+from .exceptions import EVBaseException
+from .singleflight import SingleFlight
+
+# contract handles kept by a registry, least recently used handles are dropped first
+DEFAULT_MAX_HANDLES = 128
+
+
+def is_address(ref):
+    return isinstance(ref, str) and len(ref) == 42 and ref[:2].lower() == '0x'
+
+
+def _name_key(entry):
+    return (entry.get('name') or '').lower()
+
+
+class ContractRegistry(object):
+    """
+    Indexes the contracts of an account, as listed in the 'contracts' field returned by /login, by address and by name.
+    Contract handles are only built on first access and kept in a bounded LRU, so that a process touching a few
+    of hundreds of contracts only downloads the specs it uses.
+    :param contracts : list of {'address': ..., 'name': ...} entries
+    :param build : callable taking (contract address, app name) and returning a contract handle
+    :param max_handles : maximum number of handles kept, None for no bound
+    """
+    def __init__(self, contracts, build, max_handles=DEFAULT_MAX_HANDLES):
+        self._build = build
+        self._max_handles = max_handles
+        self._lock = threading.Lock()
+        self._by_address = dict()  # lowercase address -> entry
+        self._by_name = dict()  # lowercase name -> list of entries
+        self._handles = OrderedDict()  # lowercase address -> handle
+        self._flight = SingleFlight()
+        self._stats = {'hits': 0, 'built': 0, 'evictions': 0}
+        for entry in contracts or []:
+            self._add(entry)
+
+    def _add(self, entry):
+        address = entry['address'].lower()
+        previous = self._by_address.get(address)
+        if previous is not None:
+            self._by_name[_name_key(previous)].remove(previous)
+        self._by_address[address] = entry
+        self._by_name.setdefault(_name_key(entry), list()).append(entry)
+
+    def add(self, entry):
+        """
+        Adds or replaces the entry of a contract, for eg. one that was just deployed
+        :param entry : dict with 'address' and 'name'
+        """
+        with self._lock:
+            self._add(entry)
+
+    def get(self, ref):
+        """
+        :param ref : contract address or name, names are matched case insensitively
+        :return: the entry of the contract, or None if the account has no such contract
+        :raises EVBaseException: if ref is a name shared by several contracts
+        """
+        with self._lock:
+            if is_address(ref):
+                return self._by_address.get(ref.lower())
+            entries = list(self._by_name.get(ref.lower()) or [])
+        if not entries:
+            return None
+        if len(entries) > 1:
+            raise EVBaseException(
+                f'{len(entries)} contracts are named {ref}, look them up by address instead: '
+                f'{", ".join(e["address"] for e in entries)}'
+            )
+        return entries[0]
+
+    def handle(self, ref):
+        """
+        :param ref : contract address or name
+        :return: the contract handle, built on first access
+        :raises EVBaseException: if the account has no contract named ref. Addresses outside the account are accepted
+        """
+        entry = self.get(ref)
+        if entry is None:
+            if not is_address(ref):
+                raise EVBaseException(f'No contract named {ref} in this account')
+            entry = {'address': ref, 'name': ref}
+        address = entry['address'].lower()
+        with self._lock:
+            handle = self._handles.get(address)
+            if handle is not None:
+                self._handles.move_to_end(address)
+                self._stats['hits'] += 1
+                return handle
+        # concurrent first accesses of the same contract wait on a single build
+        return self._flight.do(address, lambda: self._materialize(address, entry))
+
+    def _materialize(self, address, entry):
+        with self._lock:
+            handle = self._handles.get(address)
+            if handle is not None:
+                return handle
+        handle = self._build(entry['address'], entry.get('name') or entry['address'])
+        with self._lock:
+            self._stats['built'] += 1
+            self._handles[address] = handle
+            if self._max_handles is not None:
+                while len(self._handles) > self._max_handles:
+                    self._handles.popitem(last=False)
+                    self._stats['evictions'] += 1
+        return handle
+
+    def evict(self, ref):
+        """
+        Drops the handle of a contract, the next access builds it again
+        """
+        address = ref.lower() if is_address(ref) else (self.get(ref) or {}).get('address', '').lower()
+        with self._lock:
+            self._handles.pop(address, None)
+
+    def clear(self):
+        with self._lock:
+            self._handles.clear()
+
+    @property
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s['handles'] = len(self._handles)
+        return s
+
+    def __contains__(self, ref):
+        try:
+            return self.get(ref) is not None
+        except EVBaseException:
+            return True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._by_address)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._by_address.values()))
@@ -0,0 +1,482 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from .exceptions import EVCircuitOpenError
+
+ev_logger = logging.getLogger('EVCore')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# responses worth retrying for idempotent reads. Writes are only retried when their connection could not be established,
+# any later error may come after the API accepted them
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+
+
+def default_endpoint_key(url):
+    """
+    Groups URLs into the endpoints tracked by a circuit breaker, for eg.
+    https://mainnet-api.maticvigil.com/v1.0/contract/0xabc/getPostId/42 -> mainnet-api.maticvigil.com/v1.0/contract/0xabc/getPostId
+    """
+    parts = urlsplit(url)
+    path_segments = [p for p in parts.path.split('/') if p][:4]
+    return parts.netloc + '/' + '/'.join(path_segments)
+
+
+class CircuitBreaker(object):
+    """
+    Fails calls fast while an endpoint is known to be down.
+    Opens after failure_threshold consecutive failures, lets a single probe through after reset_timeout seconds
+    and closes again when the probe succeeds.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._stats = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def allow(self):
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self._reset_timeout:
+                self._state = HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._stats['successes'] += 1
+            self._consecutive_failures = 0
+            self._state = CLOSED
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._stats['failures'] += 1
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN or self._consecutive_failures >= self._failure_threshold:
+                if self._state != OPEN:
+                    self._stats['opened'] += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s['state'] = self._state
+            s['consecutive_failures'] = self._consecutive_failures
+        return s
+
+
+class RetryBudget(object):
+    """
+    Caps retries to a fraction of the traffic over a sliding window, so that retries cannot multiply
+    the load on an API that is already struggling.
+    :param ratio : retries allowed per original request, for eg. 0.2 lets retries add at most 20% to the traffic
+    :param min_retries_per_second : retries always allowed regardless of traffic, so that low volume callers can retry
+    :param window : length of the sliding window in seconds
+    """
+    def __init__(self, ratio=0.2, min_retries_per_second=5, window=10):
+        self._ratio = ratio
+        self._min_retries = min_retries_per_second * window
+        self._window = window
+        self._lock = threading.Lock()
+        # one slot per second of the window: [second, requests, retries]
+        self._slots = [[0, 0, 0] for _ in range(window)]
+        self._stats = {'requests': 0, 'retries': 0, 'exhausted': 0}
+
+    def _slot(self, now):
+        second = int(now)
+        slot = self._slots[second % self._window]
+        if slot[0] != second:
+            slot[0], slot[1], slot[2] = second, 0, 0
+        return slot
+
+    def _totals(self, now):
+        oldest = int(now) - self._window
+        requests = retries = 0
+        for second, req, ret in self._slots:
+            if second > oldest:
+                requests += req
+                retries += ret
+        return requests, retries
+
+    def record_request(self):
+        with self._lock:
+            self._slot(time.time())[1] += 1
+            self._stats['requests'] += 1
+
+    def try_withdraw(self):
+        """
+        :return: True if a retry (or hedged request) may be sent now
+        """
+        with self._lock:
+            now = time.time()
+            requests, retries = self._totals(now)
+            if retries >= max(self._min_retries, requests * self._ratio):
+                self._stats['exhausted'] += 1
+                return False
+            self._slot(now)[2] += 1
+            self._stats['retries'] += 1
+            return True
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s['window_requests'], s['window_retries'] = self._totals(time.time())
+        return s
+
+
+class _Scheduled(object):
+    __slots__ = ('_fn', '_lock', '_cancelled')
+
+    def __init__(self, fn):
+        self._fn = fn
+        self._lock = threading.Lock()
+        self._cancelled = False
+
+    def run(self):
+        with self._lock:
+            if not self._cancelled:
+                self._cancelled = True
+                self._fn()
+
+    def cancel(self):
+        """
+        Once this returns, the callback either already ran or never will
+        """
+        with self._lock:
+            self._cancelled = True
+
+
+class _Timer(object):
+    """
+    Runs short callbacks after a delay on a single daemon thread, instead of one timer thread per call
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = list()
+        self._seq = itertools.count()
+        self._thread = None
+
+    def call_later(self, delay, fn):
+        scheduled = _Scheduled(fn)
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), scheduled))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='EVHedgeTimer', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return scheduled
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        scheduled = heapq.heappop(self._heap)[2]
+                        break
+                    self._cond.wait(delay)
+            try:
+                scheduled.run()
+            except Exception as e:
+                ev_logger.debug('Scheduled call failed: %s', e)
+
+
+class _Race(object):
+    """
+    Attempts of a hedged request running on other threads. The first successful response wins, later ones are ignored
+    :param succeeded : callable telling whether a response is successful
+    """
+    def __init__(self, succeeded):
+        self._succeeded = succeeded
+        self._cond = threading.Condition()
+        self._started = 0
+        # (attempt, response, exception) in completion order
+        self._outcomes = list()
+
+    def start(self):
+        """
+        :return: number of the attempt about to be sent
+        """
+        with self._cond:
+            attempt = self._started
+            self._started += 1
+        return attempt
+
+    def run(self, attempt, send):
+        try:
+            outcome = (attempt, send(), None)
+        except Exception as e:
+            outcome = (attempt, None, e)
+        with self._cond:
+            self._outcomes.append(outcome)
+            self._cond.notify_all()
+
+    def wait(self, attempt=None):
+        """
+        :param attempt : stop waiting once this attempt completed, even if it failed. None to wait for every attempt started
+        :return: outcome of the first successful attempt, or None
+        """
+        with self._cond:
+            while True:
+                for outcome in self._outcomes:
+                    if outcome[2] is None and self._succeeded(outcome[1]):
+                        return outcome
+                completed = [outcome[0] for outcome in self._outcomes]
+                if attempt in completed if attempt is not None else len(completed) == self._started:
+                    return None
+                self._cond.wait()
+
+    def outcome(self, attempt):
+        with self._cond:
+            return next(outcome for outcome in self._outcomes if outcome[0] == attempt)
+
+
+class ResiliencePolicy(object):
+    """
+    Retry, circuit breaking and hedging applied to every request sent through a transport.
+    :param max_attempts : maximum attempts per call, including the first one
+    :param backoff_base : base delay in seconds of the jittered exponential backoff between attempts
+    :param backoff_max : maximum delay in seconds between attempts
+    :param retry_budget : RetryBudget shared by all endpoints. Defaults to 20% of the traffic
+    :param breaker_failure_threshold : consecutive failures after which an endpoint's circuit opens
+    :param breaker_reset_timeout : seconds an open circuit waits before letting a probe request through
+    :param hedge_delay : if set, an idempotent GET that has not completed after this many seconds is sent a second time.
+                         The first successful response wins, the other one is ignored
+    :param hedge_max_workers : size of the thread pool sending the second requests of hedged GETs
+    :param endpoint_key : callable mapping a URL to the endpoint its circuit breaker is tracked under
+    """
+    def __init__(
+            self,
+            max_attempts=4,
+            backoff_base=0.1,
+            backoff_max=5.0,
+            retry_budget=None,
+            breaker_failure_threshold=5,
+            breaker_reset_timeout=30.0,
+            hedge_delay=None,
+            hedge_max_workers=8,
+            endpoint_key=default_endpoint_key
+    ):
+        self._max_attempts = max(1, max_attempts)
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._retry_budget = retry_budget if retry_budget else RetryBudget()
+        self._breaker_failure_threshold = breaker_failure_threshold
+        self._breaker_reset_timeout = breaker_reset_timeout
+        self._hedge_delay = hedge_delay
+        self._hedge_max_workers = hedge_max_workers
+        self._hedge_executor = None
+        self._hedge_timer = None
+        self._endpoint_key = endpoint_key
+        self._breakers = dict()
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'retries': 0, 'hedges': 0, 'hedge_wins': 0, 'short_circuited': 0}
+
+    def breaker(self, url):
+        key = self._endpoint_key(url)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    key, CircuitBreaker(self._breaker_failure_threshold, self._breaker_reset_timeout)
+                )
+        return breaker
+
+    def _count(self, stat, n=1):
+        with self._lock:
+            self._stats[stat] += n
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self._backoff_max, self._backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _is_failure(status_code):
+        return status_code >= 500 or status_code == 429
+
+    @staticmethod
+    def _retryable(idempotent, exc, status_code, connect_error):
+        if exc is not None:
+            # a write that may have reached the API is not sent again, it could be applied twice
+            return idempotent or (connect_error is not None and connect_error(exc))
+        return idempotent and status_code in RETRYABLE_STATUS_CODES
+
+    def _admit(self, url):
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            self._count('short_circuited')
+            raise EVCircuitOpenError(url)
+        return breaker
+
+    def call(self, url, send, status_of, idempotent, call_metrics=None, connect_error=None):
+        """
+        Sends a request with retries, circuit breaking and optional hedging
+        :param url : request URL, used to pick the circuit breaker
+        :param send : zero argument callable sending the request and returning the response
+        :param status_of : callable returning the HTTP status code of a response
+        :param idempotent : True for reads. Only idempotent requests are retried on error responses and hedged
+        :param call_metrics : optional instrumentation CallMetrics whose retry count is updated
+        :param connect_error : callable returning True for exceptions raised before the request could be sent,
+                               the only ones non idempotent requests are retried on. None to never retry them
+        """
+        self._count('calls')
+        self._retry_budget.record_request()
+        attempt = 0
+        while True:
+            breaker = self._admit(url)
+            exc, response = None, None
+            try:
+                if idempotent and self._hedge_delay is not None:
+                    response = self._hedged_send(send, status_of)
+                else:
+                    response = send()
+            except Exception as e:
+                exc = e
+            status_code = status_of(response) if response is not None else None
+            if exc is None and not self._is_failure(status_code):
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            attempt += 1
+            if attempt >= self._max_attempts or not self._retryable(idempotent, exc, status_code, connect_error) \
+                    or not self._retry_budget.try_withdraw():
+                if exc is not None:
+                    raise exc
+                return response
+            self._count('retries')
+            if call_metrics is not None:
+                call_metrics.retries += 1
+            time.sleep(self._backoff(attempt))
+
+    def _hedging(self):
+        if self._hedge_executor is None:
+            with self._lock:
+                if self._hedge_executor is None:
+                    self._hedge_timer = _Timer()
+                    self._hedge_executor = ThreadPoolExecutor(max_workers=self._hedge_max_workers, thread_name_prefix='EVHedge')
+        return self._hedge_timer, self._hedge_executor
+
+    def _hedged_send(self, send, status_of):
+        # the caller waits for the first successful response. The primary request gets a thread of its own, so that
+        # read concurrency is not bounded by the pool, which only sends the hedges
+        timer, executor = self._hedging()
+        race = _Race(lambda response: not self._is_failure(status_of(response)))
+        primary = race.start()
+        threading.Thread(target=race.run, args=(primary, send), name='EVPrimaryRead', daemon=True).start()
+
+        def send_hedge():
+            if self._retry_budget.try_withdraw():
+                self._count('hedges')
+                executor.submit(race.run, race.start(), send)
+
+        scheduled = timer.call_later(self._hedge_delay, send_hedge)
+        winner = race.wait(primary)
+        # once cancelled, the hedge was either sent or never will be
+        scheduled.cancel()
+        if winner is None:
+            # the primary failed, a hedge already sent may still succeed
+            winner = race.wait()
+        if winner is None:
+            _, response, exc = race.outcome(primary)
+            if exc is not None:
+                raise exc
+            return response
+        if winner[0] != primary:
+            self._count('hedge_wins')
+        return winner[1]
+
+    async def async_call(self, url, send, status_of, idempotent, call_metrics=None, connect_error=None):
+        """
+        asyncio counterpart of call(). send is a zero argument callable returning an awaitable
+        """
+        # asyncio is imported here so that synchronous clients do not pay for it
+        import asyncio
+        self._count('calls')
+        self._retry_budget.record_request()
+        attempt = 0
+        while True:
+            breaker = self._admit(url)
+            exc, response = None, None
+            try:
+                if idempotent and self._hedge_delay is not None:
+                    response = await self._async_hedged_send(send, status_of)
+                else:
+                    response = await send()
+            except Exception as e:
+                exc = e
+            status_code = status_of(response) if response is not None else None
+            if exc is None and not self._is_failure(status_code):
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            attempt += 1
+            if attempt >= self._max_attempts or not self._retryable(idempotent, exc, status_code, connect_error) \
+                    or not self._retry_budget.try_withdraw():
+                if exc is not None:
+                    raise exc
+                return response
+            self._count('retries')
+            if call_metrics is not None:
+                call_metrics.retries += 1
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def _async_hedged_send(self, send, status_of):
+        import asyncio
+        primary = asyncio.ensure_future(send())
+        done, _ = await asyncio.wait([primary], timeout=self._hedge_delay)
+        if done or not self._retry_budget.try_withdraw():
+            return await primary
+        self._count('hedges')
+        hedge = asyncio.ensure_future(send())
+        pending = {primary, hedge}
+        first_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for f in done:
+                    if f.exception() is None and not self._is_failure(status_of(f.result())):
+                        if f is hedge:
+                            self._count('hedge_wins')
+                        return f.result()
+                    first_error = first_error or f
+            return first_error.result()
+        finally:
+            for f in pending:
+                f.cancel()
+
+    def stats(self):
+        """
+        :return: dict with call, retry and hedging counters, the retry budget and the state of every circuit breaker
+        """
+        with self._lock:
+            s = dict(self._stats)
+            breakers = dict(self._breakers)
+        s['retry_budget'] = self._retry_budget.stats()
+        s['breakers'] = {key: b.stats() for key, b in breakers.items()}
+        return s
@@ -0,0 +1,86 @@
+import threading
+
+
+class _Flight(object):
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent identical calls: while a call for a key is in flight, other callers asking
+    for the same key wait for it and share its result or exception instead of repeating the call.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = dict()
+        self._stats = {'calls': 0, 'coalesced': 0}
+
+    def do(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._stats['coalesced'] += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self._stats['calls'] += 1
+                leader = True
+        if leader:
+            try:
+                flight.result = fn()
+            except BaseException as e:
+                flight.error = e
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    @property
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s['in_flight'] = len(self._flights)
+        return s
+
+
+class AsyncSingleFlight(object):
+    """
+    asyncio counterpart of SingleFlight. Must only be used from a single event loop.
+    """
+    def __init__(self):
+        self._flights = dict()
+        self._stats = {'calls': 0, 'coalesced': 0}
+
+    async def do(self, key, coro_fn):
+        # asyncio is imported here so that synchronous clients do not pay for it
+        import asyncio
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._stats['coalesced'] += 1
+            # shield so that a cancelled follower does not cancel the shared call
+            return await asyncio.shield(flight)
+        self._stats['calls'] += 1
+        flight = self._flights[key] = asyncio.ensure_future(coro_fn())
+        try:
+            return await asyncio.shield(flight)
+        finally:
+            if flight.done():
+                self._flights.pop(key, None)
+            else:
+                flight.add_done_callback(lambda _: self._flights.pop(key, None))
+
+    @property
+    def stats(self):
+        s = dict(self._stats)
+        s['in_flight'] = len(self._flights)
+        return s
@@ -0,0 +1,192 @@
+"""
+Collects the bundle of Solidity sources sent to /compile and /deploy: the main contract file and, recursively,
+every file it imports.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import threading
+import logging
+from collections import OrderedDict
+from .exceptions import EVBaseException
+
+ev_logger = logging.getLogger('EVCore')
+
+# directory the main contract file is placed in within the bundle
+SOURCE_UNIT_ROOT = 'ev-py-sdk'
+# files whose import lists are remembered, least recently used ones are dropped first
+DEFAULT_MAX_MEMOIZED = 4096
+
+
+# the only tokens import scanning cares about. Comments and string literals are matched whole so that
+# the word import or a ; inside them is skipped
+_IMPORT_TOKENS = re.compile(r'''
+      //[^\n]*
+    | /\*.*?(?:\*/|\Z)
+    | "(?:[^"\\\n]|\\.)*"
+    | '(?:[^'\\\n]|\\.)*'
+    | (?<![\w$])import(?![\w$])
+    | ;
+''', re.VERBOSE | re.DOTALL)
+
+
+def scan_imports(source):
+    """
+    Tokenizes just enough of a Solidity source to find its import directives, in every form:
+    import "path"; import "path" as x; import * as x from "path"; import {a, b as c} from "path";
+    :return: import paths of the source, in order
+    """
+    imports = list()
+    in_import = False
+    for m in _IMPORT_TOKENS.finditer(source):
+        token = m.group()
+        first = token[0]
+        if first == '/':
+            continue
+        if first == ';':
+            in_import = False
+        elif first == 'i':
+            in_import = True
+        elif in_import:
+            # the path is the only string literal of an import directive
+            imports.append(token[1:-1])
+            in_import = False
+    return imports
+
+
+def antlr_imports(source):
+    """
+    :return: import paths of a Solidity source, from a full parse by solidity_parser
+    """
+    # the ANTLR based parser is slow to import and only needed for deploys
+    from solidity_parser import parser
+    return [each['path'].strip('\'"') for each in parser.objectify(parser.parse(source)).imports]
+
+
+class ImportMemo(object):
+    """
+    Remembers the import paths of Solidity sources, keyed on a hash of their content,
+    so that unchanged files are not scanned again on the next deploy.
+    :param max_entries : number of files remembered
+    """
+    def __init__(self, max_entries=DEFAULT_MAX_MEMOIZED):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._imports = OrderedDict()  # (scanner name, content hash) -> tuple of import paths
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def imports(self, source, scan):
+        """
+        :param scan : callable returning the import paths of a source
+        """
+        key = (getattr(scan, '__qualname__', repr(scan)), hashlib.sha1(source.encode('utf-8')).hexdigest())
+        with self._lock:
+            imports = self._imports.get(key)
+            if imports is not None:
+                self._imports.move_to_end(key)
+                self._stats['hits'] += 1
+                return imports
+        imports = tuple(scan(source))
+        with self._lock:
+            self._stats['misses'] += 1
+            self._imports[key] = imports
+            while len(self._imports) > self._max_entries:
+                self._imports.popitem(last=False)
+        return imports
+
+    def clear(self):
+        with self._lock:
+            self._imports.clear()
+
+    @property
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s['entries'] = len(self._imports)
+        return s
+
+
+_default_import_memo = ImportMemo()
+
+
+def get_default_import_memo():
+    return _default_import_memo
+
+
+def _read_source(path, importer):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError as e:
+        msg = f'Could not read {path}' + (f' imported by {importer}' if importer else '') + f': {e}'
+        ev_logger.error(msg)
+        raise EVBaseException(msg)
+
+
+class SourceResolver(object):
+    """
+    Follows the imports of a contract file recursively and builds the sources bundle.
+    Relative imports (./ and ../) are resolved against the importing file. Other imports, for eg. '@openzeppelin/...',
+    are looked up in the directory of the main file, then in include_paths. Every file is read once per resolve,
+    and its import list comes from the ImportMemo when the file did not change since it was last scanned.
+    Import cycles are legal in Solidity, each file of a cycle is bundled once.
+    :param include_paths : directories searched for non relative imports, for eg. a node_modules directory
+    :param scan_imports : callable returning the import paths of a Solidity source. scan_imports() by default,
+                          antlr_imports() runs the full solidity_parser grammar instead
+    :param memo : ImportMemo, defaults to the one shared by the process
+    """
+    def __init__(self, include_paths=None, scan_imports=scan_imports, memo=None):
+        self._include_paths = [os.path.expanduser(p) for p in include_paths or []]
+        self._scan_imports = scan_imports
+        self._memo = memo if memo is not None else _default_import_memo
+
+    @property
+    def memo(self):
+        return self._memo
+
+    def resolve(self, contract_file):
+        """
+        :param contract_file : path to the main contract file
+        :return: tuple of (sources mapping as expected by /compile and /deploy, name of the main source file in it)
+        """
+        main_path = os.path.abspath(os.path.expanduser(contract_file))
+        main_unit = posixpath.join(SOURCE_UNIT_ROOT, os.path.basename(main_path))
+        search_dirs = [os.path.dirname(main_path)] + self._include_paths
+        sources = dict()
+        in_progress = list()
+        # depth first, the main file comes first in the bundle
+        self._visit(main_unit, main_path, None, sources, in_progress, search_dirs)
+        return sources, main_unit
+
+    def _visit(self, unit, path, importer, sources, in_progress, search_dirs):
+        if unit in sources:
+            if unit in in_progress:
+                cycle = in_progress[in_progress.index(unit):] + [unit]
+                ev_logger.debug('Import cycle: %s', ' -> '.join(cycle))
+            return
+        content = _read_source(path, importer)
+        sources[unit] = {'content': content}
+        in_progress.append(unit)
+        for import_path in self._memo.imports(content, self._scan_imports):
+            child_unit, child_path = self._locate(import_path, unit, path, search_dirs)
+            self._visit(child_unit, child_path, unit, sources, in_progress, search_dirs)
+        in_progress.pop()
+
+    @staticmethod
+    def _locate(import_path, importer_unit, importer_path, search_dirs):
+        """
+        :return: tuple of (source unit name, file path) of an import
+        """
+        if import_path.startswith('./') or import_path.startswith('../'):
+            unit = posixpath.normpath(posixpath.join(posixpath.dirname(importer_unit), import_path))
+            if unit.startswith('../'):
+                raise EVBaseException(f'{import_path} imported by {importer_unit} is outside the contract directory tree')
+            return unit, os.path.normpath(os.path.join(os.path.dirname(importer_path), *import_path.split('/')))
+        for directory in search_dirs:
+            candidate = os.path.join(directory, *import_path.split('/'))
+            if os.path.isfile(candidate):
+                return import_path, candidate
+        msg = f'Could not find {import_path} imported by {importer_unit} in {", ".join(search_dirs)}'
+        ev_logger.error(msg)
+        raise EVBaseException(msg)
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+import logging
+from . import json_codec
+from .fs_utils import atomic_write_json, checked_contract_address
+
+ev_logger = logging.getLogger('EVCore')
+
+# specs younger than this are used without contacting the API. Older ones are revalidated with their ETag
+DEFAULT_SPEC_TTL = 24 * 60 * 60
+
+
+class SpecCache(object):
+    """
+    On-disk cache of the OpenAPI specs served at /swagger/{contract_address}, so that a process restarting
+    does not download and walk the spec of every contract again.
+    Entries are keyed by API prefix and contract address, and written atomically so that concurrent
+    processes sharing the cache never read a partial file.
+    :param cache_dir : directory holding the cached specs, for eg. ~/.maticvigil/specs. None to keep the specs in memory only,
+                       for eg. to share one cache between many EVCore instances built from in-memory settings
+    :param ttl : seconds a cached spec is used as is. Once it is older, it is revalidated with the ETag it was served with.
+                 None to never revalidate
+    """
+    def __init__(self, cache_dir=None, ttl=DEFAULT_SPEC_TTL):
+        self._cache_dir = cache_dir
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        # (API prefix, lowercase contract address) -> entry, used when there is no cache directory
+        self._entries = dict()
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'refreshed': 0}
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @property
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def path_for(self, api_prefix, contract_address):
+        prefix_dir = hashlib.sha1(api_prefix.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self._cache_dir, prefix_dir, checked_contract_address(contract_address) + '.json')
+
+    def get(self, api_prefix, contract_address):
+        """
+        :return: cached entry dict with 'spec', 'etag' and 'fetched_at', or None
+        """
+        if self._cache_dir is None:
+            with self._lock:
+                return self._entries.get((api_prefix, contract_address.lower()))
+        try:
+            with open(self.path_for(api_prefix, contract_address), 'rb') as f:
+                entry = json_codec.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if entry.get('api_prefix') != api_prefix or 'spec' not in entry:
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        return self._ttl is None or time.time() - entry.get('fetched_at', 0) < self._ttl
+
+    def put(self, api_prefix, contract_address, spec, etag=None):
+        entry = {
+            'api_prefix': api_prefix,
+            'contract_address': contract_address.lower(),
+            'etag': etag,
+            'fetched_at': time.time(),
+            'spec': spec
+        }
+        if self._cache_dir is None:
+            with self._lock:
+                self._entries[(api_prefix, contract_address.lower())] = entry
+            return entry
+        try:
+            atomic_write_json(self.path_for(api_prefix, contract_address), entry)
+        except OSError as e:
+            # the cache is only an optimization
+            ev_logger.debug('Could not cache OpenAPI spec of %s: %s', contract_address, e)
+        return entry
+
+    def invalidate(self, api_prefix, contract_address):
+        if self._cache_dir is None:
+            with self._lock:
+                self._entries.pop((api_prefix, contract_address.lower()), None)
+            return
+        try:
+            os.unlink(self.path_for(api_prefix, contract_address))
+        except OSError:
+            pass
+
+    def clear(self):
+        if self._cache_dir is None:
+            with self._lock:
+                self._entries.clear()
+            return
+        shutil.rmtree(self._cache_dir, ignore_errors=True)
+
+    def _lookup(self, api_prefix, contract_address, refresh):
+        entry = None if refresh else self.get(api_prefix, contract_address)
+        if entry is not None and self.is_fresh(entry):
+            self._count('hits')
+            return entry, True
+        return entry, False
+
+    def _store(self, api_prefix, contract_address, entry, spec, etag, refresh):
+        if spec is None:
+            self._count('revalidated')
+            spec = entry['spec']
+        elif entry is not None or refresh:
+            self._count('refreshed')
+        else:
+            self._count('misses')
+        self.put(api_prefix, contract_address, spec, etag)
+        return spec
+
+    def load(self, api_prefix, contract_address, fetch, refresh=False):
+        """
+        Returns the spec of a contract from the cache, revalidating or fetching it when needed
+        :param fetch : callable taking the ETag of the cached copy (or None) and returning a tuple of
+                       (spec, ETag), where spec is None when the cached copy is still valid
+        :param refresh : ignore the cached copy and download the spec again
+        """
+        entry, fresh = self._lookup(api_prefix, contract_address, refresh)
+        if fresh:
+            return entry['spec']
+        spec, etag = fetch(entry['etag'] if entry else None)
+        return self._store(api_prefix, contract_address, entry, spec, etag, refresh)
+
+    async def async_load(self, api_prefix, contract_address, fetch, refresh=False):
+        """
+        asyncio counterpart of load(). fetch is a coroutine function
+        """
+        entry, fresh = self._lookup(api_prefix, contract_address, refresh)
+        if fresh:
+            return entry['spec']
+        spec, etag = await fetch(entry['etag'] if entry else None)
+        return self._store(api_prefix, contract_address, entry, spec, etag, refresh)
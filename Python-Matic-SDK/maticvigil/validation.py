@@ -0,0 +1,263 @@
+"""
+Client side validation of contract call arguments.
+A validator is compiled once per contract function, from the Solidity types of its ABI or, without an ABI,
+from the parameter types of the contract's OpenAPI spec. Each argument is converted by the ABIHelper.first_pass_check_*
+method of its type, after checks ABIHelper does not make: integer ranges, booleans given for integers or strings,
+malformed hex and byte lengths. Invalid arguments raise EVValidationError before any request is sent.
+"""
+import json
+import re
+from .exceptions import EVValidationError
+
+_ADDRESS = re.compile(r'^0x[0-9a-fA-F]{40}$')
+_HEX = re.compile(r'^0[xX](?:[0-9a-fA-F]{2})*$')
+_INT_TYPE = re.compile(r'^(u?)int(\d*)$')
+_BYTES_TYPE = re.compile(r'^bytes(\d*)$')
+_ARRAY_TYPE = re.compile(r'^(.+)\[(\d*)\]$')
+
+# OpenAPI parameter types mapped to the checks applied when no ABI is available. 'integer' and 'array' are not Solidity types,
+# they check for an integer of any size and a list of any elements
+SCHEMA_TO_SOLIDITY = {
+    'integer': 'integer',
+    'boolean': 'bool',
+    'string': 'string',
+    'array': 'array'
+}
+
+
+def _passthrough(value):
+    return value
+
+
+def _rejected(sol_type, reason):
+    # same wording as the errors reported by ABIHelper
+    return ValueError(f'Expected type: {sol_type}. Supplied argument {reason}')
+
+
+def _first_pass(first_pass_check, value, sol_type):
+    """
+    :param first_pass_check : ABIHelper.first_pass_check_* method for a single argument of sol_type
+    :return: value as converted by first_pass_check
+    """
+    conversion_errors = dict()
+    ret, error_flag = first_pass_check(value, 'value', sol_type, conversion_errors)
+    if error_flag:
+        raise ValueError(conversion_errors['value'])
+    return ret
+
+
+def _int_checker(first_pass_check, sol_type, signed, bits):
+    if bits is None:
+        low, high = None, None
+    elif signed:
+        low, high = -2 ** (bits - 1), 2 ** (bits - 1) - 1
+    else:
+        low, high = 0, 2 ** bits - 1
+
+    def check(value):
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise _rejected(sol_type, 'not a valid integer')
+        if isinstance(value, float) and not value.is_integer():
+            raise _rejected(sol_type, f'{value} not a whole number')
+        if isinstance(value, str) and value.strip().lstrip('-')[:2].lower() == '0x':
+            try:
+                value = int(value.strip(), 16)
+            except ValueError:
+                raise _rejected(sol_type, 'not a valid integer')
+        v = _first_pass(first_pass_check, value, sol_type)
+        if low is not None and not low <= v <= high:
+            raise _rejected(sol_type, f'{v} out of range')
+        return v
+    return check
+
+
+def _bool_checker(first_pass_check):
+    def check(value):
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, int) and value in (0, 1):
+            value = str(value)
+        elif isinstance(value, str):
+            value = value.strip()
+        return _first_pass(first_pass_check, value, 'bool')
+    return check
+
+
+def _address_checker(first_pass_check):
+    def check(value):
+        if isinstance(value, str) and _ADDRESS.match(value):
+            hex_digits = value[2:]
+            if hex_digits == hex_digits.lower() or hex_digits == hex_digits.upper():
+                # no EIP-55 checksum to verify
+                return value
+        return _first_pass(first_pass_check, value, 'address')
+    return check
+
+
+def _string_checker(first_pass_check):
+    def check(value):
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise _rejected('string', 'not a valid string')
+        return _first_pass(first_pass_check, value, 'string')
+    return check
+
+
+def _bytes_checker(first_pass_check, sol_type, size):
+    def check(value):
+        if isinstance(value, (bytes, bytearray)):
+            value = '0x' + bytes(value).hex()
+        elif not isinstance(value, str):
+            raise _rejected(sol_type, 'not a valid byte object.')
+        elif value[:2].lower() == '0x' and not _HEX.match(value):
+            raise _rejected(sol_type, f'{value} not a hexadecimal value')
+        ret = _first_pass(first_pass_check, value, sol_type)
+        if size is not None and len(ret) != size:
+            raise _rejected(sol_type, f'is {len(ret)} bytes long')
+        # bytes are sent as 0x prefixed hex strings
+        return '0x' + ret.hex()
+    return check
+
+
+def _array_checker(element_check, length):
+    def check(value):
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise ValueError(f'{value!r} is not a JSON array')
+        if not isinstance(value, (list, tuple)):
+            raise ValueError(f'expected a list, got {type(value).__name__}')
+        if length is not None and len(value) != length:
+            raise ValueError(f'expected {length} elements, got {len(value)}')
+        checked = list()
+        for idx, element in enumerate(value):
+            try:
+                checked.append(element_check(element))
+            except ValueError as e:
+                raise ValueError(f'element {idx}: {e}')
+        return checked
+    return check
+
+
+def compile_type_checker(sol_type):
+    """
+    :param sol_type : Solidity type from an ABI, for eg. 'uint256', 'address[]' or 'bytes32'
+    :return: callable returning the coerced value or raising ValueError. Types it does not know, like tuples, are not checked
+    """
+    # the conversions are ABIHelper's, which loads eth_utils. Only needed once validation is turned on
+    from .EVContractUtils import ABIHelper
+    m = _ARRAY_TYPE.match(sol_type)
+    if m:
+        return _array_checker(compile_type_checker(m.group(1)), int(m.group(2)) if m.group(2) else None)
+    if sol_type == 'array':
+        return _array_checker(_passthrough, None)
+    if sol_type == 'integer':
+        return _int_checker(ABIHelper.first_pass_check_int, sol_type, True, None)
+    m = _INT_TYPE.match(sol_type)
+    if m:
+        return _int_checker(ABIHelper.first_pass_check_int, sol_type, not m.group(1), int(m.group(2)) if m.group(2) else 256)
+    if sol_type == 'bool':
+        return _bool_checker(ABIHelper.first_pass_check_bool)
+    if sol_type == 'address':
+        return _address_checker(ABIHelper.first_pass_check_address)
+    if sol_type == 'string':
+        return _string_checker(ABIHelper.first_pass_check_string)
+    if sol_type == 'byte':
+        return _bytes_checker(ABIHelper.first_pass_check_byte, sol_type, 1)
+    m = _BYTES_TYPE.match(sol_type)
+    if m:
+        return _bytes_checker(ABIHelper.first_pass_check_byte, sol_type, int(m.group(1)) if m.group(1) else None)
+    return _passthrough
+
+
+def path_segment(value):
+    """
+    :return: value as sent in the URL path of a read call, before percent-encoding
+    """
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (list, tuple)):
+        return json.dumps(value)
+    return str(value)
+
+
+class FunctionValidator(object):
+    __slots__ = ('fn_name', 'request_type', 'params', '_checkers')
+
+    def __init__(self, fn_name, request_type, params, types):
+        """
+        :param params : parameter names in call order
+        :param types : Solidity type of each parameter, or a SCHEMA_TO_SOLIDITY value
+        """
+        self.fn_name = fn_name
+        self.request_type = request_type
+        self.params = tuple(params)
+        self._checkers = tuple(compile_type_checker(t) for t in types)
+
+    def read_args(self, params_args):
+        """
+        :return: tuple of the arguments of a read call, converted to their URL path form
+        """
+        if len(params_args) != len(self.params):
+            raise EVValidationError(self.fn_name, {'*': f'expected {len(self.params)} arguments, got {len(params_args)}'})
+        errors = dict()
+        checked = list()
+        for param, check, value in zip(self.params, self._checkers, params_args):
+            try:
+                checked.append(path_segment(check(value)))
+            except ValueError as e:
+                errors[param] = str(e)
+        if errors:
+            raise EVValidationError(self.fn_name, errors)
+        return tuple(checked)
+
+    def write_args(self, params_kwargs):
+        """
+        :return: new dict of the coerced arguments of a write call
+        """
+        errors = {p: 'unexpected argument' for p in params_kwargs if p not in self.params}
+        checked = dict()
+        for param, check in zip(self.params, self._checkers):
+            if param not in params_kwargs:
+                errors[param] = 'missing argument'
+                continue
+            try:
+                checked[param] = check(params_kwargs[param])
+            except ValueError as e:
+                errors[param] = str(e)
+        if errors:
+            raise EVValidationError(self.fn_name, errors)
+        return checked
+
+
+def _abi_types(abi, fn_name, params):
+    """
+    :return: Solidity types of the ABI function matching the name and parameters, or None if there is no single match
+    """
+    candidates = [
+        e for e in abi
+        if e.get('type', 'function') == 'function' and e.get('name') == fn_name and len(e.get('inputs', [])) == len(params)
+    ]
+    if len(candidates) != 1:
+        return None
+    inputs = candidates[0]['inputs']
+    by_name = {i['name']: i['type'] for i in inputs}
+    if all(p in by_name for p in params):
+        return [by_name[p] for p in params]
+    return [i['type'] for i in inputs]
+
+
+def compile_validators(fn_specs, abi=None):
+    """
+    :param fn_specs : function specs of a contract handle, as returned by parse_openapi_spec()
+    :param abi : optionally, the contract ABI. Its Solidity types give exact integer ranges, address and byte lengths
+    :return: mapping of function name to FunctionValidator
+    """
+    validators = dict()
+    for fn_name, fn_spec in fn_specs.items():
+        params = fn_spec['params']
+        types = _abi_types(abi, fn_name, params) if abi else None
+        if types is None:
+            types = [SCHEMA_TO_SOLIDITY.get(t, '') for t in fn_spec.get('types') or [''] * len(params)]
+        validators[fn_name] = FunctionValidator(fn_name, fn_spec['request_type'], params, types)
+    return validators
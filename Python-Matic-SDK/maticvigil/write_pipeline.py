@@ -0,0 +1,135 @@
+import queue
+import threading
+import logging
+from concurrent.futures import Future
+from .exceptions import EVBaseException
+
+ev_logger = logging.getLogger('EVCore')
+
+DEFAULT_SUBMITTERS = 4
+DEFAULT_MAX_QUEUE_SIZE = 1000
+
+_STOP = object()
+
+
+class WritePipeline(object):
+    """
+    Pipelines writes to a contract: calls are queued on a bounded submission queue
+    and sent to the MaticVigil API by several submitter threads at once.
+    Every submitted write gets a concurrent.futures.Future resolving to its transaction hash,
+    or to the exception raised by the API call.
+    :param contract : EVContract handle generated by EVCore.generate_contract_sdk()
+    :param submitters : number of writes sent concurrently
+    :param max_queue_size : number of writes that can wait in the queue before submit() blocks
+    """
+    def __init__(self, contract, submitters=DEFAULT_SUBMITTERS, max_queue_size=DEFAULT_MAX_QUEUE_SIZE):
+        self._contract = contract
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        # close() waits on it for the submit() calls already past the closed check to finish queueing
+        self._admitted = threading.Condition(self._lock)
+        self._submitting = 0
+        self._closed = False
+        self._stats = {'submitted': 0, 'succeeded': 0, 'failed': 0}
+        self._threads = list()
+        for idx in range(submitters):
+            t = threading.Thread(
+                target=self._run,
+                name=f'EVWritePipeline-{contract.contract_address}-{idx}',
+                daemon=True
+            )
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, fn_name, block=True, timeout=None, **fn_kwargs):
+        """
+        Queues a call to a write function of the contract
+        :param fn_name : name of the contract function, for eg. 'addPost'
+        :param block : wait for room in the queue when it is full. If False, fail right away instead
+        :param timeout : seconds to wait for room in the queue when block is True
+        :param fn_kwargs : arguments to the contract function
+        :return: Future resolving to the transaction hash
+        """
+        fn_spec = self._contract._fn_specs.get(fn_name)
+        if fn_spec is None or fn_spec['request_type'] != 'post':
+            raise EVBaseException(f'{fn_name} is not a write function on contract {self._contract.contract_address}')
+        # invalid arguments fail here rather than through the future
+        fn_kwargs = self._contract._validated_write_args(fn_name, fn_kwargs)
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise EVBaseException('Write pipeline is closed')
+            self._submitting += 1
+        try:
+            # not under the lock, a put waiting for room in the queue must not hold up the submitter threads
+            self._queue.put((future, getattr(self._contract, fn_name), fn_kwargs), block=block, timeout=timeout)
+        except queue.Full:
+            raise EVBaseException('Write pipeline queue is full')
+        else:
+            with self._lock:
+                self._stats['submitted'] += 1
+        finally:
+            with self._lock:
+                self._submitting -= 1
+                if not self._submitting:
+                    self._admitted.notify_all()
+        return future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                future, fn, fn_kwargs = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    r = fn(**fn_kwargs)
+                except Exception as e:
+                    ev_logger.debug('Pipelined write failed')
+                    ev_logger.debug(e)
+                    with self._lock:
+                        self._stats['failed'] += 1
+                    future.set_exception(e)
+                else:
+                    with self._lock:
+                        self._stats['succeeded'] += 1
+                    future.set_result(r[0]['txHash'])
+            finally:
+                self._queue.task_done()
+
+    @property
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        s['queued'] = self._queue.qsize()
+        return s
+
+    def join(self):
+        """ blocks until every write submitted so far has been sent """
+        self._queue.join()
+
+    def close(self, wait=True):
+        """
+        Stops accepting writes. The writes already queued, or being queued by a concurrent submit(), are still sent.
+        :param wait : block until the submitter threads have drained the queue and exited
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            # the stop markers go after every admitted write, so that none is left unresolved in the queue
+            while self._submitting:
+                self._admitted.wait()
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
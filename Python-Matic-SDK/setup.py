@@ -16,12 +16,16 @@ install_requires = [
     'eth_account == 0.4.0',
     'eth_utils == 1.9.0',
     'requests == 2.22.0',
-    'tenacity == 6.1.0',
     'tornado == 6.0.4',
     "solidity_parser",
     "antlr4-python3-runtime>=4.7,<4.8"
 ]
 
+extras_require = {
+    'async': ['aiohttp >= 3.6'],
+    'speedups': ['orjson']
+}
+
 classifiers = [
     'License :: OSI Approved :: MIT License',
     'Development Status :: 4 - Beta',
@@ -50,5 +54,6 @@ setup(name='maticvigil-sdk',
       license="MIT",
       packages=['maticvigil'],
       install_requires=install_requires,
+      extras_require=extras_require,
       include_package_data=True
       )
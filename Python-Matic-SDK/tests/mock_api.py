@@ -0,0 +1,72 @@
+"""
+Shared fixture of the behavior tests: the stand-in MaticVigil API of benchmarks/mock_api_server.py,
+started on a free port once per test class. The SDK is pointed at it through in-memory settings.
+"""
+import hashlib
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+SDK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, SDK_DIR)
+sys.path.insert(0, os.path.join(SDK_DIR, 'benchmarks'))
+
+from mock_api_server import MockServerThread
+
+MICROBLOG_SOL = os.path.join(SDK_DIR, 'examples', 'microblog.sol')
+
+
+def closed_port_url(scheme='http', path='/'):
+    """
+    :return: URL of a local port nothing listens on, connection attempts are refused right away
+    """
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return f'{scheme}://127.0.0.1:{port}{path}'
+
+
+class MockAPITestCase(unittest.TestCase):
+    latency = 0.0
+    confirm_delay = 0.1
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockServerThread(latency=cls.latency, confirm_delay=cls.confirm_delay)
+        cls.api = cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def settings(self, **extra):
+        settings = {
+            'PRIVATEKEY': '0x' + hashlib.sha256(b'maticvigil mock api').hexdigest(),
+            'INTERNAL_API_ENDPOINT': self.api.internal_api_endpoint
+        }
+        settings.update(extra)
+        return settings
+
+    def evcore(self, settings=None, **kwargs):
+        from maticvigil.EVCore import EVCore
+        return EVCore(settings=settings if settings is not None else self.settings(), **kwargs)
+
+    def deploy_microblog(self, evc):
+        return evc.deploy(MICROBLOG_SOL, 'Microblog', {'_ownerName': 'owner', '_blogTitle': 'title'})
+
+
+class SettingsDirTestCase(MockAPITestCase):
+    """
+    Points MATICVIGIL_SETTINGS_DIR at an empty temporary directory for the duration of each test
+    """
+    def setUp(self):
+        self.settings_dir = tempfile.mkdtemp()
+        environ = mock.patch.dict(os.environ, {'MATICVIGIL_SETTINGS_DIR': self.settings_dir})
+        environ.start()
+        self.addCleanup(environ.stop)
+        self.addCleanup(shutil.rmtree, self.settings_dir, True)
@@ -0,0 +1,61 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from bench_abi_index import make_abi
+from maticvigil.EVContractUtils import ABIParser
+from maticvigil.abi_index import ABIIndex
+
+MAPPINGS = ('_events_mapping', '_functions_mapping', '_functions_name_to_hash', '_functions_selector_to_hash',
+            '_constructor_mapping')
+
+
+class LegacyMappingsTest(unittest.TestCase):
+    def test_mappings_are_built_once(self):
+        parser = ABIParser(make_abi(4))
+        self.assertEqual([getattr(parser, name) for name in MAPPINGS], [dict()] * len(MAPPINGS))
+        parser.load_abi()
+        for name in MAPPINGS:
+            mapping = getattr(parser, name)
+            self.assertTrue(mapping, name)
+            self.assertIs(getattr(parser, name), mapping, name)
+        fn_hash = parser._functions_name_to_hash['balanceOf1']
+        self.assertEqual(parser._functions_mapping[fn_hash]['stateMutability'], 'view')
+        self.assertEqual(parser._functions_selector_to_hash[fn_hash[2:10]], fn_hash)
+
+    def test_load_abi_rebuilds_mappings(self):
+        parser = ABIParser(make_abi(4))
+        parser.load_abi()
+        functions = parser._functions_mapping
+        parser._abi_def = make_abi(2)
+        parser.load_abi()
+        self.assertIsNot(parser._functions_mapping, functions)
+        self.assertEqual(len(parser._functions_mapping), 2)
+
+
+class ReadWriteSplitTest(unittest.TestCase):
+    def test_pure_functions_are_getters(self):
+        abi = [
+            {'type': 'function', 'name': 'total', 'stateMutability': 'view', 'inputs': [], 'outputs': []},
+            {'type': 'function', 'name': 'add', 'stateMutability': 'pure', 'inputs': [], 'outputs': []},
+            {'type': 'function', 'name': 'legacy', 'constant': True, 'inputs': [], 'outputs': []},
+            {'type': 'function', 'name': 'set', 'stateMutability': 'nonpayable', 'inputs': [], 'outputs': []},
+            {'type': 'function', 'name': 'fund', 'stateMutability': 'payable', 'inputs': [], 'outputs': []}
+        ]
+        index = ABIIndex(abi)
+        self.assertEqual(sorted(fn.name for fn in index.getters()), ['add', 'legacy', 'total'])
+        self.assertEqual(sorted(fn.name for fn in index.writers()), ['fund', 'set'])
+        for fn in index.functions_by_name.values():
+            self.assertEqual(fn in index.getters(), fn.is_read)
+        parser = ABIParser(abi)
+        parser.load_abi()
+        # the legacy mappings stay view only
+        self.assertEqual(sorted(parser._only_getters_by_name()), ['legacy', 'total'])
+        self.assertEqual(sorted(parser._only_writers_by_name()), ['add', 'fund', 'set'])
+        self.assertEqual(len(parser._only_getters()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
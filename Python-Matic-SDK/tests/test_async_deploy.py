@@ -0,0 +1,50 @@
+import asyncio
+import unittest
+
+from mock_api import MockAPITestCase, MICROBLOG_SOL
+from maticvigil.AsyncEVCore import AsyncEVCore
+
+
+class AsyncDeployManyTest(MockAPITestCase):
+    latency = 0.02
+
+    def deploy_many(self, n, **kwargs):
+        """
+        :return: tuple of (BatchResult, highest number of deploys in flight)
+        """
+        in_flight = [0, 0]
+
+        async def run():
+            evc = await AsyncEVCore.create(settings=self.settings())
+            submit_deploy = evc._submit_deploy
+
+            async def counted(*args):
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+                try:
+                    return await submit_deploy(*args)
+                finally:
+                    in_flight[0] -= 1
+
+            evc._submit_deploy = counted
+            try:
+                return await evc.deploy_many(MICROBLOG_SOL, 'Microblog',
+                                             [{'_ownerName': f'o{i}', '_blogTitle': 't'} for i in range(n)], **kwargs)
+            finally:
+                await evc.close()
+
+        return asyncio.run(run()), in_flight[1]
+
+    def test_deploys_are_bounded_by_default(self):
+        r, peak = self.deploy_many(12)
+        self.assertEqual(r.errors, [])
+        self.assertEqual(len({d['contract'] for d in r}), 12)
+        self.assertEqual(peak, 4)
+
+    def test_max_concurrency(self):
+        self.assertEqual(self.deploy_many(6, max_concurrency=2)[1], 2)
+        self.assertEqual(self.deploy_many(6, max_concurrency=None)[1], 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import asyncio
+import time
+import unittest
+
+from mock_api import MockAPITestCase, MICROBLOG_SOL
+from maticvigil.AsyncEVCore import AsyncEVCore, AsyncEVContract
+from maticvigil.async_http_helper import AsyncHTTPTransport
+
+
+class AsyncEVCoreTest(MockAPITestCase):
+    latency = 0.05
+
+    def run_with_contract(self, body, **transport_kwargs):
+        """
+        :param body : coroutine function taking the AsyncEVCore and a handle of a freshly deployed microblog contract
+        """
+        async def run():
+            async with AsyncHTTPTransport(**transport_kwargs) as transport:
+                evc = await AsyncEVCore.create(settings=self.settings(), transport=transport)
+                deployed = await evc.deploy(MICROBLOG_SOL, 'Microblog', {'_ownerName': 'owner', '_blogTitle': 'title'})
+                contract = await evc.generate_contract_sdk(deployed['contract'], 'Microblog')
+                return await body(evc, contract)
+        return asyncio.run(run())
+
+    def test_read_and_write(self):
+        async def body(evc, contract):
+            self.assertIsInstance(contract, AsyncEVContract)
+            await contract.changeBlogTitle(_blogTitle='async')
+            return await contract.blogTitle()
+
+        self.assertEqual(self.run_with_contract(body)['data'][0]['string'], 'async')
+
+    def test_reads_run_concurrently_on_one_loop(self):
+        async def body(evc, contract):
+            begin = time.perf_counter()
+            await asyncio.gather(*[contract.getPostId(str(i)) for i in range(20)])
+            return time.perf_counter() - begin
+
+        # 20 sequential reads take at least a second
+        self.assertLess(self.run_with_contract(body), 0.5)
+
+    def test_max_concurrency_bounds_requests_in_flight(self):
+        async def body(evc, contract):
+            begin = time.perf_counter()
+            await asyncio.gather(*[contract.getPostId(str(i)) for i in range(4)])
+            return time.perf_counter() - begin
+
+        self.assertGreaterEqual(self.run_with_contract(body, max_concurrency=1), 4 * self.latency)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import hashlib
+import unittest
+
+from mock_api import MockAPITestCase
+from maticvigil.auth import AuthPayloadCache, get_default_auth_cache
+
+PRIVATE_KEY = '0x' + hashlib.sha256(b'auth payload cache').hexdigest()
+OTHER_KEY = '0x' + hashlib.sha256(b'another account').hexdigest()
+
+
+class AuthPayloadCacheTest(unittest.TestCase):
+    def test_payload_is_signed_once(self):
+        cache = AuthPayloadCache()
+        first = cache.payload(PRIVATE_KEY, 'Trying to login')
+        first['code'] = 'extended by the caller'
+        second = cache.payload(PRIVATE_KEY, 'Trying to login')
+        self.assertEqual(second, {'msg': 'Trying to login', 'sig': first['sig']})
+        self.assertEqual(cache.stats, {'hits': 1, 'signed': 1, 'keys': 1})
+
+    def test_signature_recovers_the_account(self):
+        from eth_account import Account
+        from eth_account.messages import encode_defunct
+        payload = AuthPayloadCache().payload(PRIVATE_KEY, 'Trying to deploy')
+        signer = Account.recover_message(encode_defunct(text='Trying to deploy'), signature=payload['sig'])
+        self.assertEqual(signer, Account.from_key(PRIVATE_KEY).address)
+
+    def test_key_forms_share_payloads(self):
+        cache = AuthPayloadCache()
+        cache.payload(PRIVATE_KEY, 'Trying to login')
+        cache.payload(PRIVATE_KEY[2:].upper(), 'Trying to login')
+        cache.payload(bytes.fromhex(PRIVATE_KEY[2:]), 'Trying to login')
+        self.assertEqual(cache.stats['signed'], 1)
+
+    def test_least_recently_used_keys_are_dropped(self):
+        cache = AuthPayloadCache(max_keys=1)
+        cache.payload(PRIVATE_KEY, 'Trying to login')
+        cache.payload(OTHER_KEY, 'Trying to login')
+        cache.payload(PRIVATE_KEY, 'Trying to login')
+        self.assertEqual(cache.stats, {'hits': 0, 'signed': 3, 'keys': 1})
+
+    def test_invalidate(self):
+        cache = AuthPayloadCache()
+        cache.payload(PRIVATE_KEY, 'Trying to login')
+        cache.payload(OTHER_KEY, 'Trying to login')
+        cache.invalidate(PRIVATE_KEY)
+        cache.payload(PRIVATE_KEY, 'Trying to login')
+        cache.payload(OTHER_KEY, 'Trying to login')
+        self.assertEqual(cache.stats, {'hits': 1, 'signed': 3, 'keys': 2})
+
+
+class SignedCallsTest(MockAPITestCase):
+    def test_repeated_logins_and_deploys_sign_once(self):
+        settings = self.settings(PRIVATEKEY='0x' + hashlib.sha256(b'signed calls').hexdigest())
+        evc = self.evcore(settings=settings)
+        self.deploy_microblog(evc)
+        signed = get_default_auth_cache().stats['signed']
+        self.assertTrue(self.evcore(settings=settings).account)
+        self.deploy_microblog(evc)
+        self.assertEqual(get_default_auth_cache().stats['signed'], signed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_api import MockAPITestCase
+from maticvigil.batch import BatchResult, normalize_read_call
+from maticvigil.exceptions import EVBaseException
+
+
+class NormalizeReadCallTest(unittest.TestCase):
+    def test_call_forms(self):
+        self.assertEqual(normalize_read_call('blogTitle'), ('blogTitle', ()))
+        self.assertEqual(normalize_read_call(('getPostId', '1')), ('getPostId', ('1',)))
+        self.assertEqual(normalize_read_call(('getPostId', ['1'])), ('getPostId', ('1',)))
+
+
+class BatchReadTest(MockAPITestCase):
+    latency = 0.05
+
+    def setUp(self):
+        self.evc = self.evcore()
+        self.contract = self.evc.generate_contract_sdk(self.deploy_microblog(self.evc)['contract'], 'Microblog')
+
+    def test_reads_run_concurrently(self):
+        r = self.contract.batch_read([('getPostId', str(i)) for i in range(16)])
+        self.assertIsInstance(r, BatchResult)
+        self.assertTrue(r.ok)
+        self.assertEqual(len(r), 16)
+        # 16 sequential reads take at least 0.8s
+        self.assertLess(r.elapsed, 0.4)
+
+    def test_failed_calls_are_kept_in_place(self):
+        r = self.contract.batch_read(['blogTitle', 'addPost', 'noSuchFunction', ('getPostId', '0')])
+        self.assertFalse(r.ok)
+        self.assertEqual([idx for idx, _ in r.errors], [1, 2])
+        self.assertIsInstance(r[1], EVBaseException)
+        self.assertEqual(r[0]['data'][0]['string'], 'TheBlog')
+        self.assertIn('data', r[3])
+
+    def test_reads_across_contracts_on_a_shared_executor(self):
+        other = self.evc.generate_contract_sdk(self.deploy_microblog(self.evc)['contract'], 'Microblog')
+        other.changeBlogTitle(_blogTitle='other')
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            evc = self.evcore(executor=executor)
+            r = evc.batch_read([(self.contract, 'blogTitle'), (other, 'blogTitle')])
+        self.assertEqual([each['data'][0]['string'] for each in r], ['TheBlog', 'other'])
+
+    def test_async_batch_read(self):
+        from maticvigil.AsyncEVCore import AsyncEVCore
+        contract_address = self.contract.contract_address
+
+        async def run():
+            evc = await AsyncEVCore.create(settings=self.settings())
+            try:
+                contract = await evc.generate_contract_sdk(contract_address, 'Microblog')
+                return await contract.batch_read(['blogTitle', 'addPost', ('getPostId', '0')])
+            finally:
+                await evc.close()
+
+        r = asyncio.run(run())
+        self.assertEqual([idx for idx, _ in r.errors], [1])
+        self.assertEqual(r[0]['data'][0]['string'], 'TheBlog')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from mock_api import SDK_DIR
+
+
+class EndToEndBenchmarkSmokeTest(unittest.TestCase):
+    def test_run_benchmarks_completes(self):
+        out_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, out_dir, ignore_errors=True)
+        out_file = os.path.join(out_dir, 'results.json')
+        subprocess.run(
+            [sys.executable, os.path.join('benchmarks', 'run_benchmarks.py'), '--concurrency', '1,4', '--requests', '5',
+             '--startup-runs', '1', '--sdk-runs', '1', '--deploy-runs', '1', '--async', '--json', out_file],
+            cwd=SDK_DIR, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=120
+        )
+        with open(out_file) as f:
+            results = json.load(f)
+        for name in ('read x4', 'write x4', 'async read x4', 'deploy'):
+            self.assertEqual(results[name]['n'], 1 if name == 'deploy' else 5, name)
+        self.assertEqual(set(results['generate_contract_sdk']),
+                         {'spec downloaded', 'spec from disk cache', 'generated module'})
+
+
+if __name__ == '__main__':
+    unittest.main()
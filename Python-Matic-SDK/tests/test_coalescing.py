@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import unittest
+
+from mock_api import MockAPITestCase
+from maticvigil.async_http_helper import AsyncHTTPTransport
+from maticvigil.http_helper import HTTPTransport
+
+
+class ReadCoalescingTest(MockAPITestCase):
+    # identical reads overlap for long enough to be coalesced
+    latency = 0.1
+
+    def setUp(self):
+        evc = self.evcore()
+        self.contract_address = self.deploy_microblog(evc)['contract']
+
+    def concurrent_reads(self, transport, n=8):
+        """
+        :return: tuple of (read results, requests served for them)
+        """
+        contract = self.evcore(transport=transport).generate_contract_sdk(self.contract_address, 'Microblog')
+        results = list()
+        readers = [threading.Thread(target=lambda: results.append(contract.blogTitle())) for _ in range(n)]
+        requests_before = self.api.requests
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+        return results, self.api.requests - requests_before
+
+    def test_reads_are_not_coalesced_by_default(self):
+        self.assertIsNone(HTTPTransport().read_flight)
+        self.assertIsNone(AsyncHTTPTransport().read_flight)
+        results, requests = self.concurrent_reads(HTTPTransport())
+        self.assertEqual(requests, 8)
+        # every caller gets its own result
+        self.assertEqual(len({id(r) for r in results}), 8)
+
+    def test_opt_in_coalescing(self):
+        transport = HTTPTransport(coalesce_reads=True)
+        results, requests = self.concurrent_reads(transport)
+        self.assertEqual(requests, 1)
+        self.assertEqual(transport.read_flight.stats['coalesced'], 7)
+        self.assertEqual(len({id(r) for r in results}), 1)
+
+    def test_opt_in_async_coalescing(self):
+        from maticvigil.AsyncEVCore import AsyncEVCore
+
+        async def run():
+            async with AsyncHTTPTransport(coalesce_reads=True) as transport:
+                evc = await AsyncEVCore.create(settings=self.settings(), transport=transport)
+                contract = await evc.generate_contract_sdk(self.contract_address, 'Microblog')
+                requests_before = self.api.requests
+                await asyncio.gather(*[contract.blogTitle() for _ in range(8)])
+                return self.api.requests - requests_before
+
+        self.assertEqual(asyncio.run(run()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import ast
+import contextlib
+import io
+import shutil
+import tempfile
+import unittest
+
+from mock_api import MockAPITestCase
+from maticvigil.codegen import ContractCodegen, generate_module_source
+from maticvigil.exceptions import EVBaseException
+
+INJECTION = 'x"""\nimport os; print("INJECTED")\n"""'
+
+
+class CodegenEscapingTest(MockAPITestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.evc = self.evcore(codegen=ContractCodegen(self.output_dir))
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def test_app_name_is_not_executed(self):
+        contract_address = self.deploy_microblog(self.evc)['contract']
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            contract = self.evc.generate_contract_sdk(contract_address, INJECTION)
+        self.assertNotIn('INJECTED', stdout.getvalue())
+        module = self.evc.codegen.load(self.evc.account['api_prefix'], contract_address)
+        self.assertEqual(module.APP_NAME, INJECTION)
+        self.assertIn(INJECTION, module.__doc__)
+        self.assertIn('string', contract.blogTitle()['data'][0])
+
+    def test_spec_parameter_names_are_not_executed(self):
+        contract_address = self.deploy_microblog(self.evc)['contract']
+        api_prefix = self.evc.account['api_prefix']
+        fn_specs = {'blogTitle': {'method_url': f'{api_prefix}/contract/{contract_address}/blogTitle',
+                                  'request_type': 'get', 'params': [INJECTION]}}
+        spec = {'paths': {'/blogTitle': {'get': {'parameters': [{'name': INJECTION, 'schema': {'type': INJECTION}}]}}}}
+        tree = ast.parse(generate_module_source(spec, fn_specs, contract_address, api_prefix, 'Microblog'))
+        imports = [node for node in ast.walk(tree) if isinstance(node, (ast.Import, ast.ImportFrom))]
+        self.assertEqual([node.module for node in imports], ['maticvigil.EVCore'])
+        calls = {node.func.attr for node in ast.walk(tree) if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)}
+        self.assertEqual(calls, {'__init__', '_read'})
+
+    def test_invalid_addresses_are_rejected(self):
+        for contract_address in ('../../etc/passwd', '0x' + 'g' * 40, '0x1234', INJECTION):
+            with self.assertRaises(EVBaseException):
+                self.evc.codegen.module_path('https://api', contract_address)
+            with self.assertRaises(EVBaseException):
+                self.evc.generate_contract_sdk(contract_address, 'Microblog')
+
+
+if __name__ == '__main__':
+    unittest.main()
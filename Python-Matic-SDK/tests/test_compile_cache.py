@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from mock_api import MockAPITestCase, MICROBLOG_SOL
+from maticvigil.compile_cache import CompileCache
+
+ENDPOINT = 'https://mainnet.maticvigil.com/api'
+SOURCES = {'sources': {'ev-py-sdk/a.sol': {'content': 'contract A {}'}}, 'sourceFile': 'ev-py-sdk/a.sol'}
+ABI = [{'type': 'constructor', 'inputs': []}]
+
+
+class CompileCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+
+
+class CompileCacheTest(CompileCacheTestCase):
+    def test_entries_are_content_addressed(self):
+        key = CompileCache.key_for(ENDPOINT, SOURCES)
+        self.assertEqual(key, CompileCache.key_for(ENDPOINT, {'sourceFile': SOURCES['sourceFile'], 'sources': dict(SOURCES['sources'])}))
+        self.assertNotEqual(key, CompileCache.key_for('http://127.0.0.1/api', SOURCES))
+        changed = {'sources': {'ev-py-sdk/a.sol': {'content': 'contract A { }'}}, 'sourceFile': 'ev-py-sdk/a.sol'}
+        self.assertNotEqual(key, CompileCache.key_for(ENDPOINT, changed))
+
+    def test_hit_and_miss(self):
+        cache = CompileCache(self.cache_dir)
+        compiled = list()
+
+        def compile_sources():
+            compiled.append(1)
+            return ABI
+
+        self.assertEqual(cache.load(ENDPOINT, SOURCES, compile_sources), ABI)
+        self.assertEqual(CompileCache(self.cache_dir).load(ENDPOINT, SOURCES, compile_sources), ABI)
+        self.assertEqual(len(compiled), 1)
+        self.assertEqual(cache.stats, {'hits': 0, 'misses': 1, 'evictions': 0})
+
+    def test_corrupted_entry_is_a_miss(self):
+        cache = CompileCache(self.cache_dir)
+        key = CompileCache.key_for(ENDPOINT, SOURCES)
+        cache.put(key, ABI)
+        with open(cache.path_for(key), 'w') as f:
+            f.write('{"abi": [')
+        self.assertIsNone(cache.get(key))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = CompileCache(self.cache_dir, max_bytes=None)
+        keys = [CompileCache.key_for(ENDPOINT, {'sources': {str(i): {'content': ''}}, 'sourceFile': str(i)}) for i in range(3)]
+        for idx, key in enumerate(keys):
+            cache.put(key, ABI)
+            past = time.time() - 100 + idx
+            os.utime(cache.path_for(key), (past, past))
+        # using an entry marks it as recently used
+        self.assertEqual(cache.get(keys[0]), ABI)
+        entry_size = os.path.getsize(cache.path_for(keys[0]))
+        self.assertEqual(cache.evict(2 * entry_size), 1)
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(cache.get(keys[0]), ABI)
+        self.assertEqual(cache.stats['evictions'], 1)
+
+
+class DeployCompileCacheTest(MockAPITestCase, CompileCacheTestCase):
+    def requests_per_deploy(self, evc, contract_file):
+        requests_before = self.api.requests
+        evc.deploy(contract_file, 'Microblog', {'_ownerName': 'owner', '_blogTitle': 'title'})
+        return self.api.requests - requests_before
+
+    def test_unchanged_sources_skip_compile(self):
+        evc = self.evcore(compile_cache=CompileCache(self.cache_dir))
+        # /compile then /deploy
+        self.assertEqual(self.requests_per_deploy(evc, MICROBLOG_SOL), 2)
+        self.assertEqual(self.requests_per_deploy(evc, MICROBLOG_SOL), 1)
+        self.assertEqual(evc.compile_cache.stats, {'hits': 1, 'misses': 1, 'evictions': 0})
+        source_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source_dir, True)
+        changed = os.path.join(source_dir, 'microblog.sol')
+        with open(MICROBLOG_SOL) as f, open(changed, 'w') as g:
+            g.write(f.read() + '\n// changed\n')
+        self.assertEqual(self.requests_per_deploy(evc, changed), 2)
+
+    def test_every_deploy_is_compiled_by_default(self):
+        evc = self.evcore()
+        self.assertIsNone(evc.compile_cache)
+        self.assertEqual(self.requests_per_deploy(evc, MICROBLOG_SOL), 2)
+        self.assertEqual(self.requests_per_deploy(evc, MICROBLOG_SOL), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
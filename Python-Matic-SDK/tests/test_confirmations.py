@@ -0,0 +1,125 @@
+import gc
+import threading
+import time
+import unittest
+
+from mock_api import MockAPITestCase, closed_port_url
+from maticvigil import confirmations
+from maticvigil.confirmations import ConfirmationListener, get_listener, ws_endpoint, PendingTransaction
+from maticvigil.exceptions import EVBaseException, EVConfirmationTimeout
+
+
+def write_payload(tx_hash, payload_type='contractmon'):
+    return {'type': payload_type, 'txHash': tx_hash, 'status': 1}
+
+
+class ConfirmationResolutionTest(MockAPITestCase):
+    confirm_delay = 0.2
+
+    def test_deploy_and_write_resolve_over_websocket(self):
+        evc = self.evcore(track_confirmations=True)
+        deployment = self.deploy_microblog(evc)
+        self.assertEqual(deployment.wait(timeout=5)['type'], 'otm')
+        contract = evc.generate_contract_sdk(deployment.contract_address, 'Microblog')
+        tx = contract.addPost(title='t', body='b', url='u', photo='p')
+        self.assertIsInstance(tx, PendingTransaction)
+        self.assertEqual(tx.wait(timeout=5)['txHash'], tx.tx_hash)
+        self.assertEqual(tx.wait_event('NewPost', timeout=5)['event_data']['title'], 't')
+
+    def test_wait_times_out(self):
+        evc = self.evcore(track_confirmations=True)
+        contract = evc.generate_contract_sdk(self.deploy_microblog(evc).contract_address, 'Microblog')
+        tx = contract.changeBlogTitle(_blogTitle='x')
+        with self.assertRaises(EVConfirmationTimeout):
+            tx.wait(timeout=0.01)
+        # a timed out wait can be retried
+        self.assertEqual(tx.wait(timeout=5)['type'], 'contractmon')
+
+    def test_confirmations_are_off_by_default(self):
+        evc = self.evcore(settings=self.settings(WS_ENDPOINT=closed_port_url('ws', '/ws')))
+        contract = evc.generate_contract_sdk(self.deploy_microblog(evc)['contract'], 'Microblog')
+        tx = contract.changeBlogTitle(_blogTitle='x')
+        self.assertIsInstance(tx[0]['txHash'], str)
+        with self.assertRaises(EVBaseException):
+            tx.wait(timeout=0.01)
+        # no listener was created for the account
+        self.assertNotIn((ws_endpoint(evc._settings), evc._api_read_key), confirmations._listeners)
+
+    def test_writes_do_not_wait_for_an_unreachable_websocket(self):
+        evc = self.evcore(settings=self.settings(WS_ENDPOINT=closed_port_url('ws', '/ws')), track_confirmations=True)
+        contract = evc.generate_contract_sdk(self.deploy_microblog(evc)['contract'], 'Microblog')
+        begin = time.perf_counter()
+        txs = [contract.changeBlogTitle(_blogTitle=f'x{i}') for i in range(20)]
+        self.assertLess(time.perf_counter() - begin, 2.0)
+        listener = get_listener(evc._settings, evc._api_read_key)
+        self.assertEqual(listener.pending, 20)
+        del txs
+        gc.collect()
+        # nothing refers to the confirmations anymore, they are no longer tracked
+        self.assertEqual(listener.pending, 0)
+        listener.close()
+
+
+class ListenerPruningTest(unittest.TestCase):
+    # never started, payloads are dispatched by hand
+    def listener(self, **kwargs):
+        return ConfirmationListener(closed_port_url('ws', '/ws'), 'read-key', **kwargs)
+
+    def test_payload_before_track_is_kept(self):
+        listener = self.listener()
+        listener._dispatch(write_payload('0xAB'))
+        confirmation = listener.track('0xab')
+        self.assertTrue(confirmation.done)
+        self.assertEqual(listener.pending, 0)
+
+    def test_pending_ttl_expires_waiters(self):
+        listener = self.listener(pending_ttl=0.05)
+        confirmation = listener.track('0x01')
+        waiter_error = list()
+
+        def wait():
+            try:
+                confirmation.wait()
+            except EVConfirmationTimeout as e:
+                waiter_error.append(e)
+
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        time.sleep(0.1)
+        self.assertEqual(listener.pending, 0)
+        waiter.join(1)
+        self.assertFalse(waiter.is_alive())
+        self.assertTrue(confirmation.expired)
+        self.assertEqual(len(waiter_error), 1)
+        # a late payload does not resolve an expired confirmation
+        listener._dispatch(write_payload('0x01'))
+        self.assertFalse(confirmation.done)
+
+    def test_max_pending_expires_oldest(self):
+        listener = self.listener(max_pending=3)
+        tracked = [listener.track(f'0x{i:02x}') for i in range(5)]
+        self.assertEqual(listener.pending, 3)
+        self.assertEqual([c.expired for c in tracked], [True, True, False, False, False])
+        with self.assertRaises(EVConfirmationTimeout):
+            tracked[0].wait(timeout=1)
+
+    def test_dropped_handles_are_not_tracked(self):
+        listener = self.listener()
+        tx = PendingTransaction([{'txHash': '0x01'}], listener.track('0x01'))
+        self.assertEqual(listener.pending, 1)
+        del tx
+        gc.collect()
+        self.assertEqual(listener.pending, 0)
+        self.assertEqual(len(listener._pending), 0)
+
+    def test_resolved_confirmation_collects_events(self):
+        listener = self.listener()
+        confirmation = listener.track('0x01')
+        listener._dispatch(write_payload('0x01'))
+        listener._dispatch(dict(write_payload('0x01', 'event'), event_name='NewPost'))
+        self.assertEqual(confirmation.wait(timeout=1)['type'], 'contractmon')
+        self.assertEqual(confirmation.wait_event('NewPost', timeout=1)['event_name'], 'NewPost')
+
+
+if __name__ == '__main__':
+    unittest.main()
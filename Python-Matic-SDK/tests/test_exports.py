@@ -0,0 +1,49 @@
+import subprocess
+import sys
+import unittest
+
+from mock_api import SDK_DIR
+
+
+def run_isolated(code):
+    """
+    :return: stdout of code run in a fresh interpreter, so that nothing is imported yet
+    """
+    proc = subprocess.run([sys.executable, '-c', code], cwd=SDK_DIR, check=True, stdout=subprocess.PIPE,
+                          universal_newlines=True)
+    return proc.stdout.strip()
+
+
+class LazyExportsTest(unittest.TestCase):
+    def test_import_loads_no_heavy_dependency(self):
+        loaded = run_isolated('import sys, maticvigil; print(" ".join(sys.modules))').split()
+        for module in ('maticvigil.EVCore', 'requests', 'eth_account', 'eth_abi', 'asyncio'):
+            self.assertNotIn(module, loaded)
+
+    def test_every_export_resolves(self):
+        import maticvigil
+        for name, module_name in maticvigil._EXPORTS.items():
+            value = getattr(maticvigil, name)
+            self.assertEqual(value.__name__, name)
+            self.assertEqual(value.__module__, f'maticvigil.{module_name}')
+        self.assertEqual(set(maticvigil.__all__), set(maticvigil._EXPORTS))
+        with self.assertRaises(AttributeError):
+            maticvigil.NotExported
+
+    def test_evcore_is_the_class_whatever_the_import_order(self):
+        for imports in (
+                'from maticvigil import EVContract',
+                'import maticvigil.EVCore',
+                'import maticvigil.AsyncEVCore',
+                'from maticvigil.EVCore import EVContract',
+                'from maticvigil import EVCore; import maticvigil.AsyncEVCore'
+        ):
+            self.assertEqual(
+                run_isolated(f'{imports}; from maticvigil import EVCore; import maticvigil; print(EVCore, maticvigil.EVCore)'),
+                "<class 'maticvigil.EVCore.EVCore'> <class 'maticvigil.EVCore.EVCore'>",
+                imports
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
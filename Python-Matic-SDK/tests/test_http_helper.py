@@ -0,0 +1,76 @@
+import importlib
+import sys
+import unittest
+
+from mock_api import MockAPITestCase
+from maticvigil import json_codec
+from maticvigil.http_helper import HTTPTransport, get_default_transport
+
+
+class JSONCodecTest(unittest.TestCase):
+    def check_codec(self):
+        body = '{"success": true, "data": [{"string": "caf\u00e9 \u2713"}]}'.encode('utf-8')
+        self.assertEqual(json_codec.loads(body)['data'][0]['string'], 'caf\u00e9 \u2713')
+        with self.assertRaises(json_codec.JSONDecodeError):
+            json_codec.loads(b'<html>Bad Gateway</html>')
+        # both backends raise a ValueError, which callers catch
+        self.assertTrue(issubclass(json_codec.JSONDecodeError, ValueError))
+
+    def test_default_backend(self):
+        self.check_codec()
+
+    def test_standard_library_fallback(self):
+        orjson = sys.modules.get('orjson')
+        sys.modules['orjson'] = None
+        try:
+            importlib.reload(json_codec)
+            self.assertEqual(json_codec.JSON_BACKEND, 'json')
+            self.check_codec()
+        finally:
+            if orjson is None:
+                del sys.modules['orjson']
+            else:
+                sys.modules['orjson'] = orjson
+            importlib.reload(json_codec)
+
+
+class PooledTransportTest(MockAPITestCase):
+    def connections_opened(self, transport):
+        pools = transport.session.get_adapter(self.api.api_prefix).poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def test_sequential_calls_reuse_one_connection(self):
+        transport = HTTPTransport()
+        evc = self.evcore(transport=transport)
+        contract = evc.generate_contract_sdk(self.deploy_microblog(evc)['contract'], 'Microblog')
+        for _ in range(10):
+            contract.blogTitle()
+        contract.changeBlogTitle(_blogTitle='pooled')
+        self.assertEqual(contract.blogTitle()['data'][0]['string'], 'pooled')
+        self.assertEqual(self.connections_opened(transport), 1)
+
+    def test_responses_are_decoded_from_bytes(self):
+        evc = self.evcore()
+        contract = evc.generate_contract_sdk(self.deploy_microblog(evc)['contract'], 'Microblog')
+        contract.changeBlogTitle(_blogTitle='caf\u00e9 \u2713')
+        self.assertEqual(contract.blogTitle()['data'][0]['string'], 'caf\u00e9 \u2713')
+
+    def test_handles_share_the_transport_of_their_evcore(self):
+        transport = HTTPTransport()
+        evc = self.evcore(transport=transport)
+        contract = evc.generate_contract_sdk(self.deploy_microblog(evc)['contract'], 'Microblog')
+        self.assertIs(evc.transport, transport)
+        self.assertIs(contract._transport, transport)
+        self.assertIs(self.evcore().transport, get_default_transport())
+
+    def test_warm_up_opens_a_connection_per_origin(self):
+        transport = HTTPTransport()
+        transport.warm_up([self.api.internal_api_endpoint + '/login', self.api.api_prefix, None])
+        self.assertEqual(self.connections_opened(transport), 1)
+        requests_before = self.api.requests
+        transport.warm_up([self.api.api_prefix])
+        self.assertEqual(self.api.requests, requests_before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+from mock_api import MockAPITestCase
+from maticvigil import instrumentation
+from maticvigil.exceptions import EVHTTPError
+from maticvigil.instrumentation import LatencyHistogram, MetricsRecorder
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_percentiles_are_bucket_bounds(self):
+        histogram = LatencyHistogram(bounds=(0.1, 1.0))
+        self.assertIsNone(histogram.percentile(50))
+        for latency in (0.05, 0.05, 0.5, 5.0):
+            histogram.observe(latency)
+        self.assertEqual(histogram.percentile(50), 0.1)
+        self.assertEqual(histogram.percentile(75), 1.0)
+        self.assertEqual(histogram.percentile(99), float('inf'))
+        self.assertEqual(histogram.snapshot()['count'], 4)
+
+
+class InstrumentationTest(MockAPITestCase):
+    def setUp(self):
+        self.recorder = MetricsRecorder.install()
+
+    def tearDown(self):
+        instrumentation.remove_sink(self.recorder)
+
+    def test_no_metrics_without_sinks(self):
+        instrumentation.remove_sink(self.recorder)
+        self.assertFalse(instrumentation.enabled())
+        self.assertIsNone(instrumentation.start_call('deploy', 'post', self.api.internal_api_endpoint + '/deploy'))
+
+    def test_api_calls_are_recorded_per_operation(self):
+        evc = self.evcore()
+        contract = evc.generate_contract_sdk(self.deploy_microblog(evc)['contract'], 'Microblog')
+        contract.blogTitle()
+        contract.blogTitle()
+        contract.changeBlogTitle(_blogTitle='measured')
+        snapshot = self.recorder.snapshot()
+        for operation in ('login', 'compile', 'deploy', 'swagger', 'contract_write:changeBlogTitle'):
+            self.assertEqual(snapshot[operation]['calls'], 1, operation)
+        reads = snapshot['contract_read:blogTitle']
+        self.assertEqual((reads['calls'], reads['errors'], reads['status_codes']), (2, 0, {200: 2}))
+        self.assertEqual(reads['latency']['count'], 2)
+        self.assertGreater(reads['response_bytes'], 0)
+        self.assertGreater(snapshot['contract_write:changeBlogTitle']['request_bytes'], 0)
+
+    def test_failed_calls_are_recorded(self):
+        evc = self.evcore()
+        contract = evc.generate_contract_sdk(self.deploy_microblog(evc)['contract'], 'Microblog')
+        contract._api_write_key = 'not the account key'
+        calls = list()
+        sink = instrumentation.add_sink(calls.append)
+        try:
+            with self.assertRaises(EVHTTPError):
+                contract.changeBlogTitle(_blogTitle='rejected')
+        finally:
+            instrumentation.remove_sink(sink)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((calls[0].operation, calls[0].status_code, calls[0].error),
+                         ('contract_write:changeBlogTitle', 403, 'EVHTTPError'))
+        self.assertEqual(self.recorder.snapshot()['contract_write:changeBlogTitle']['errors'], 1)
+
+    def test_failing_sink_does_not_fail_the_call(self):
+        def broken(metrics):
+            raise RuntimeError('sink failure')
+
+        instrumentation.add_sink(broken)
+        try:
+            self.assertTrue(self.evcore().account)
+        finally:
+            instrumentation.remove_sink(broken)
+        self.assertEqual(self.recorder.snapshot()['login']['calls'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import threading
+import time
+import unittest
+
+from mock_api import SettingsDirTestCase
+from mock_api_server import write_settings
+from maticvigil.EVCore import EVCore
+
+
+class LazyLoginTest(SettingsDirTestCase):
+    latency = 0.1
+
+    def test_login_is_deferred_to_first_use(self):
+        requests_before = self.api.requests
+        evc = self.evcore(lazy_login=True)
+        self.assertEqual(self.api.requests, requests_before)
+        self.assertEqual(evc.account['api_prefix'], self.api.api_prefix)
+        evc.account
+        self.assertEqual(self.api.requests, requests_before + 1)
+
+    def test_concurrent_first_uses_log_in_once(self):
+        evc = self.evcore(lazy_login=True)
+        requests_before = self.api.requests
+        accounts = list()
+        users = [threading.Thread(target=lambda: accounts.append(evc.account)) for _ in range(8)]
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        self.assertEqual(self.api.requests, requests_before + 1)
+        self.assertEqual(len({id(a) for a in accounts}), 1)
+
+    def test_cached_account_info_is_used_without_logging_in(self):
+        write_settings(self.settings_dir, self.api.internal_api_endpoint)
+        account = EVCore().account
+        requests_before = self.api.requests
+        evc = EVCore(lazy_login=True)
+        self.assertEqual(evc.account['readKey'], account['readKey'])
+        self.assertEqual(self.api.requests, requests_before)
+        # too old to be served as is
+        evc = EVCore(lazy_login=True, account_info_ttl=0)
+        self.assertEqual(self.api.requests, requests_before)
+        evc.account
+        self.assertEqual(self.api.requests, requests_before + 1)
+
+    def test_background_login_does_not_block_construction(self):
+        begin = time.perf_counter()
+        evc = self.evcore(background_login=True)
+        self.assertLess(time.perf_counter() - begin, self.latency)
+        self.assertEqual(evc.account['api_prefix'], self.api.api_prefix)
+        self.assertGreaterEqual(time.perf_counter() - begin, self.latency)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import time
+import unittest
+
+from mock_api import MockAPITestCase
+from maticvigil.EVCore import normalize_contract_ref
+
+
+class NormalizeContractRefTest(unittest.TestCase):
+    def test_reference_forms(self):
+        address = '0x' + 'ab' * 20
+        self.assertEqual(normalize_contract_ref(address), (address, address))
+        self.assertEqual(normalize_contract_ref((address, 'Microblog')), (address, 'Microblog'))
+        self.assertEqual(normalize_contract_ref({'address': address, 'name': 'Microblog', 'appId': None}), (address, 'Microblog'))
+
+
+class ContractSDKPrefetchTest(MockAPITestCase):
+    latency = 0.05
+
+    # the stand-in API serves a microblog spec for any address
+    contract_addresses = ['0x' + f'{i:040x}' for i in range(1, 9)]
+
+    def setUp(self):
+        for contract_address in self.contract_addresses:
+            self.api.contract(contract_address)
+
+    def test_specs_are_fetched_concurrently(self):
+        evc = self.evcore()
+        r = evc.generate_contract_sdks([(a, 'Microblog') for a in self.contract_addresses] + ['0xnot-an-address'])
+        self.assertEqual(len(r), 9)
+        self.assertEqual([idx for idx, _ in r.errors], [8])
+        self.assertEqual([c.contract_address for c in r.results[:8]], self.contract_addresses)
+        # 8 sequential spec downloads take at least 0.4s
+        self.assertLess(r.elapsed, 0.3)
+
+    def test_prefetched_handles_are_handed_out_without_a_request(self):
+        evc = self.evcore()
+        evc.prefetch_contract_sdks(self.contract_addresses[:2])
+        time.sleep(3 * self.latency)
+        requests_before = self.api.requests
+        contract = evc.generate_contract_sdk(self.contract_addresses[0], 'Microblog')
+        self.assertEqual(self.api.requests, requests_before)
+        self.assertEqual(contract.contract_address, self.contract_addresses[0])
+        # a prefetched handle is handed out once
+        evc.generate_contract_sdk(self.contract_addresses[0], 'Microblog')
+        self.assertEqual(self.api.requests, requests_before + 1)
+
+    def test_prefetch_at_login(self):
+        evc = self.evcore(prefetch_contracts=True)
+        self.assertGreaterEqual(len(evc._prefetched), len(self.contract_addresses))
+        begin = time.perf_counter()
+        for contract_address in self.contract_addresses:
+            evc.generate_contract_sdk(contract_address, 'Microblog')
+        # waits at most on the builds still running, not on one download per contract
+        self.assertLess(time.perf_counter() - begin, 0.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
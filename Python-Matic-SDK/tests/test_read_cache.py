@@ -0,0 +1,93 @@
+import threading
+import time
+import unittest
+
+from mock_api import MockAPITestCase
+from maticvigil.exceptions import EVConnectionError
+from maticvigil.http_helper import HTTPTransport
+from maticvigil.read_cache import ReadCache
+
+CONTRACT = '0x' + 'ab' * 20
+
+
+class ReadCacheTest(unittest.TestCase):
+    def test_list_arguments_are_keyed(self):
+        cache = ReadCache()
+        key = ReadCache.make_key(CONTRACT, 'balances', [['0x01', '0x02'], {'a': 1}])
+        cache.put(key, [{'uint256': 1}])
+        self.assertEqual(cache.get(key), (True, [{'uint256': 1}]))
+        # keyed as sent in the read URL
+        self.assertEqual(key, ReadCache.make_key('0x' + 'AB' * 20, 'balances', (['0x01', '0x02'], {'a': 1})))
+
+    def test_invalidation_drops_entries_of_the_contract(self):
+        cache = ReadCache()
+        other = '0x' + 'cd' * 20
+        cache.put(ReadCache.make_key(CONTRACT, 'blogTitle', []), 'a')
+        cache.put(ReadCache.make_key(other, 'blogTitle', []), 'b')
+        cache.invalidate_contract(CONTRACT)
+        self.assertEqual(cache.get(ReadCache.make_key(CONTRACT, 'blogTitle', [])), (False, None))
+        self.assertEqual(cache.get(ReadCache.make_key(other, 'blogTitle', [])), (True, 'b'))
+
+    def test_put_of_a_read_started_before_invalidation_is_dropped(self):
+        cache = ReadCache()
+        key = ReadCache.make_key(CONTRACT, 'blogTitle', [])
+        generation = cache.generation(CONTRACT)
+        cache.invalidate_contract(CONTRACT)
+        cache.put(key, 'stale', generation)
+        self.assertEqual(cache.get(key), (False, None))
+        self.assertEqual(cache.stats['stale_puts'], 1)
+        cache.put(key, 'fresh', cache.generation(CONTRACT))
+        self.assertEqual(cache.get(key), (True, 'fresh'))
+
+
+class ContractReadCacheTest(MockAPITestCase):
+    def setUp(self):
+        self.cache = ReadCache(default_ttl=60)
+        self.evc = self.evcore(read_cache=self.cache)
+        self.contract = self.evc.generate_contract_sdk(self.deploy_microblog(self.evc)['contract'], 'Microblog')
+
+    def test_reads_are_cached_until_a_write(self):
+        title = self.contract.blogTitle()
+        requests_before = self.api.requests
+        self.assertEqual(self.contract.blogTitle(), title)
+        self.assertEqual(self.api.requests, requests_before)
+        self.contract.changeBlogTitle(_blogTitle='changed')
+        self.assertEqual(self.contract.blogTitle()['data'][0]['string'], 'changed')
+
+    def test_list_arguments_are_cached(self):
+        first = self.contract.getPostId(['0', '1'])
+        requests_before = self.api.requests
+        self.assertEqual(self.contract.getPostId(['0', '1']), first)
+        self.assertEqual(self.api.requests, requests_before)
+
+    def test_failed_write_invalidates(self):
+        evc = self.evcore(read_cache=self.cache, transport=HTTPTransport(read_timeout=0.2))
+        contract = evc.generate_contract_sdk(self.contract._contract_address, 'Microblog')
+        contract.blogTitle()
+        self.assertEqual(len(self.cache), 1)
+        self.api.latency = 0.5
+        try:
+            # the write times out, but may still be applied by the API
+            with self.assertRaises(EVConnectionError):
+                contract.changeBlogTitle(_blogTitle='maybe')
+        finally:
+            self.api.latency = 0.0
+        self.assertEqual(len(self.cache), 0)
+
+    def test_read_in_flight_during_invalidation_is_not_cached(self):
+        self.api.latency = 0.3
+        try:
+            reader = threading.Thread(target=self.contract.blogTitle)
+            reader.start()
+            time.sleep(0.1)
+            # a write completing while the read is in flight
+            self.cache.invalidate_contract(self.contract._contract_address)
+            reader.join()
+        finally:
+            self.api.latency = 0.0
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.stats['stale_puts'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import threading
+import time
+import unittest
+
+from mock_api import MockAPITestCase, MICROBLOG_SOL
+from maticvigil.exceptions import EVBaseException
+from maticvigil.registry import ContractRegistry
+
+FIRST = '0x' + '01' * 20
+SECOND = '0x' + '02' * 20
+THIRD = '0x' + '03' * 20
+
+
+class ContractRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.built = list()
+        self.registry = ContractRegistry(
+            [{'address': FIRST, 'name': 'Microblog'}, {'address': SECOND, 'name': 'Token'}, {'address': THIRD, 'name': 'token'}],
+            self.build,
+            max_handles=2
+        )
+
+    def build(self, contract_address, app_name):
+        self.built.append(contract_address)
+        return object()
+
+    def test_handles_are_built_on_first_access(self):
+        self.assertEqual(self.built, [])
+        handle = self.registry.handle('microblog')
+        self.assertIs(self.registry.handle(FIRST), handle)
+        self.assertEqual(self.built, [FIRST])
+        self.assertEqual(self.registry.stats, {'hits': 1, 'built': 1, 'evictions': 0, 'handles': 1})
+
+    def test_least_recently_used_handle_is_evicted(self):
+        first = self.registry.handle(FIRST)
+        self.registry.handle(SECOND)
+        self.registry.handle(FIRST)
+        self.registry.handle(THIRD)
+        self.assertEqual(self.registry.stats['evictions'], 1)
+        self.assertIs(self.registry.handle(FIRST), first)
+        self.registry.handle(SECOND)
+        self.assertEqual(self.built, [FIRST, SECOND, THIRD, SECOND])
+
+    def test_evict(self):
+        self.registry.handle('Microblog')
+        self.registry.evict('Microblog')
+        self.registry.handle(FIRST)
+        self.assertEqual(self.built, [FIRST, FIRST])
+
+    def test_lookups(self):
+        self.assertEqual(len(self.registry), 3)
+        self.assertIn('MICROBLOG', self.registry)
+        self.assertNotIn('Missing', self.registry)
+        with self.assertRaises(EVBaseException):
+            self.registry.handle('Missing')
+        # ambiguous names have to be looked up by address
+        with self.assertRaises(EVBaseException):
+            self.registry.get('Token')
+        self.assertEqual(self.registry.get(THIRD)['name'], 'token')
+        outside = '0x' + '04' * 20
+        self.registry.handle(outside)
+        self.assertEqual(self.built, [outside])
+
+    def test_concurrent_first_accesses_build_once(self):
+        def slow_build(contract_address, app_name):
+            time.sleep(0.05)
+            return self.build(contract_address, app_name)
+
+        registry = ContractRegistry([{'address': FIRST, 'name': 'Microblog'}], slow_build)
+        handles = list()
+        users = [threading.Thread(target=lambda: handles.append(registry.handle('Microblog'))) for _ in range(8)]
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        self.assertEqual(self.built, [FIRST])
+        self.assertEqual(len({id(h) for h in handles}), 1)
+
+
+class EVCoreRegistryTest(MockAPITestCase):
+    def test_contracts_are_looked_up_by_name(self):
+        evc = self.evcore(max_contract_handles=1)
+        contract_address = self.deploy_microblog(evc)['contract']
+        evc.registry.add({'address': contract_address, 'name': 'registry-test'})
+        contract = evc.contract('registry-test')
+        self.assertEqual(contract.contract_address, contract_address)
+        self.assertIs(evc.contract(contract_address), contract)
+        evc.contract(self.deploy_microblog(evc)['contract'])
+        self.assertEqual(evc.registry.stats['evictions'], 1)
+        self.assertIsNot(evc.contract('registry-test'), contract)
+
+    def test_deployed_contracts_are_registered(self):
+        evc = self.evcore()
+        evc.registry
+        deployed = evc.deploy(MICROBLOG_SOL, 'RegistryDeploy', {'_ownerName': 'owner', '_blogTitle': 'title'})
+        self.assertEqual(evc.contract('RegistryDeploy').contract_address, deployed['contract'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+import threading
+import time
+import unittest
+
+from mock_api import MockAPITestCase, closed_port_url
+from maticvigil.http_helper import HTTPTransport, make_http_call
+from maticvigil.resilience import ResiliencePolicy, RetryBudget, CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from maticvigil.exceptions import EVCircuitOpenError, EVConnectionError
+
+URL = 'https://api.example.com/v1.0/contract/0xabc/getPostId/1'
+
+
+def scripted_send(outcomes):
+    """
+    :return: send callable returning, or raising, the given outcomes in turn, and the list of calls made
+    """
+    calls = list()
+
+    def send():
+        outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+        calls.append(outcome)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return send, calls
+
+
+def status_of(response):
+    return response
+
+
+def policy(**kwargs):
+    kwargs.setdefault('backoff_base', 0.001)
+    kwargs.setdefault('retry_budget', RetryBudget(ratio=1.0, min_retries_per_second=100))
+    return ResiliencePolicy(**kwargs)
+
+
+class RetryTest(unittest.TestCase):
+    def test_reads_are_retried_on_retryable_status(self):
+        send, calls = scripted_send([503, 502, 200])
+        self.assertEqual(policy().call(URL, send, status_of, idempotent=True), 200)
+        self.assertEqual(len(calls), 3)
+
+    def test_reads_are_not_retried_on_client_errors(self):
+        send, calls = scripted_send([404, 200])
+        self.assertEqual(policy().call(URL, send, status_of, idempotent=True), 404)
+        self.assertEqual(len(calls), 1)
+
+    def test_attempts_are_capped(self):
+        send, calls = scripted_send([OSError('down')])
+        with self.assertRaises(OSError):
+            policy(max_attempts=3).call(URL, send, status_of, idempotent=True)
+        self.assertEqual(len(calls), 3)
+
+    def test_writes_are_only_retried_on_connect_errors(self):
+        class ConnectError(Exception):
+            pass
+
+        send, calls = scripted_send([ConnectError(), 200])
+        result = policy().call(URL, send, status_of, idempotent=False, connect_error=lambda e: isinstance(e, ConnectError))
+        self.assertEqual(result, 200)
+        self.assertEqual(len(calls), 2)
+        send, calls = scripted_send([TimeoutError(), 200])
+        with self.assertRaises(TimeoutError):
+            policy().call(URL, send, status_of, idempotent=False, connect_error=lambda e: isinstance(e, ConnectError))
+        self.assertEqual(len(calls), 1)
+        send, calls = scripted_send([503, 200])
+        self.assertEqual(policy().call(URL, send, status_of, idempotent=False), 503)
+        self.assertEqual(len(calls), 1)
+
+    def test_retry_budget_caps_retries(self):
+        p = policy(retry_budget=RetryBudget(ratio=0.0, min_retries_per_second=0))
+        send, calls = scripted_send([503, 200])
+        self.assertEqual(p.call(URL, send, status_of, idempotent=True), 503)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(p.stats()['retry_budget']['exhausted'], 1)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_after_consecutive_failures_and_fails_fast(self):
+        p = policy(max_attempts=1, breaker_failure_threshold=3, breaker_reset_timeout=60)
+        send, calls = scripted_send([503])
+        for _ in range(3):
+            p.call(URL, send, status_of, idempotent=True)
+        with self.assertRaises(EVCircuitOpenError):
+            p.call(URL, send, status_of, idempotent=True)
+        self.assertEqual(len(calls), 3)
+        stats = p.stats()
+        self.assertEqual(stats['short_circuited'], 1)
+        self.assertEqual(stats['breakers']['api.example.com/v1.0/contract/0xabc/getPostId']['state'], OPEN)
+        # other endpoints are not affected
+        send, _ = scripted_send([200])
+        self.assertEqual(p.call('https://api.example.com/v1.0/contract/0xabc/blogTitle', send, status_of, idempotent=True), 200)
+
+    def test_half_open_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        time.sleep(0.06)
+        # a single probe goes through
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertTrue(breaker.allow())
+
+
+class HedgingTest(unittest.TestCase):
+    def test_slow_primary_is_beaten_by_the_hedge(self):
+        calls = list()
+
+        def send():
+            calls.append(threading.current_thread().name)
+            if len(calls) == 1:
+                time.sleep(1.0)
+            return 200
+
+        p = policy(hedge_delay=0.01)
+        begin = time.perf_counter()
+        self.assertEqual(p.call(URL, send, status_of, idempotent=True), 200)
+        self.assertLess(time.perf_counter() - begin, 0.5)
+        stats = p.stats()
+        self.assertEqual((stats['hedges'], stats['hedge_wins']), (1, 1))
+        self.assertNotIn(threading.current_thread().name, calls)
+
+    def test_fast_primary_is_not_hedged(self):
+        send, calls = scripted_send([200])
+        p = policy(hedge_delay=0.5)
+        self.assertEqual(p.call(URL, send, status_of, idempotent=True), 200)
+        time.sleep(0.6)
+        self.assertEqual((len(calls), p.stats()['hedges']), (1, 0))
+
+    def test_primary_error_is_raised_when_no_hedge_was_sent(self):
+        send, calls = scripted_send([OSError('down')])
+        with self.assertRaises(OSError):
+            policy(max_attempts=1, hedge_delay=0.5).call(URL, send, status_of, idempotent=True)
+        self.assertEqual(len(calls), 1)
+
+    def test_reads_are_not_serialized_by_the_hedge_pool(self):
+        def send():
+            time.sleep(0.1)
+            return 200
+
+        p = policy(hedge_delay=1.0, hedge_max_workers=1)
+        callers = [threading.Thread(target=p.call, args=(URL, send, status_of, True)) for _ in range(8)]
+        begin = time.perf_counter()
+        for caller in callers:
+            caller.start()
+        for caller in callers:
+            caller.join()
+        self.assertLess(time.perf_counter() - begin, 0.5)
+
+    def test_hedge_takes_over_a_failed_primary(self):
+        def send():
+            if threading.current_thread().name.startswith('EVHedge'):
+                return 200
+            time.sleep(0.1)
+            return 503
+
+        p = policy(max_attempts=1, hedge_delay=0.01)
+        self.assertEqual(p.call(URL, send, status_of, idempotent=True), 200)
+        stats = p.stats()
+        self.assertEqual((stats['hedges'], stats['hedge_wins']), (1, 1))
+
+    def test_writes_are_not_hedged(self):
+        send, calls = scripted_send([200])
+        p = policy(hedge_delay=0.0)
+        self.assertEqual(p.call(URL, send, status_of, idempotent=False), 200)
+        time.sleep(0.05)
+        self.assertEqual((len(calls), p.stats()['hedges']), (1, 0))
+
+
+class TransportRetryTest(MockAPITestCase):
+    def test_timed_out_write_is_not_sent_twice(self):
+        evc = self.evcore(transport=HTTPTransport(read_timeout=0.2, resilience=policy()))
+        contract = evc.generate_contract_sdk(self.deploy_microblog(evc)['contract'], 'Microblog')
+        requests_before = self.api.requests
+        self.api.latency = 0.5
+        try:
+            with self.assertRaises(EVConnectionError):
+                contract.changeBlogTitle(_blogTitle='once')
+        finally:
+            self.api.latency = 0.0
+        self.assertEqual(self.api.requests - requests_before, 1)
+        self.assertEqual(evc._transport.resilience.stats()['retries'], 0)
+
+    def test_refused_write_is_retried(self):
+        p = policy(max_attempts=3)
+        url = closed_port_url(path='/api/deploy')
+        with self.assertRaises(EVConnectionError):
+            make_http_call('post', url, params={'a': 1}, transport=HTTPTransport(resilience=p))
+        self.assertEqual(p.stats()['retries'], 2)
+
+    def test_timed_out_read_is_retried(self):
+        p = policy(max_attempts=2)
+        evc = self.evcore(transport=HTTPTransport(read_timeout=0.2, resilience=p))
+        contract = evc.generate_contract_sdk(self.deploy_microblog(evc)['contract'], 'Microblog')
+        requests_before = self.api.requests
+        self.api.latency = 0.5
+        try:
+            with self.assertRaises(EVConnectionError):
+                contract.blogTitle()
+        finally:
+            self.api.latency = 0.0
+        self.assertEqual(self.api.requests - requests_before, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
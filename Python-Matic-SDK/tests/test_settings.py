@@ -0,0 +1,75 @@
+import os
+import unittest
+
+from mock_api import SettingsDirTestCase
+from mock_api_server import write_settings
+from maticvigil.EVCore import EVCore, CLEAN_SLATE_SETTINGS, load_settings
+from maticvigil.exceptions import EVBaseException
+from maticvigil.http_helper import HTTPTransport
+from maticvigil.spec_cache import SpecCache
+
+
+class SettingsFileTest(SettingsDirTestCase):
+    def test_missing_settings_file_is_created(self):
+        self.assertEqual(load_settings(), (CLEAN_SLATE_SETTINGS, False))
+        self.assertTrue(os.path.isfile(os.path.join(self.settings_dir, 'settings.json')))
+        self.assertEqual(load_settings(), (CLEAN_SLATE_SETTINGS, True))
+
+    def test_login_from_settings_file(self):
+        write_settings(self.settings_dir, self.api.internal_api_endpoint)
+        evc = EVCore()
+        self.assertEqual(evc.account['api_prefix'], self.api.api_prefix)
+        self.assertTrue(os.path.isfile(os.path.join(self.settings_dir, 'account_info.json')))
+
+    def test_caches_are_off_by_default(self):
+        write_settings(self.settings_dir, self.api.internal_api_endpoint)
+        evc = EVCore()
+        self.assertEqual((evc.spec_cache, evc.compile_cache, evc.codegen, evc.read_cache), (None, None, None, None))
+        evc = EVCore(spec_cache=True, compile_cache=True, codegen=True)
+        self.assertEqual(evc.spec_cache.cache_dir, os.path.join(self.settings_dir, 'specs'))
+        self.assertEqual(evc.compile_cache.cache_dir, os.path.join(self.settings_dir, 'compiled'))
+        self.assertEqual(evc.codegen.output_dir, os.path.join(self.settings_dir, 'contracts'))
+
+
+class InMemorySettingsTest(SettingsDirTestCase):
+    def test_nothing_is_read_or_written_on_disk(self):
+        write_settings(self.settings_dir, 'http://127.0.0.1:1/unused')
+        evc = self.evcore(spec_cache=True, compile_cache=True)
+        contract = evc.generate_contract_sdk(self.deploy_microblog(evc)['contract'], 'Microblog')
+        self.assertEqual(contract.blogTitle()['data'][0]['string'], 'TheBlog')
+        self.assertEqual((evc.spec_cache, evc.compile_cache), (None, None))
+        self.assertEqual(os.listdir(self.settings_dir), ['settings.json'])
+
+    def test_codegen_needs_an_explicit_directory(self):
+        with self.assertRaises(EVBaseException):
+            self.evcore(codegen=True)
+
+    def test_account_info_skips_the_login(self):
+        account_info = self.evcore().account
+        requests_before = self.api.requests
+        evc = self.evcore(account_info=account_info)
+        self.assertIs(evc.account, account_info)
+        self.assertEqual(self.api.requests, requests_before)
+
+    def test_tenants_share_a_transport_and_spec_cache(self):
+        transport = HTTPTransport()
+        spec_cache = SpecCache()
+        tenants = [
+            self.evcore(settings=self.settings(PRIVATEKEY=f'0x{i:064x}'), transport=transport, spec_cache=spec_cache)
+            for i in range(1, 4)
+        ]
+        contract_address = self.deploy_microblog(tenants[0])['contract']
+        for evc in tenants:
+            self.assertIs(evc.transport, transport)
+            self.assertIs(evc.spec_cache, spec_cache)
+            evc.generate_contract_sdk(contract_address, 'Microblog')
+        self.assertEqual(spec_cache.stats['misses'], 1)
+
+    def test_failed_login_leaves_no_account(self):
+        evc = self.evcore(settings=self.settings(INTERNAL_API_ENDPOINT='http://127.0.0.1:1/api'))
+        self.assertIsNone(evc.account)
+        self.assertEqual(os.listdir(self.settings_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
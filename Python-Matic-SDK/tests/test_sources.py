@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from maticvigil.exceptions import EVBaseException
+from maticvigil.sources import ImportMemo, SourceResolver, scan_imports, antlr_imports
+
+try:
+    import solidity_parser
+except ImportError:
+    solidity_parser = None
+
+IMPORT_FORMS = '''
+pragma solidity ^0.8.0;
+// import "commented/out.sol";
+/* import "block/comment.sol";
+   still commented; */
+import "plain.sol";
+import 'single/quoted.sol' as Single;
+import * as Everything from "./star.sol";
+import {A, B as C} from "../braces.sol";
+import
+    "multi/line.sol";
+contract Imports {
+    string constant NOT_AN_IMPORT = 'import "string/literal.sol";';
+    function importer() public pure returns (uint) { return 1; }
+}
+'''
+IMPORT_PATHS = ['plain.sol', 'single/quoted.sol', './star.sol', '../braces.sol', 'multi/line.sol']
+
+
+class ScanImportsTest(unittest.TestCase):
+    def test_import_forms(self):
+        self.assertEqual(scan_imports(IMPORT_FORMS), IMPORT_PATHS)
+
+    def test_unterminated_comment(self):
+        self.assertEqual(scan_imports('import "a.sol"; /* import "b.sol";'), ['a.sol'])
+
+    @unittest.skipIf(solidity_parser is None, 'solidity_parser is not installed')
+    def test_same_imports_as_the_full_parse(self):
+        self.assertEqual(scan_imports(IMPORT_FORMS), antlr_imports(IMPORT_FORMS))
+
+
+class SourceResolverTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.include_dir = os.path.join(self.root, 'node_modules')
+        self.write('contracts/Main.sol', 'import "./lib/A.sol";\nimport "@oz/token/T.sol";\ncontract Main {}')
+        self.write('contracts/lib/A.sol', 'import "../B.sol";\ncontract A {}')
+        # cycles are legal, B is bundled once
+        self.write('contracts/B.sol', 'import "./lib/A.sol";\ncontract B {}')
+        self.write('node_modules/@oz/token/T.sol', 'import "./Base.sol";\ncontract T {}')
+        self.write('node_modules/@oz/token/Base.sol', 'contract Base {}')
+
+    def write(self, path, content):
+        path = os.path.join(self.root, *path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def resolver(self, memo=None):
+        return SourceResolver(include_paths=[self.include_dir], memo=memo if memo is not None else ImportMemo())
+
+    def test_imports_are_bundled_recursively(self):
+        sources, main_unit = self.resolver().resolve(os.path.join(self.root, 'contracts', 'Main.sol'))
+        self.assertEqual(main_unit, 'ev-py-sdk/Main.sol')
+        self.assertEqual(list(sources), [
+            'ev-py-sdk/Main.sol', 'ev-py-sdk/lib/A.sol', 'ev-py-sdk/B.sol', '@oz/token/T.sol', '@oz/token/Base.sol'
+        ])
+        self.assertEqual(sources['@oz/token/Base.sol'], {'content': 'contract Base {}'})
+
+    def test_unchanged_files_are_not_scanned_again(self):
+        memo = ImportMemo()
+        main = os.path.join(self.root, 'contracts', 'Main.sol')
+        self.resolver(memo).resolve(main)
+        self.resolver(memo).resolve(main)
+        self.assertEqual(memo.stats, {'hits': 5, 'misses': 5, 'entries': 5})
+        self.write('contracts/B.sol', 'contract B {}')
+        sources, _ = self.resolver(memo).resolve(main)
+        self.assertEqual(memo.stats['misses'], 6)
+        self.assertEqual(sources['ev-py-sdk/B.sol'], {'content': 'contract B {}'})
+
+    def test_unresolvable_imports(self):
+        missing = self.write('contracts/Missing.sol', 'import "@oz/missing.sol";')
+        with self.assertRaises(EVBaseException):
+            self.resolver().resolve(missing)
+        outside = self.write('contracts/Outside.sol', 'import "../../Base.sol";')
+        with self.assertRaises(EVBaseException):
+            self.resolver().resolve(outside)
+        unreadable = self.write('contracts/Unreadable.sol', 'import "./NotThere.sol";')
+        with self.assertRaises(EVBaseException):
+            self.resolver().resolve(unreadable)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+import unittest
+
+from mock_api import MockAPITestCase
+from maticvigil.exceptions import EVBaseException
+from maticvigil.spec_cache import SpecCache
+
+API_PREFIX = 'https://beta-api.example.com/api/v1.0'
+CONTRACT = '0x' + 'Ab' * 20
+SPEC = {'paths': {'/blogTitle': {'get': {'parameters': []}}}}
+
+
+class SpecCacheDiskTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_saved_spec_is_read_back(self):
+        SpecCache(self.cache_dir).put(API_PREFIX, CONTRACT, SPEC, etag='"v1"')
+        # another instance, as in a restarted process
+        entry = SpecCache(self.cache_dir).get(API_PREFIX, CONTRACT.lower())
+        self.assertEqual((entry['spec'], entry['etag']), (SPEC, '"v1"'))
+        self.assertIsNone(SpecCache(self.cache_dir).get(API_PREFIX + '/other', CONTRACT))
+
+    def test_invalidate_and_clear(self):
+        cache = SpecCache(self.cache_dir)
+        cache.put(API_PREFIX, CONTRACT, SPEC)
+        cache.invalidate(API_PREFIX, CONTRACT)
+        self.assertIsNone(cache.get(API_PREFIX, CONTRACT))
+        cache.put(API_PREFIX, CONTRACT, SPEC)
+        cache.clear()
+        self.assertIsNone(cache.get(API_PREFIX, CONTRACT))
+
+    def test_invalid_addresses_are_not_used_as_paths(self):
+        with self.assertRaises(EVBaseException):
+            SpecCache(self.cache_dir).put(API_PREFIX, '../../spec', SPEC)
+
+
+class SpecCacheReuseTest(MockAPITestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def swagger_requests(self, evc, contract_address, **kwargs):
+        requests_before = self.api.requests
+        contract = evc.generate_contract_sdk(contract_address, 'Microblog', **kwargs)
+        self.assertIn('string', contract.blogTitle()['data'][0])
+        # one request is the read above
+        return self.api.requests - requests_before - 1
+
+    def test_spec_is_downloaded_once(self):
+        evc = self.evcore(spec_cache=SpecCache(self.cache_dir))
+        contract_address = self.deploy_microblog(evc)['contract']
+        self.assertEqual(self.swagger_requests(evc, contract_address), 1)
+        restarted = self.evcore(spec_cache=SpecCache(self.cache_dir))
+        self.assertEqual(self.swagger_requests(restarted, contract_address), 0)
+        self.assertEqual(restarted.spec_cache.stats['hits'], 1)
+
+    def test_stale_spec_is_revalidated(self):
+        evc = self.evcore(spec_cache=SpecCache(self.cache_dir, ttl=0))
+        contract_address = self.deploy_microblog(evc)['contract']
+        self.swagger_requests(evc, contract_address)
+        self.assertEqual(self.swagger_requests(evc, contract_address), 1)
+        self.assertEqual(self.swagger_requests(evc, contract_address, refresh_spec=True), 1)
+        stats = evc.spec_cache.stats
+        self.assertEqual((stats['misses'], stats['revalidated'], stats['refreshed']), (1, 1, 1))
+
+    def test_spec_cache_is_off_by_default(self):
+        evc = self.evcore()
+        self.assertIsNone(evc.spec_cache)
+        contract_address = self.deploy_microblog(evc)['contract']
+        self.assertEqual(self.swagger_requests(evc, contract_address), 1)
+        self.assertEqual(self.swagger_requests(evc, contract_address), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+from mock_api import MockAPITestCase
+from maticvigil.EVContractUtils import ABIHelper
+from maticvigil.exceptions import EVValidationError
+from maticvigil.validation import compile_type_checker
+
+ADDRESS = '0x52908400098527886E0F7030069857D2E4169EE7'
+
+
+class ABIHelperTest(unittest.TestCase):
+    def test_first_pass_checks_are_lenient(self):
+        # the strict checks belong to validation.py, the public helpers keep converting what they always did
+        errors = dict()
+        self.assertEqual(ABIHelper.first_pass_check_int(True, 'a', 'uint8', errors), (1, False))
+        self.assertEqual(ABIHelper.first_pass_check_int(256, 'a', 'uint8', errors), (256, False))
+        self.assertEqual(ABIHelper.first_pass_check_string(['a'], 'b', 'string', errors), ("['a']", False))
+        self.assertEqual(ABIHelper.first_pass_check_byte('0x0102', 'c', 'bytes32', errors), (b'\x01\x02', False))
+        self.assertEqual(ABIHelper.first_pass_check_address(ADDRESS, 'd', 'address', errors), (ADDRESS, False))
+        self.assertEqual(errors, dict())
+        self.assertEqual(ABIHelper.first_pass_check_bool(True, 'e', 'bool', errors), (False, True))
+        self.assertEqual(errors['e'], 'Expected type: bool. Supplied argument not a boolean')
+
+    def test_array_checks_convert_in_place(self):
+        errors = dict()
+        values = ['1', 'x', 2]
+        ret, error_flag = ABIHelper.first_pass_check_int_arr(values, 'ids', 'uint256', errors)
+        self.assertIs(ret, values)
+        self.assertTrue(error_flag)
+        self.assertEqual(values, [1, 0, 2])
+        self.assertEqual(errors['ids']['failed_indexes'], [1])
+
+
+class TypeCheckerTest(unittest.TestCase):
+    def test_stricter_than_abi_helper(self):
+        cases = (
+            ('uint8', 300, 'Expected type: uint8. Supplied argument 300 out of range'),
+            ('int256', True, 'Expected type: int256. Supplied argument not a valid integer'),
+            ('uint256', 1.5, 'Expected type: uint256. Supplied argument 1.5 not a whole number'),
+            ('string', ['a'], 'Expected type: string. Supplied argument not a valid string'),
+            ('bytes', '0xzz', 'Expected type: bytes. Supplied argument 0xzz not a hexadecimal value'),
+            ('bytes32', '0x00', 'Expected type: bytes32. Supplied argument is 1 bytes long')
+        )
+        for sol_type, value, message in cases:
+            with self.assertRaises(ValueError) as ctx:
+                compile_type_checker(sol_type)(value)
+            self.assertEqual(str(ctx.exception), message)
+
+    def test_abi_helper_errors_are_reported(self):
+        cases = (
+            (ABIHelper.first_pass_check_int, 'uint8', 'x'),
+            (ABIHelper.first_pass_check_bool, 'bool', 'yes'),
+            (ABIHelper.first_pass_check_address, 'address', '0x12'),
+            (ABIHelper.first_pass_check_address, 'address', ADDRESS.lower()[:-1] + 'E')
+        )
+        for first_pass_check, sol_type, value in cases:
+            errors = dict()
+            first_pass_check(value, 'p', sol_type, errors)
+            with self.assertRaises(ValueError) as ctx:
+                compile_type_checker(sol_type)(value)
+            self.assertEqual(str(ctx.exception), errors['p'])
+
+    def test_checked_values(self):
+        self.assertEqual(compile_type_checker('uint8')(' 0x10 '), 16)
+        self.assertEqual(compile_type_checker('bool')(1), True)
+        self.assertEqual(compile_type_checker('address')(ADDRESS.lower()), ADDRESS.lower())
+        self.assertEqual(compile_type_checker('address')(ADDRESS), ADDRESS)
+        self.assertEqual(compile_type_checker('bytes2')(b'\x01\x02'), '0x0102')
+        self.assertEqual(compile_type_checker('bytes')('hi'), '0x6869')
+        self.assertEqual(compile_type_checker('uint8[][]')('[[1], ["0x10"]]'), [[1], [16]])
+        with self.assertRaises(ValueError) as ctx:
+            compile_type_checker('uint8[2]')([1, 300])
+        self.assertTrue(str(ctx.exception).startswith('element 1: '))
+
+
+class ContractValidationTest(MockAPITestCase):
+    def test_invalid_arguments_are_not_sent(self):
+        evc = self.evcore(validate_args=True)
+        contract = evc.generate_contract_sdk(self.deploy_microblog(evc)['contract'], 'Microblog')
+        requests_before = self.api.requests
+        with self.assertRaises(EVValidationError) as ctx:
+            contract.changeBlogTitle(_blogTitle=['not', 'a', 'string'])
+        self.assertEqual(set(ctx.exception.errors), {'_blogTitle'})
+        self.assertEqual(self.api.requests, requests_before)
+        self.assertIn('txHash', contract.changeBlogTitle(_blogTitle=5)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import threading
+import unittest
+
+from mock_api import MockAPITestCase
+from maticvigil.exceptions import EVBaseException
+
+
+class WritePipelineShutdownTest(MockAPITestCase):
+    # slow enough writes for submit() calls to block on the full queue
+    latency = 0.01
+
+    def setUp(self):
+        evc = self.evcore()
+        self.contract = evc.generate_contract_sdk(self.deploy_microblog(evc)['contract'], 'Microblog')
+
+    def test_queued_writes_are_sent_on_close(self):
+        pipeline = self.contract.write_pipeline(submitters=2)
+        futures = [pipeline.submit('changeBlogTitle', _blogTitle=f't{i}') for i in range(10)]
+        pipeline.close()
+        self.assertTrue(all(f.done() for f in futures))
+        self.assertEqual(len({f.result() for f in futures}), 10)
+        with self.assertRaises(EVBaseException):
+            pipeline.submit('changeBlogTitle', _blogTitle='late')
+
+    def test_submit_interrupted_by_close_is_not_left_queued(self):
+        pipeline = self.contract.write_pipeline(submitters=2)
+        validate = self.contract._validated_write_args
+
+        def close_while_validating(fn_name, fn_kwargs):
+            # close() completes while submit() is checking the arguments
+            pipeline.close()
+            return validate(fn_name, fn_kwargs)
+
+        self.contract._validated_write_args = close_while_validating
+        try:
+            future = pipeline.submit('changeBlogTitle', _blogTitle='racing')
+        except EVBaseException:
+            return
+        finally:
+            del self.contract._validated_write_args
+        future.result(timeout=5)
+
+    def test_submits_racing_close_resolve_or_fail(self):
+        for _ in range(5):
+            # a small queue keeps submitters blocked in put() while close() runs
+            pipeline = self.contract.write_pipeline(submitters=2, max_queue_size=2)
+            futures = list()
+            rejected = list()
+            start = threading.Barrier(9)
+
+            def submit():
+                start.wait()
+                for i in range(10):
+                    try:
+                        futures.append(pipeline.submit('changeBlogTitle', _blogTitle=f't{i}'))
+                    except EVBaseException:
+                        rejected.append(i)
+
+            submitters = [threading.Thread(target=submit) for _ in range(8)]
+            for t in submitters:
+                t.start()
+            start.wait()
+            pipeline.close()
+            for t in submitters:
+                t.join()
+            self.assertEqual(len(futures) + len(rejected), 80)
+            # every accepted write was sent before the submitter threads stopped
+            self.assertTrue(all(f.done() for f in futures))
+            self.assertEqual(pipeline.stats['submitted'], len(futures))
+            self.assertEqual(pipeline.stats['succeeded'], len(futures))
+
+
+if __name__ == '__main__':
+    unittest.main()